@@ -1,203 +1,254 @@
 /* Edward Nusinovich */
 /* Implementing Genetic Algorithm for simple functions */
 
+/* Built as a shared library (libgenetic.so) providing the operators of a genetic algorithm, */
+/* Python calls them on NumPy arrays through ctypes (see MatPy/genetic_operators.py). */
+/* Nothing here allocates memory: the caller owns every array. */
+
 #include "genetic.h"
 
-int main(){
-	
-	/* SETUP AND INITIAL CONDITIONS */
-	
-	int popsize = 20; /* Members of the initial population (if odd, change loop iterations) */
-	double *pGen = malloc(sizeof(double)*popsize); /* Leaves space for twenty doubles (160 bytes) */
-	randomgen(pGen,popsize); /* Establishes first generation */
-	int tolerance = 100; /* We know that the actual solution here is 0, so if a selection is within 10 of zero, we can stop the algorithm */ 
-	double minfitness;
-	
-	int best; /* Will store the result that is currently the optimal value on the list */
-	
-	do{ /* Continues producing new populations until a members is good enough */
-	
-		int iter;
-		int totaliters = popsize/2; /* We must have as many reproductive cycles as popsize/2 --- each time, two offspring are generated */
-	
-		double *newGen = malloc(sizeof(double)*20);
-	
-		for(iter=0;iter<totaliters;iter++){
-	
-			double *newGen = malloc(sizeof(double)*popsize); /* Will hold our new generation */
-			int counter = 0; /* Stores position where members of new generation will be saved */
-
-			double *values = funcvals(pGen,popsize);
-
-			/* At this point we have our generation -- pGen, and our set of fitness scores -- fitness */
-			double *fitness = fitnessscores(pGen, values, popsize); /* Assigns a fitness score to each population member */		
-			
-			/* Selects two members of our population based on roulette wheel selection */
-			int *pairofchromosomes = roulettewheel(fitness, popsize);
-
-			float firstselection = pGen[pairofchromosomes[0]];
-			float secondselection = pGen[pairofchromosomes[1]];
-			
-			
-			printtable(pGen,values,fitness,popsize);
-			printf("The first selection is %f and the second is %f\n",firstselection,secondselection); exit(0);/* DEBUG, CONFIRMS THAT WE ARE RANDOMLY SELECTING FROM INIT POP */
-			
-			/* Mutation of population */
-			printf("Before mutation:\n");
-			printall(pGen,popsize);
-			
-			mutate(pGen,0.05,popsize); /* This suggests a relatively low likelihood of mutation */
-			
-			printf("After mutation\n");
-			printall(pGen,popsize);
-			
-			/* Should continue iterating until we have a full new population */
-			
-			
-			/* .... */
-			/* .... */
-			/* .... */       
-			/* .... */
-			
-			
-			pGen = newGen;
-			
-		}
-	
-	}while(minfitness>=tolerance); /* cutoff condition */
-	
-	printf("\nThe best solution found was %f at %f.\n",minfitness, best);	/* Inform at conclusion of algorithm */
-	
-	return 0;
+/* Seeds a generator (any seed, including zero, gives a usable state) */
+void ga_seed(uint64_t *state, uint64_t seed){
+
+	/* splitmix64 spreads the bits of the seed so nearby seeds give unrelated sequences */
+	uint64_t z = seed + 0x9E3779B97F4A7C15ULL;
+	z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9ULL;
+	z = (z ^ (z >> 27)) * 0x94D049BB133111EBULL;
+	z = z ^ (z >> 31);
+
+	*state = z ? z : 0x9E3779B97F4A7C15ULL; /* xorshift needs a nonzero state */
+}
+
+/* Returns a double from zero (inclusive) to one (exclusive) */
+double ga_uniform(uint64_t *state){
+
+	/* xorshift64* */
+	uint64_t x = *state;
+	x ^= x >> 12;
+	x ^= x << 25;
+	x ^= x >> 27;
+	*state = x;
+
+	return ((x * 0x2545F4914F6CDD1DULL) >> 11) * (1.0/9007199254740992.0); /* top 53 bits */
 }
 
-/* Returns an array of two distinct elements that are selected based on fitness */
-int *roulettewheel(double *fitness, int nums){
-
-	double totalfitness = baselined(fitness,nums); 
-	double *wheel = probability(fitness,totalfitness,nums); /* stores likelihood of the selection of any element [0,1) */
-	
-	int selected = rouletteindex(wheel, randomfloat(), nums); /* This is the index of the selected member */
-	
-	int secondselection; /* Next selection shouldn't be the same as the first */
-	while((secondselection=rouletteindex(wheel,randomfloat(), nums))==selected){printf("Collision... Trying again...\n");} 
-		
-	int *pairofchromosomes = malloc(sizeof(int)*2);
-		
-	pairofchromosomes[0] = selected;
-	pairofchromosomes[1] = secondselection;
-	
-	return pairofchromosomes; /* Returns a pair of distinct elements */
+/* Returns a normally distributed double (Box-Muller) */
+double ga_normal(uint64_t *state){
+
+	double u = 1.0 - ga_uniform(state); /* (0,1], so the log is finite */
+	double v = ga_uniform(state);
+
+	return sqrt(-2.0*log(u))*cos(2.0*M_PI*v);
 }
 
-/* Selects an index based on its weight */
-int rouletteindex(double *wheel, double randbaselined, int nums){
-	
+/* Returns largest element of a list */
+double maxoflist(const double *list, int nums){
+
+	double max = list[0]; /* Initially set to first value */
 	int i;
-	for(i=0;i<nums;i++){
-		if(randbaselined<wheel[i]) return i;
-		randbaselined = randbaselined - wheel[i];
+	for(i=1;i<nums;i++){
+		if(list[i]>max){
+			max = list[i];
+		}
 	}
-}
 
-/* Baselines the list of fitness scores, returns total fitness */
-double baselined(double *fitness, int nums){
-	
-	double baseline = minoflist(fitness,nums); /* Will set the baseline to the minimum fitness score */
+	return max;
+}
 
-	double totalfitness=0;
+/* Returns smallest element of list, to baseline */
+double minoflist(const double *list, int nums){
 
+	double min = list[0];
 	int i;
-	for(i=0;i<nums;i++){
-		fitness[i]=fitness[i]-baseline; /* Will set every point to be relative to the baseline */
-		totalfitness = totalfitness + fitness[i];
+	for(i=1;i<nums;i++){
+		if(list[i]<min){
+			min = list[i];
+		}
 	}
 
-	return totalfitness;
+	return min;
 }
 
-/* Returns the probability that any individual element would be selected */
-double *probability(double *fitness,double totalfitness, int nums){
+/* Roulette wheel selection: stores count indices in selected, each chosen with a probability proportional */
+/* to its fitness (distance from the largest finite value in the generation). Members whose value is not finite */
+/* (failed evaluations) have no fitness, and if every finite member is as fit, they are all equally likely. */
+/* wheel (nums doubles, provided by the caller) holds the running total of the fitness, which is searched for every selection. */
+void ga_select(const double *values, int nums, int count, int *selected, double *wheel, uint64_t *state){
 
-	double *probability = malloc(sizeof(double)*nums);
+	double max = 0;
+	int finite = 0;
+	int i, j;
 
-	int i;
 	for(i=0;i<nums;i++){
-		probability[i] = fitness[i]/totalfitness;
+		if(isfinite(values[i])){
+			if(!finite || values[i]>max){
+				max = values[i];
+			}
+			finite++;
+		}
 	}
 
-	return probability;
-}
+	double totalfitness = 0;
+	int last = nums-1; /* the last member with any fitness, which takes any rounding at the end of the wheel */
 
-/* Will return a fitness score for each person (distance from max in generation) */
-double *fitnessscores(double *pGen, double *values, int nums){
-	
-	double *fitness = malloc(sizeof(double)*nums);
-	double max = maxoflist(values,nums);
-	
-	int i;
 	for(i=0;i<nums;i++){
-		fitness[i] = max - values[i]; 
+		if(isfinite(values[i])){
+			totalfitness = totalfitness + (max - values[i]);
+		}
+		wheel[i] = totalfitness;
 	}
 
-	return fitness;
+	if(!(totalfitness > 0)){
+		/* Every finite member is as fit (or none is finite, then every member is) */
+		totalfitness = 0;
+		for(i=0;i<nums;i++){
+			if(isfinite(values[i]) || !finite){
+				totalfitness = totalfitness + 1;
+			}
+			wheel[i] = totalfitness;
+		}
+	}
+
+	while(last>0 && wheel[last]==wheel[last-1]) last--;
+
+	for(j=0;j<count;j++){
+
+		/* The first member whose running total passes the random point (binary search) */
+		double point = ga_uniform(state)*totalfitness;
+		int low = 0, high = last;
+
+		while(low<high){
+			int middle = (low+high)/2;
+
+			if(wheel[middle] > point) high = middle;
+			else low = middle+1;
+		}
+
+		selected[j] = low;
+	}
 }
 
-double *funcvals(double *pGen, int nums){
+/* Blend crossover: rows 2i and 2i+1 of parents are a pair, and with probability rate every gene of their children */
+/* is taken at a random point between theirs (otherwise they are copied). The first children of the pairs are */
+/* stored in rows 0 to pairs-1 of children, the second children in rows pairs to 2*pairs-1. */
+void ga_crossover(const double *parents, int pairs, int genes, double rate, double *children, uint64_t *state){
 
-	double *values = malloc(sizeof(double)*nums); /* Will store a fitness score for each point */
+	int i, k;
+	for(i=0;i<pairs;i++){
 
-	int i;
-	for(i=0;i<nums;i++){
-		values[i] = objective(pGen[i]);
+		const double *first = parents + (2*i)*genes;
+		const double *second = parents + (2*i+1)*genes;
+		double *firstchild = children + i*genes;
+		double *secondchild = children + (pairs+i)*genes;
+
+		int crosses = ga_uniform(state) < rate;
+
+		for(k=0;k<genes;k++){
+
+			double mixing = crosses ? ga_uniform(state) : 1.0;
+
+			firstchild[k] = mixing*first[k] + (1-mixing)*second[k];
+			secondchild[k] = mixing*second[k] + (1-mixing)*first[k];
+		}
 	}
+}
+
+/* Traverses each gene of the population and, with probability rate, moves it by a normal step */
+/* of scale times the width of its bounds, keeping it within them (in place) */
+void ga_mutate(double *population, int nums, int genes, double rate, double scale, const double *lower, const double *upper, uint64_t *state){
+
+	int i, k;
+	for(i=0;i<nums;i++){
+		for(k=0;k<genes;k++){
+
+			double *gene = population + i*genes + k;
+
+			if(ga_uniform(state) < rate){
+				*gene = *gene + ga_normal(state)*scale*(upper[k]-lower[k]);
+			}
 
-	return values;
+			if(*gene < lower[k]) *gene = lower[k];
+			if(*gene > upper[k]) *gene = upper[k];
+		}
 	}
+}
+
+#ifdef GENETIC_MAIN
 
 /* (Fitness Function) x^2 will be our fitness function for first GA */
 double objective(double x){
 	return x*x;
 }
 
+/* Demonstrates the operators by minimizing x^2 (build with make demo) */
+int main(){
 
-/* Swaps the last 8 bits of two chromosomes (crossing-over) */
-/* WORKS FOR INTS, NOT DOUBLES */
-int *swapchromosomes(int firstchrom, int secondchrom){
-	
-	int bitshift = randinrange(7);
-	
-	int lasteightfirst = firstchrom & (0xff>>bitshift); /* gets last eight */
-	int lasteightsecond = secondchrom & (0xff>>bitshift);
-	
-	firstchrom = firstchrom ^ lasteightfirst; /* zeroes out last eight */
-	secondchrom = secondchrom ^ lasteightsecond;
-	
-	firstchrom = firstchrom | lasteightsecond; /* adds in bits from opposite solution */
-	secondchrom = secondchrom |lasteightfirst;
-	
-	int *swappedpair = malloc(sizeof(int)*2);
-	swappedpair[0] = firstchrom;
-	swappedpair[1] = secondchrom;
-	
-	return swappedpair;
-}
+	/* SETUP AND INITIAL CONDITIONS */
 
+	int popsize = 20; /* Members of the population (even, so they breed in pairs) */
+	int generations = 200;
+	double lower = -1000, upper = 1000;
 
-/* Traverses each member of the population and sometimes randomly mutates based on rate */
-void mutate(double *pGen, double rate, int nums){
-	
-	int i;
-	for(i=0;i<nums;i++){
-		
-		float willmutate = randomfloat(); /* Condition for mutation */
-		
-		if(willmutate<rate)
-			pGen[i]*=(willmutate*rand()/(RAND_MAX/2)); /* We are randomly generating another number in range */
+	uint64_t state;
+	ga_seed(&state, 2016);
+
+	/* Every array is allocated once, and generations are swapped between pGen and newGen */
+	double *pGen = malloc(sizeof(double)*popsize);
+	double *newGen = malloc(sizeof(double)*popsize);
+	double *parents = malloc(sizeof(double)*popsize);
+	double *values = malloc(sizeof(double)*popsize);
+	int *selected = malloc(sizeof(int)*popsize);
+	double *wheel = malloc(sizeof(double)*popsize);
+
+	if(!pGen || !newGen || !parents || !values || !selected || !wheel){
+		fprintf(stderr,"Out of memory\n");
+		return 1;
 	}
-}
 
+	int i, generation;
+	for(i=0;i<popsize;i++){
+		pGen[i] = lower + ga_uniform(&state)*(upper-lower); /* Establishes first generation */
+	}
+
+	for(generation=0;generation<generations;generation++){
+
+		for(i=0;i<popsize;i++){
+			values[i] = objective(pGen[i]);
+		}
+
+		ga_select(values, popsize, popsize, selected, wheel, &state);
+
+		for(i=0;i<popsize;i++){
+			parents[i] = pGen[selected[i]];
+		}
 
+		ga_crossover(parents, popsize/2, 1, 0.9, newGen, &state);
+		ga_mutate(newGen, popsize, 1, 0.05, 0.01, &lower, &upper, &state); /* This suggests a relatively low likelihood of mutation */
+
+		double *swap = pGen;
+		pGen = newGen;
+		newGen = swap;
+	}
 
+	for(i=0;i<popsize;i++){
+		values[i] = objective(pGen[i]);
+	}
+
+	double minfitness = minoflist(values, popsize);
+	for(i=0;i<popsize;i++){
+		if(values[i]==minfitness) break;
+	}
+
+	printf("\nThe best solution found was %f at %f.\n",minfitness, pGen[i]);	/* Inform at conclusion of algorithm */
+
+	free(pGen);
+	free(newGen);
+	free(parents);
+	free(values);
+	free(selected);
+	free(wheel);
+
+	return 0;
+}
 
-	
+#endif
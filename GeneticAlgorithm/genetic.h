@@ -1,83 +1,24 @@
-#include <time.h>
+#include <math.h>
 #include <stdio.h>
 #include <stdlib.h>
-
-/* PROTOTYPES */ 
-int *roulettewheel(double *fitness, int nums);
-double *fitnessscores(double *pGen, double *values, int nums);
-double objective(double x);
-double *probability(double *fitness,double totalfitness,int nums);
-double baselined(double *fitness, int nums);
-int *swapchromosomes(int firstchrom, int secondchrom);
-void mutate(double *pGen, double rate, int nums);
-double *funcvals(double *pGen, int nums);
-void printtable(double *pGen, double *values, double *fitness, int nums);
-
-/* Returns largest element of a list */
-double maxoflist(double *list, int nums){
-
-	double max = list[0]; /* Initially set to first value */
-	int i;
-	for(i=1;i<nums;i++){
-		if(list[i]>max){
-			max = list[i];
-		}
-	}
-
-	return max;
-
-}
-
-/* Displays all of the current information about the population */
-void printtable(double *pGen, double *values, double *fitness, int nums){
-	
-	int i;
-	for(i=0;i<nums;i++){		
-		printf("The number is %f, its function value is %f, and its fitness score is %f.\n",pGen[i],values[i],fitness[i]);
-	}
-	
-}
-
-/* Returns smallest element of list, to baseline */
-double minoflist(double *list, int nums){
-
-	double min = list[0];
-	int i;
-	for(i=1;i<nums;i++){
-		if(list[i]<min){
-			min = list[i];
-		}
-	}
-
-	return min;
-}
-
-void randomgen(double *pGen, int nums){
-	srand(time(NULL));
-
-	/* Generates twenty numbers, at each spot we store a different random number */
-	int i;
-	for(i=0;i<nums;i++){
-		pGen[i] = rand();	
-	}
-}
-
-/* Returns a float from zero to one */
-float randomfloat(){
-	return ((float)rand()/RAND_MAX);
-}
-
-/* Depending on pseudorandom distribution may not be completely evenly distributed */
-int randinrange(int upperbound){	
-	srand(time(NULL));
-	return ((double)rand()/RAND_MAX)*(upperbound); /* Gets value from zero to one and then scales up by upper bound */
-}
-
-/* Prints all numbers */
-void printall(double *pNums, int nums){
-	int i;
-	for(i=0;i<nums;i++){
-		printf("%f\n",pNums[i]);
-	}
-	printf("------------------\n");
-}
+#include <stdint.h>
+
+#ifndef M_PI
+#define M_PI 3.14159265358979323846
+#endif
+
+/* RANDOM NUMBERS */
+/* Every run has its own generator state (a single 64 bit word), so runs are reproducible and independent */
+void ga_seed(uint64_t *state, uint64_t seed);
+double ga_uniform(uint64_t *state);
+double ga_normal(uint64_t *state);
+
+/* OPERATORS */
+/* Populations are contiguous row-major arrays of doubles, one member (rows) of genes (columns) per row */
+void ga_select(const double *values, int nums, int count, int *selected, double *wheel, uint64_t *state);
+void ga_crossover(const double *parents, int pairs, int genes, double rate, double *children, uint64_t *state);
+void ga_mutate(double *population, int nums, int genes, double rate, double scale, const double *lower, const double *upper, uint64_t *state);
+
+/* HELPERS */
+double maxoflist(const double *list, int nums);
+double minoflist(const double *list, int nums);
@@ -0,0 +1,439 @@
+"""
+Benchmark Suite
+***************
+
+Times the vectorized parts of this package against the
+loops they replaced, using real specimen files, so that
+speedups can be checked on any machine.
+
+benchmark_mcfunc -- times the error evaluation of StressStrain.mcfunc against the nested-loop version.\n
+compare_engines -- checks that the NumPy port of the model gives the Fortran curves and times both.\n
+benchmark_slopes -- times get_slopes and combine_data (material_analytics) against their loops on large synthetic curves.\n
+benchmark_stress_model -- times the compiled StressModel against the refitting stress_model closure.\n
+benchmark_xml -- times the streaming XML reader against the DataModelDict one.\n
+benchmark_genetic -- compares the genetic algorithm with NumPy and with C operators against PyBrain's GA.\n
+"""
+
+"""Basic libs"""
+import numpy as np
+
+"""Evaluation"""
+import timeit
+
+"""Data handlers"""
+import irreversible_stressstrain
+import material_analytics
+import mat_data_parser
+from DataModelDict import DataModelDict as dmd
+
+"""Optimizers"""
+import optimization_suite
+from scipy.optimize import minimize
+from irreversible_stressstrain import StressStrain as strainmodel
+
+def load_specimen(data_file):
+    """Creates a model for a specimen file, reading it as XML if the name says so (like the GUI does)."""
+
+    if 'xml' in data_file:
+        return strainmodel(data_file, type='xml')
+
+    return strainmodel(data_file)
+
+def best_time(function, repeats):
+    """Returns the fastest of several runs of a function taking no arguments."""
+
+    return min(timeit.repeat(function, number=1, repeat=repeats))
+
+def benchmark_mcfunc(data_files, model_parameters=[-150,1], SS_stress=500., repeats=3):
+    """
+    Times the interpolation kernel and the full objective (StressStrain.mcfunc) for every file,
+    once with the nested loops and once vectorized, and checks that both give the same error.
+
+    Arguments:
+       | data_files - specimen files, e.g. kolskybar.xml and ref/*.dat
+    Keyword Arguments:
+       | model_parameters - the (C, Gact) pair the model is evaluated at
+       | SS_stress - the yield stress passed to the model
+       | repeats - the fastest of this many runs is reported
+
+    Returns an array with a row per file:
+    [classic kernel, vectorized kernel, classic mcfunc, vectorized mcfunc] in seconds.
+    """
+
+    timings = np.zeros((len(data_files),4))
+
+    for index, data_file in enumerate(data_files):
+
+        model = load_specimen(data_file)
+        exp = model.get_experimental_data()
+        strain_stress = model.irreversible_model(model_parameters, SS_stress)
+
+        # the two kernels must agree before their timings mean anything
+        classic_error = model.mcfunc_classic(model_parameters, SS_stress)
+        vectorized_error = model.mcfunc(model_parameters, SS_stress)
+
+        if not np.allclose(classic_error, vectorized_error, equal_nan=True):
+            raise ValueError("{0}: vectorized error {1} does not match {2}".format(data_file,vectorized_error,classic_error))
+
+        timings[index,0] = best_time(lambda: irreversible_stressstrain.interpolate_errors_classic(strain_stress, exp), repeats)
+        timings[index,1] = best_time(lambda: irreversible_stressstrain.interpolate_errors(strain_stress, exp), repeats)
+        timings[index,2] = best_time(lambda: model.mcfunc_classic(model_parameters, SS_stress), repeats)
+        timings[index,3] = best_time(lambda: model.mcfunc(model_parameters, SS_stress), repeats)
+
+        print '{0} ({1} points): error {2}'.format(data_file,len(exp),vectorized_error)
+        print 'kernel took {0} seconds classic, {1} seconds vectorized ({2:.1f}x)'.format(timings[index,0],timings[index,1],timings[index,0]/timings[index,1])
+        print 'mcfunc took {0} seconds classic, {1} seconds vectorized ({2:.1f}x)'.format(timings[index,2],timings[index,3],timings[index,2]/timings[index,3])
+        print
+
+    return timings
+
+def compare_engines(params_matrix, SS_stress=500., T_service=22.+273., strain_limit=0, rtol=1e-12):
+    """
+    Integrates the model for every row of params_matrix ([C, Gact] pairs) with the compiled Fortran
+    model and with its NumPy port (irreversible_numpy), raises a ValueError if their step counts,
+    curves or work differ by more than rtol, and prints how long each engine took.
+
+    Returns the two times in seconds, [Fortran, NumPy].
+    """
+
+    if 'fortran' not in irreversible_stressstrain.engines:
+        raise ValueError("The Fortran model is not compiled, so there is nothing to compare against")
+
+    params_matrix = np.atleast_2d(np.asarray(params_matrix, dtype=float))
+    same = np.ones(len(params_matrix))
+
+    results = []
+    timings = np.zeros(2)
+
+    for index, name in enumerate(['fortran', 'numpy']):
+
+        engine = irreversible_stressstrain.engines[name]
+
+        start = timeit.default_timer()
+        results.append(engine.mechanics_batch(0*same, SS_stress*same, T_service*same, params_matrix, strain_limit=strain_limit))
+        timings[index] = timeit.default_timer()-start
+
+    (fortran_curves, fortran_steps, fortran_work), (numpy_curves, numpy_steps, numpy_work) = results
+
+    if not np.array_equal(fortran_steps, numpy_steps):
+        raise ValueError("The engines stopped at different steps: {0} and {1}".format(fortran_steps, numpy_steps))
+
+    if not np.allclose(fortran_curves, numpy_curves, rtol=rtol, atol=0, equal_nan=True):
+        raise ValueError("The engines gave different curves")
+
+    if not np.allclose(fortran_work, numpy_work, rtol=rtol, atol=0, equal_nan=True):
+        raise ValueError("The engines gave different work: {0} and {1}".format(fortran_work, numpy_work))
+
+    print '{0} curves took {1} seconds in Fortran and {2} seconds in NumPy'.format(len(params_matrix),timings[0],timings[1])
+    print
+
+    return timings
+
+def synthetic_curve(points, seed=0):
+    """
+    A noisy, hardening stress-strain curve with as many points as a high-rate Kolsky bar capture.
+    The strains are rounded like a digitizer's, so neighbouring points often share a strain (zero runs).
+    """
+
+    random = np.random.RandomState(seed)
+
+    strain = np.round(np.linspace(0., 0.3, points), 7)
+    stress = 900.*np.log1p(50.*strain) + random.normal(0., 5., points)
+
+    return np.column_stack((strain, stress))
+
+def get_slopes_classic(model):
+    """The original get_slopes (material_analytics), one slope per loop iteration."""
+    
+    strain = model[:,0]
+    stress = model[:,1]
+
+    slopes = []
+
+    """Approximating the partial derivatives of stress/strain"""
+    for index in xrange(len(stress)-1):
+
+        rise = (stress[index+1]-stress[index])
+        run = (strain[index+1]-strain[index])
+
+        if run==0:
+            slopes.append(0)
+
+        else:
+            slopes.append(rise/run)
+
+    return np.array(slopes)
+
+def combine_data_classic(data1,data2):
+    """The original combine_data (material_analytics), a list per point."""
+
+    return np.array([list(a) for a in zip(data1,data2)])
+
+def benchmark_slopes(sizes=(10**3, 10**4, 10**5, 10**6, 10**7), repeats=3):
+    """
+    Times get_slopes and combine_data against their loop versions on synthetic curves of every size,
+    vectorized with new arrays and with preallocated output buffers, after checking that they agree.
+    The loops are slow on millions of points, so they are only run once.
+
+    Returns an array with a row per size: [points, classic get_slopes, get_slopes, get_slopes into a buffer,
+    classic combine_data, combine_data, combine_data into a buffer] in seconds.
+    """
+
+    timings = np.zeros((len(sizes),7))
+
+    for index, points in enumerate(sizes):
+
+        curve = synthetic_curve(points)
+        slopes = np.empty(points-1)
+        combined = np.empty((points,2))
+
+        if not np.array_equal(get_slopes_classic(curve), material_analytics.get_slopes(curve)):
+            raise ValueError("{0} points: the vectorized slopes do not match the loop".format(points))
+
+        if not np.array_equal(combine_data_classic(curve[:,0], curve[:,1]), material_analytics.combine_data(curve[:,0], curve[:,1])):
+            raise ValueError("{0} points: the vectorized combined data does not match the loop".format(points))
+
+        timings[index,0] = points
+        timings[index,1] = best_time(lambda: get_slopes_classic(curve), 1)
+        timings[index,2] = best_time(lambda: material_analytics.get_slopes(curve), repeats)
+        timings[index,3] = best_time(lambda: material_analytics.get_slopes(curve, out=slopes), repeats)
+        timings[index,4] = best_time(lambda: combine_data_classic(curve[:,0], curve[:,1]), 1)
+        timings[index,5] = best_time(lambda: material_analytics.combine_data(curve[:,0], curve[:,1]), repeats)
+        timings[index,6] = best_time(lambda: material_analytics.combine_data(curve[:,0], curve[:,1], out=combined), repeats)
+
+        print '{0} points:'.format(points)
+        print 'get_slopes took {0} seconds classic, {1} seconds vectorized ({2:.1f}x), {3} seconds into a buffer'.format(timings[index,1],timings[index,2],timings[index,1]/timings[index,2],timings[index,3])
+        print 'combine_data took {0} seconds classic, {1} seconds vectorized ({2:.1f}x), {3} seconds into a buffer'.format(timings[index,4],timings[index,5],timings[index,4]/timings[index,5],timings[index,6])
+        print
+
+    return timings
+
+def stress_model_classic(data, yielding = None, strain = None):
+    """The original stress_model (material_analytics), which refits the plastic region for every strain."""
+    if yielding is None:
+        yielding = material_analytics.yield_stress(data)[0]
+
+    """Finds the yield index"""
+    yield_index = 0
+    for index, point in enumerate(data):
+
+        if (point == yielding).all():
+            yield_index = index
+            break
+
+    """Separates data into plastic and elastic regions"""
+    elastic = data[:yield_index+2]
+    plastic = data[yield_index+1:]
+
+    """
+    Finds the upper yield point (lower yield point is the *yielding* variable). 
+    We're taking the first element ([0]) because it returns the 
+    first element that meets the criteria in parentheses.
+    
+    It's a two-dimensional array so we have to do this twice.
+    """
+    upperyieldpoint_index = np.where(elastic==max(elastic[:,1]))[0][0]
+    upperyieldpoint = elastic[upperyieldpoint_index]
+
+    """We estimate the region until the first upper yield point with a linear model"""
+    lin_elastic_region = elastic[:upperyieldpoint_index+1]
+    
+    """Creating a function that will linearly fit the data"""
+    def lin_elastic_model(x):
+        m = (lin_elastic_region[-1,1]-lin_elastic_region[0,1])/(lin_elastic_region[-1,0]-lin_elastic_region[0,0])
+        return m*x + lin_elastic_region[0,1]
+    
+    """
+    If the upper yield point is the only yield point, 
+    then the material doesn't exhibit the yield point phenomenon.
+
+    Otherwise, we establish the domain in which the yield point 
+    phenomenon occurs, within which we will be selecting nearest
+    neighbors as a method of approximation. The yield point pheno-
+    menon occurs when there are two distinct yield points, and 
+    that when plastic deformation begins, stress is immediately 
+    relieved.
+    """
+    yieldpointphenom_region = None
+    yieldpointphenom = True
+
+    if upperyieldpoint_index==yield_index:
+        yieldpointphenom = False        
+
+    if yieldpointphenom:
+        yieldpointphenom_region = [upperyieldpoint_index,yield_index]
+
+    """We must determine which domain contains the strain point requested"""
+    
+    start_yield = upperyieldpoint[0]
+
+    """If we had lists previously, we have an extra dimension we need to get rid of for processing"""
+    if yielding.ndim == 2:
+        yielding = yielding[0]
+    
+    def stress_value(strain):
+    
+        if strain < 0 or strain > max(data[:,0]):
+            
+            """(Out of range)"""
+            return np.nan
+        
+        elif strain < start_yield:
+
+            """Linear approximation (elastic region)"""
+            return [strain, lin_elastic_model(strain)]
+
+        elif yieldpointphenom and strain >= start_yield and strain < yielding[0]:
+            
+            """Picks the nearest neighbor in this zone"""
+            yieldpoints_inregion = elastic[np.where(np.logical_and(elastic[:,0] >= start_yield, elastic[:,0] < yielding[0]) )]
+
+            """As soon as we find a neighbor, we return its value"""
+            for val in yieldpoints_inregion:
+                if val[0] > strain:
+                    return [strain,val [1]]
+            
+            return yieldpoints_inregion[-1]
+            
+        elif not yieldpointphenom or strain >= yielding[0]:
+               
+            """We fit a logarithmic curve to approximate the plastic region"""
+            plastic_reg = material_analytics.log_approx(plastic)
+            return np.array([strain,plastic_reg(strain)])
+            
+    """If we should evaluate the function at a point, we'll do so, otherwise we return the function itself"""
+    if strain is None:
+        return stress_value
+        
+    else:
+        return stress_value(strain)
+                 
+
+def benchmark_stress_model(data_files, numpoints=10000, method='unfitted'):
+    """
+    Builds the piecewise stress model (material_analytics.stress_model) of every file, checks that
+    the compiled StressModel gives the values of the original closure at numpoints strains,
+    and times evaluating them all with the closure (one at a time) and with the model (all at once).
+
+    Returns an array with a row per file: [closure, compiled model] in seconds.
+    """
+
+    timings = np.zeros((len(data_files),2))
+
+    for index, data_file in enumerate(data_files):
+
+        data = load_specimen(data_file).get_experimental_data()
+        yieldpoint = material_analytics.yield_methods[method](data.copy())
+
+        closure = stress_model_classic(data, yieldpoint)
+        model = material_analytics.stress_model(data, yieldpoint)
+
+        strains = np.linspace(0., max(data[:,0]), numpoints)
+
+        start = timeit.default_timer()
+        expected = np.array([np.asarray(closure(strain), dtype=float)*np.ones(2) for strain in strains])
+        timings[index,0] = timeit.default_timer()-start
+
+        timings[index,1] = best_time(lambda: model(strains), 3)
+
+        if not np.allclose(model(strains), expected, equal_nan=True):
+            raise ValueError("{0}: the compiled stress model does not match the closure".format(data_file))
+
+        print '{0}: {1} strains took {2} seconds with the closure, {3} seconds with the compiled model ({4:.1f}x)'.format(data_file,numpoints,timings[index,0],timings[index,1],timings[index,0]/timings[index,1])
+        print
+
+    return timings
+
+def read_xml_classic(data_file):
+    """The original XML reader of mat_data_parser, which gives the table as strings."""
+
+    table = dmd(open(data_file, "r")).find('stressStrain')
+    distable = []
+
+    for row in table['rows'].iteraslist('row'):
+        disrow = []
+
+        for column in row.iteraslist('column'):
+            """Adds every column entry for each row"""
+            disrow.append(column['#text'])
+
+        distable.append(disrow)
+
+    del distable[0] # gets rid of header
+    return np.array(distable)
+
+def benchmark_xml(data_files, repeats=3):
+    """
+    Reads the stressStrain table of every XML file with the streaming reader (mat_data_parser.read_xml)
+    and with the DataModelDict reader it replaced, checks that they give the same numbers and times both.
+
+    Returns an array with a row per file: [DataModelDict, streaming] in seconds.
+    """
+
+    timings = np.zeros((len(data_files),2))
+
+    for index, data_file in enumerate(data_files):
+
+        if not np.array_equal(read_xml_classic(data_file).astype(float), mat_data_parser.read_xml(data_file)):
+            raise ValueError("{0}: the streaming reader does not give the same table".format(data_file))
+
+        timings[index,0] = best_time(lambda: read_xml_classic(data_file), repeats)
+        timings[index,1] = best_time(lambda: mat_data_parser.read_xml(data_file), repeats)
+
+        print '{0}: read in {1} seconds with DataModelDict, {2} seconds streaming ({3:.1f}x)'.format(data_file,timings[index,0],timings[index,1],timings[index,0]/timings[index,1])
+        print
+
+    return timings
+
+def benchmark_genetic(function, guess, bounds, evaluations=4000, population=40, seed=0, operator_size=10**5):
+    """
+    Minimizes a function with the same number of evaluations using PyBrain's GA (if PyBrain is installed),
+    and with genetic_minimize breeding with NumPy and with the C operators (genetic_operators),
+    printing how long each took and the best value it found. Then times breeding one generation
+    of operator_size individuals with NumPy and with C.
+
+    Returns a dictionary from every optimizer to its [seconds, best value], and from 'numpy operators'
+    and 'native operators' to the seconds one generation took.
+    """
+
+    results = {}
+
+    try:
+        from pybrain.optimization import GA
+
+        start = timeit.default_timer()
+        x, value = GA(function, list(guess), minimize=True, maxEvaluations=evaluations).learn()
+        results['pybrain'] = [timeit.default_timer()-start, value]
+
+    except ImportError:
+        print 'PyBrain is not installed, its GA is left out'
+
+    generations = evaluations//population-1
+
+    for operators in ['numpy', 'native']:
+
+        start = timeit.default_timer()
+        result = minimize(function, guess, method=optimization_suite.genetic_minimize, bounds=bounds,
+                          options=dict(population=population, generations=generations, stall=generations+1, seed=seed, operators=operators))
+        results[operators] = [timeit.default_timer()-start, result.fun]
+
+    for name in sorted(results):
+        print '{0}: {1} evaluations took {2} seconds, the best value found was {3}'.format(name,evaluations,results[name][0],results[name][1])
+
+    """Breeding a single large generation shows the cost of the operators alone"""
+    import genetic_operators
+
+    bounds = np.asarray(bounds, dtype=float)
+    random = np.random.RandomState(seed)
+    native_random = genetic_operators.NativeRandom(seed)
+
+    individuals = optimization_suite.sample_starts(bounds, operator_size, seed=seed)
+    values = random.uniform(size=operator_size)
+
+    results['numpy operators'] = best_time(lambda: optimization_suite.mutate(optimization_suite.crossover(individuals[optimization_suite.roulette_wheel(values, operator_size, random)], .9, random), .1, .1, bounds, random), 3)
+    results['native operators'] = best_time(lambda: genetic_operators.mutate(genetic_operators.crossover(individuals[genetic_operators.select(values, operator_size, native_random)], .9, native_random), .1, .1, bounds, native_random), 3)
+
+    print 'Breeding {0} individuals took {1} seconds with NumPy and {2} seconds in C'.format(operator_size,results['numpy operators'],results['native operators'])
+    print
+
+    return results
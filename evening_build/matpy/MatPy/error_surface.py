@@ -0,0 +1,375 @@
+"""
+Error Surface
+*************
+
+Evaluates the RMS error of the irreversible thermodynamics model
+(StressStrain.mcfunc) over a grid of (C, Gact) model parameters once,
+and keeps the grid on disk, so plotting the surface, brute force fitting
+and later refits of the same specimen do not integrate the model again.
+
+Every specimen (its data file, or a hash of its data) has a directory of
+surfaces, one per yield stress (SS_stress), grid and model (the engine and its
+source, and the test temperature and precipitate stress of the specimen), kept
+in the cache directory of the compiled model (see fortran_build) under 'surfaces'.
+
+*surface()* returns the stored surface of a specimen, evaluating (in parallel)
+and saving it the first time. An *ErrorSurface* interpolates the errors between
+grid points, and returns the interpolated minimum and the best local minima as
+starting points for local optimizers. *warm_start()* finds those starting points
+from the closest stored surface, so a specimen refitted with a slightly different
+yield stress (or data) starts from what was found before.
+"""
+
+"""Basic libs"""
+import os
+import glob
+import hashlib
+import tempfile
+import multiprocessing
+import numpy as np
+
+"""Interpolation and refinement of the grid"""
+from scipy.interpolate import RectBivariateSpline
+from scipy.optimize import minimize
+
+"""Shares the cache of the compiled model, and sends bound methods (e.g. StressStrain.mcfunc_batch) to worker processes"""
+from fortran_build import cache_directory
+import irreversible_stressstrain
+import method_pickling
+
+method_pickling.register()
+
+"""The grid used when none is given, which holds the fits of the reference specimens"""
+default_C = np.linspace(-300., 100., 41)
+default_Gact = np.linspace(0.1, 3., 30)
+
+def surface_directory():
+    """Returns the directory the surfaces are kept in."""
+
+    return os.path.join(cache_directory(), 'surfaces')
+
+def data_hash(data):
+    """The SHA-1 hash of the strains and stresses of a specimen."""
+
+    return hashlib.sha1(np.ascontiguousarray(np.asarray(data, dtype=float)[:,:2]).tostring()).hexdigest()
+
+def grid_hash(C, Gact):
+    """The SHA-1 hash of a grid."""
+
+    return hashlib.sha1(np.asarray(C, dtype=float).tostring()+b'|'+np.asarray(Gact, dtype=float).tostring()).hexdigest()
+
+def specimen_name(model):
+    """The name a specimen is stored under: its data file, or the hash of its data if it has none."""
+
+    data_file = getattr(model, 'data_file', None)
+
+    if data_file is not None:
+        return os.path.abspath(data_file)
+
+    return data_hash(model.get_experimental_data())
+
+def model_description(model):
+    """What a surface of a specimen (a StressStrain instance) depends on besides its data: the model and the test conditions."""
+
+    return '{0} T_service={1!r} prec_stress={2!r}'.format(irreversible_stressstrain.model_identity(), float(model.T_service), float(model.prec_stress))
+
+def specimen_directory(name, directory=None):
+    """The directory of the surfaces of a specimen."""
+
+    return os.path.join(directory or surface_directory(), hashlib.sha1(name.encode('utf-8')).hexdigest())
+
+def surface_file(name, SS_stress, C, Gact, description, directory=None):
+    """The file of the surface of a specimen for a yield stress, grid and model (see *model_description*)."""
+
+    key = hashlib.sha1(grid_hash(C, Gact).encode('utf-8')+b'|'+description.encode('utf-8')).hexdigest()
+
+    return os.path.join(specimen_directory(name, directory), '{0!r}-{1}.npz'.format(float(SS_stress), key[:16]))
+
+def evaluate_rows(task):
+    """Evaluates the points of one task, (function, batch, points, args), in a worker process."""
+
+    function, batch, points, args = task
+
+    if batch is not None:
+        return np.asarray(batch(points, *args), dtype=float)
+
+    return np.array([function(point, *args) for point in points], dtype=float)
+
+def evaluate_grid(function, C, Gact, args=(), batch=None, processes=None):
+    """
+    Evaluates a function at every point of a (C, Gact) grid.
+
+    Arguments:
+       | function - called as function((C, Gact), *args)
+       | C, Gact - the values of the grid along each parameter
+    Keyword Arguments:
+       | args - the extra arguments of the function (e.g. (SS_stress,) for StressStrain.mcfunc)
+       | batch - evaluates many points at once, called as batch(points, *args) (e.g. StressStrain.mcfunc_batch)
+       | processes - the number of worker processes, every one evaluating rows of the grid (all cores by default, 1 evaluates everything here)
+
+    Returns a len(C) x len(Gact) array of the values.
+    """
+
+    C, Gact = np.asarray(C, dtype=float), np.asarray(Gact, dtype=float)
+    tasks = [(function, batch, np.column_stack((np.repeat(value, len(Gact)), Gact)), args) for value in C]
+
+    if processes == 1:
+        rows = [evaluate_rows(task) for task in tasks]
+
+    else:
+        pool = multiprocessing.Pool(processes)
+
+        try:
+            rows = pool.map(evaluate_rows, tasks, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+
+    return np.array(rows, dtype=float).reshape(len(C), len(Gact))
+
+class ErrorSurface:
+    """
+    The errors of a specimen over a (C, Gact) grid.
+
+    Arguments:
+       | C, Gact - the values of the grid along each parameter
+       | errors - the len(C) x len(Gact) errors, nan where the model could not be evaluated
+    Keyword Arguments:
+       | SS_stress - the yield stress the errors were evaluated for
+       | name - the specimen (see *specimen_name*)
+       | data_hash - the hash of the data of the specimen (see *data_hash*)
+       | description - the model and test conditions the errors were evaluated with (see *model_description*)
+    """
+
+    def __init__(self, C, Gact, errors, SS_stress=None, name=None, data_hash=None, description=None):
+
+        self.C = np.asarray(C, dtype=float)
+        self.Gact = np.asarray(Gact, dtype=float)
+        self.errors = np.asarray(errors, dtype=float)
+        self.SS_stress = SS_stress
+        self.name = name
+        self.data_hash = data_hash
+        self.description = description
+
+        """
+        The spline goes through the logarithm of the errors, capped at ten times their median, so diverged curves
+        (errors up to 1e100 and more) and points that could not be evaluated (counted as the cap) do not make it overshoot.
+        """
+        finite = np.isfinite(self.errors)
+        finite[finite] = self.errors[finite] > 0
+        cap = min(10*np.median(self.errors[finite]), np.max(self.errors[finite])) if finite.any() else 1.
+        filled = np.log(np.where(finite, np.minimum(self.errors, cap), cap))
+        degree = lambda values: min(3, len(values)-1)
+
+        self.spline = RectBivariateSpline(self.C, self.Gact, filled, kx=degree(self.C), ky=degree(self.Gact))
+
+    def bounds(self):
+        """The (min, max) pair of each parameter."""
+
+        return [(self.C[0], self.C[-1]), (self.Gact[0], self.Gact[-1])]
+
+    def interpolate(self, points):
+        """The interpolated errors at (C, Gact) points (one per row), nan outside the grid."""
+
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        values = np.exp(self.spline.ev(points[:,0], points[:,1]))
+
+        outside = np.zeros(len(points), dtype=bool)
+
+        for dimension, (low, high) in enumerate(self.bounds()):
+            outside |= (points[:,dimension] < low) | (points[:,dimension] > high)
+
+        values[outside] = np.nan
+
+        return values
+
+    def __call__(self, model_parameters):
+        return float(self.interpolate(model_parameters)[0])
+
+    def local_minima(self):
+        """The grid indices (C, Gact) of the points lower than all of their neighbours, lowest first."""
+
+        padded = np.pad(np.where(np.isfinite(self.errors), self.errors, np.inf), 1, mode='constant', constant_values=np.inf)
+        centre = padded[1:-1,1:-1]
+        lowest = np.isfinite(centre)
+
+        for row in (-1, 0, 1):
+            for column in (-1, 0, 1):
+                if row or column:
+                    lowest &= centre <= padded[1+row:padded.shape[0]-1+row, 1+column:padded.shape[1]-1+column]
+
+        indices = np.argwhere(lowest)
+
+        return indices[np.argsort(centre[lowest], kind='mergesort')]
+
+    def refine(self, index):
+        """Minimizes the interpolated errors from a grid point, within the neighbouring grid points. Returns (x, error)."""
+
+        i, j = index
+        bounds = [(self.C[max(i-1, 0)], self.C[min(i+1, len(self.C)-1)]), (self.Gact[max(j-1, 0)], self.Gact[min(j+1, len(self.Gact)-1)])]
+        start = np.array([self.C[i], self.Gact[j]])
+
+        result = minimize(lambda x: float(self.spline.ev(x[0], x[1])), start, method='L-BFGS-B', bounds=bounds)
+
+        """The grid point is kept if the spline does not do better than it"""
+        if np.exp(result.fun) < self.errors[i,j]:
+            return result.x, float(np.exp(result.fun))
+
+        return start, float(self.errors[i,j])
+
+    def minimum(self):
+        """The interpolated minimum of the surface, as (x, error), or None if no point of the grid could be evaluated."""
+
+        minima = self.local_minima()
+
+        if len(minima) == 0:
+            return None
+
+        return self.refine(minima[0])
+
+    def warm_starts(self, count=3):
+        """
+        The interpolated minima of the *count* lowest local minima, as a count x 2 array of (C, Gact), lowest first.
+        Minima that refine to within half a grid step of a lower one are skipped.
+        """
+
+        steps = np.array([np.min(np.diff(self.C)) if len(self.C) > 1 else 1., np.min(np.diff(self.Gact)) if len(self.Gact) > 1 else 1.])
+        starts = []
+
+        for index in self.local_minima():
+
+            if len(starts) == count:
+                break
+
+            x = self.refine(index)[0]
+
+            if all(np.max(np.abs(x-start)/steps) > 0.5 for start in starts):
+                starts.append(x)
+
+        return np.array(starts).reshape(len(starts), 2)
+
+    def plot(self, **labels):
+        """Plots the errors with graph_suite.IntervalPlot3D (labels are passed on to it)."""
+
+        import graph_suite
+
+        return graph_suite.IntervalPlot3D(None, self.C, self.Gact, values=self.errors, **labels)
+
+    def save(self, filename):
+        """Saves the surface, replacing the file only once it is completely written."""
+
+        directory = os.path.dirname(os.path.abspath(filename))
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        handle, temporary = tempfile.mkstemp(dir=directory, suffix='.npz')
+
+        try:
+            with os.fdopen(handle, 'wb') as output:
+                np.savez(output, C=self.C, Gact=self.Gact, errors=self.errors, SS_stress=np.nan if self.SS_stress is None else self.SS_stress,
+                         name=self.name or '', data_hash=self.data_hash or '', description=self.description or '')
+
+            os.rename(temporary, filename)
+
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+def load(filename):
+    """Loads a saved surface."""
+
+    stored = np.load(filename)
+    SS_stress = float(stored['SS_stress'])
+
+    return ErrorSurface(stored['C'], stored['Gact'], stored['errors'], None if np.isnan(SS_stress) else SS_stress,
+                        str(stored['name']) or None, str(stored['data_hash']) or None, str(stored['description']) or None)
+
+def compute(model, SS_stress, C=None, Gact=None, processes=None):
+    """Evaluates the error surface of a specimen (a StressStrain instance) for a yield stress, on the default grid unless one is given."""
+
+    C = default_C if C is None else C
+    Gact = default_Gact if Gact is None else Gact
+
+    errors = evaluate_grid(model.mcfunc, C, Gact, args=(SS_stress,), batch=model.mcfunc_batch, processes=processes)
+
+    return ErrorSurface(C, Gact, errors, SS_stress, specimen_name(model), data_hash(model.get_experimental_data()), model_description(model))
+
+def surface(model, SS_stress, C=None, Gact=None, processes=None, directory=None, refresh=False):
+    """
+    Returns the error surface of a specimen for a yield stress, loading it if it was stored,
+    and otherwise evaluating it (see *compute*) and storing it.
+
+    A stored surface is only used if the data of the specimen, the model and the test conditions did not change since,
+    refresh=True always evaluates it again.
+    """
+
+    C = default_C if C is None else np.asarray(C, dtype=float)
+    Gact = default_Gact if Gact is None else np.asarray(Gact, dtype=float)
+    description = model_description(model)
+
+    filename = surface_file(specimen_name(model), SS_stress, C, Gact, description, directory)
+
+    if not refresh and os.path.isfile(filename):
+        stored = load(filename)
+
+        if stored.data_hash == data_hash(model.get_experimental_data()) and stored.description == description:
+            return stored
+
+    computed = compute(model, SS_stress, C, Gact, processes)
+    computed.save(filename)
+
+    return computed
+
+def stored_surfaces(model, directory=None):
+    """The files of every surface stored for a specimen."""
+
+    return sorted(glob.glob(os.path.join(specimen_directory(specimen_name(model), directory), '*.npz')))
+
+def nearest(model, SS_stress, directory=None):
+    """
+    The stored surface of a specimen closest to a yield stress, preferring surfaces of the same data,
+    or None if none are stored. Only surfaces of the same model and test conditions are considered, but the yield stress
+    and data do not have to match exactly, so the surface is only good for starting points.
+    """
+
+    current = data_hash(model.get_experimental_data())
+    description = model_description(model)
+    best, best_rank = None, None
+
+    for filename in stored_surfaces(model, directory):
+
+        try:
+            stored = load(filename)
+        except (IOError, OSError, ValueError, KeyError):
+            continue
+
+        if stored.description != description:
+            continue
+
+        rank = (stored.data_hash != current, abs(stored.SS_stress-SS_stress) if stored.SS_stress is not None else np.inf)
+
+        if best_rank is None or rank < best_rank:
+            best, best_rank = stored, rank
+
+    return best
+
+def warm_start(model, SS_stress, count=1, default=None, directory=None):
+    """
+    Starting points for fitting a specimen, from the closest stored surface (see *nearest*).
+
+    Returns the count best (C, Gact) points (one per row), the first being the interpolated minimum,
+    or default if no surface of the specimen is stored.
+    """
+
+    stored = nearest(model, SS_stress, directory)
+
+    if stored is None:
+        return default
+
+    starts = stored.warm_starts(count)
+
+    if len(starts) == 0:
+        return default
+
+    return starts[0] if count == 1 else starts
@@ -0,0 +1,145 @@
+"""
+Fortran Build Cache
+*******************
+
+Compiles irreverisble.f90 with f2py once and keeps the compiled
+extension in a cache directory, keyed on a hash of the Fortran
+source (and of the Python and NumPy versions it is built for).
+Later imports load the cached extension without running a
+compiler, and the source is only recompiled when it changes.
+
+The cache lives in ~/.matpy by default; set the MATPY_CACHE
+environment variable to share one cache between many workers.
+Workers that build at the same time each compile into their
+own temporary directory and the first finished build is kept,
+so they never load a half-written extension.
+"""
+
+"""Basic libs"""
+import os
+import sys
+import glob
+import errno
+import shutil
+import hashlib
+import tempfile
+import subprocess
+
+"""Loading compiled extensions"""
+import imp
+import numpy as np
+
+module_name = 'irreverisble'
+source_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), module_name+'.f90')
+
+class BuildError(ImportError):
+    """Raised when the Fortran model is not cached and cannot be compiled."""
+
+def cache_directory():
+    """Returns the directory the compiled extensions are kept in."""
+
+    return os.environ.get('MATPY_CACHE', os.path.join(os.path.expanduser('~'), '.matpy'))
+
+def build_directory(prefix):
+    """
+    Creates the cache directory (unless it exists, also when another process is creating it at the same time)
+    and a temporary directory in it to build into, raising a BuildError if the cache cannot be written to.
+    """
+
+    directory = cache_directory()
+
+    try:
+        try:
+            os.makedirs(directory)
+
+        except OSError as error:
+            if error.errno != errno.EEXIST:
+                raise
+
+        return tempfile.mkdtemp(prefix=prefix+'-build-', dir=directory)
+
+    except OSError as error:
+        raise BuildError("Could not write to the build cache {0} (set MATPY_CACHE to a writable directory): {1}".format(directory, error))
+
+def source_hash(source=source_file):
+    """
+    Hashes the Fortran source together with the Python and NumPy versions,
+    since an extension built for one of them cannot be loaded by another.
+    """
+
+    digest = hashlib.sha1()
+
+    with open(source, 'rb') as source_code:
+        digest.update(source_code.read())
+
+    digest.update(sys.version.encode('utf-8'))
+    digest.update(np.__version__.encode('utf-8'))
+
+    return digest.hexdigest()
+
+def find_extension(directory):
+    """Returns the compiled extension in a directory, or None if there is not one."""
+
+    found = glob.glob(os.path.join(directory, module_name+'*.so')) + glob.glob(os.path.join(directory, module_name+'*.pyd'))
+
+    if found:
+        return found[0]
+
+    return None
+
+def build(source, directory):
+    """Compiles the Fortran source with f2py into a directory, raising a BuildError if that fails."""
+
+    command = [sys.executable, '-m', 'numpy.f2py', '-c', '-m', module_name, os.path.abspath(source)]
+
+    try:
+        process = subprocess.Popen(command, cwd=directory, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        output = process.communicate()[0]
+
+    except OSError as error:
+        raise BuildError("Could not run f2py to compile {0}: {1}".format(source, error))
+
+    if process.returncode != 0 or find_extension(directory) is None:
+        last_lines = '\n'.join(output.decode('utf-8', 'replace').splitlines()[-10:])
+        raise BuildError("Could not compile {0} (is a Fortran compiler such as gfortran installed?). "
+                         "Use irreversible_stressstrain.set_engine('numpy') to run the model without it.\n{1}".format(source, last_lines))
+
+def load_extension(source=source_file, rebuild=False):
+    """
+    Returns the compiled Fortran model, compiling it only if there is no
+    cached extension for this exact source. Raises a BuildError if it cannot
+    be compiled, or the cache cannot be written to.
+
+    Keyword Arguments:
+       | source - the Fortran file to compile (irreverisble.f90 next to this file by default)
+       | rebuild - compile again even if there is a cached extension
+    """
+
+    target = os.path.join(cache_directory(), module_name+'-'+source_hash(source))
+
+    if rebuild and os.path.isdir(target):
+        shutil.rmtree(target, ignore_errors=True)
+
+    if find_extension(target) is None:
+
+        """A cached directory without an extension is left over from an interrupted build"""
+        if os.path.isdir(target):
+            shutil.rmtree(target, ignore_errors=True)
+
+        """Every build gets its own directory, which only becomes the cached one once it is complete"""
+        building = build_directory(module_name)
+
+        try:
+            build(source, building)
+
+            try:
+                os.rename(building, target)
+
+            except OSError:
+                """Another process finished first, its extension is used"""
+                pass
+
+        finally:
+            shutil.rmtree(building, ignore_errors=True)
+
+    return imp.load_dynamic(module_name, find_extension(target))
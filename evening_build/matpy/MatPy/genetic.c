@@ -0,0 +1,254 @@
+/* Edward Nusinovich */
+/* Implementing Genetic Algorithm for simple functions */
+
+/* Built as a shared library (libgenetic.so) providing the operators of a genetic algorithm, */
+/* Python calls them on NumPy arrays through ctypes (see MatPy/genetic_operators.py). */
+/* Nothing here allocates memory: the caller owns every array. */
+
+#include "genetic.h"
+
+/* Seeds a generator (any seed, including zero, gives a usable state) */
+void ga_seed(uint64_t *state, uint64_t seed){
+
+	/* splitmix64 spreads the bits of the seed so nearby seeds give unrelated sequences */
+	uint64_t z = seed + 0x9E3779B97F4A7C15ULL;
+	z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9ULL;
+	z = (z ^ (z >> 27)) * 0x94D049BB133111EBULL;
+	z = z ^ (z >> 31);
+
+	*state = z ? z : 0x9E3779B97F4A7C15ULL; /* xorshift needs a nonzero state */
+}
+
+/* Returns a double from zero (inclusive) to one (exclusive) */
+double ga_uniform(uint64_t *state){
+
+	/* xorshift64* */
+	uint64_t x = *state;
+	x ^= x >> 12;
+	x ^= x << 25;
+	x ^= x >> 27;
+	*state = x;
+
+	return ((x * 0x2545F4914F6CDD1DULL) >> 11) * (1.0/9007199254740992.0); /* top 53 bits */
+}
+
+/* Returns a normally distributed double (Box-Muller) */
+double ga_normal(uint64_t *state){
+
+	double u = 1.0 - ga_uniform(state); /* (0,1], so the log is finite */
+	double v = ga_uniform(state);
+
+	return sqrt(-2.0*log(u))*cos(2.0*M_PI*v);
+}
+
+/* Returns largest element of a list */
+double maxoflist(const double *list, int nums){
+
+	double max = list[0]; /* Initially set to first value */
+	int i;
+	for(i=1;i<nums;i++){
+		if(list[i]>max){
+			max = list[i];
+		}
+	}
+
+	return max;
+}
+
+/* Returns smallest element of list, to baseline */
+double minoflist(const double *list, int nums){
+
+	double min = list[0];
+	int i;
+	for(i=1;i<nums;i++){
+		if(list[i]<min){
+			min = list[i];
+		}
+	}
+
+	return min;
+}
+
+/* Roulette wheel selection: stores count indices in selected, each chosen with a probability proportional */
+/* to its fitness (distance from the largest finite value in the generation). Members whose value is not finite */
+/* (failed evaluations) have no fitness, and if every finite member is as fit, they are all equally likely. */
+/* wheel (nums doubles, provided by the caller) holds the running total of the fitness, which is searched for every selection. */
+void ga_select(const double *values, int nums, int count, int *selected, double *wheel, uint64_t *state){
+
+	double max = 0;
+	int finite = 0;
+	int i, j;
+
+	for(i=0;i<nums;i++){
+		if(isfinite(values[i])){
+			if(!finite || values[i]>max){
+				max = values[i];
+			}
+			finite++;
+		}
+	}
+
+	double totalfitness = 0;
+	int last = nums-1; /* the last member with any fitness, which takes any rounding at the end of the wheel */
+
+	for(i=0;i<nums;i++){
+		if(isfinite(values[i])){
+			totalfitness = totalfitness + (max - values[i]);
+		}
+		wheel[i] = totalfitness;
+	}
+
+	if(!(totalfitness > 0)){
+		/* Every finite member is as fit (or none is finite, then every member is) */
+		totalfitness = 0;
+		for(i=0;i<nums;i++){
+			if(isfinite(values[i]) || !finite){
+				totalfitness = totalfitness + 1;
+			}
+			wheel[i] = totalfitness;
+		}
+	}
+
+	while(last>0 && wheel[last]==wheel[last-1]) last--;
+
+	for(j=0;j<count;j++){
+
+		/* The first member whose running total passes the random point (binary search) */
+		double point = ga_uniform(state)*totalfitness;
+		int low = 0, high = last;
+
+		while(low<high){
+			int middle = (low+high)/2;
+
+			if(wheel[middle] > point) high = middle;
+			else low = middle+1;
+		}
+
+		selected[j] = low;
+	}
+}
+
+/* Blend crossover: rows 2i and 2i+1 of parents are a pair, and with probability rate every gene of their children */
+/* is taken at a random point between theirs (otherwise they are copied). The first children of the pairs are */
+/* stored in rows 0 to pairs-1 of children, the second children in rows pairs to 2*pairs-1. */
+void ga_crossover(const double *parents, int pairs, int genes, double rate, double *children, uint64_t *state){
+
+	int i, k;
+	for(i=0;i<pairs;i++){
+
+		const double *first = parents + (2*i)*genes;
+		const double *second = parents + (2*i+1)*genes;
+		double *firstchild = children + i*genes;
+		double *secondchild = children + (pairs+i)*genes;
+
+		int crosses = ga_uniform(state) < rate;
+
+		for(k=0;k<genes;k++){
+
+			double mixing = crosses ? ga_uniform(state) : 1.0;
+
+			firstchild[k] = mixing*first[k] + (1-mixing)*second[k];
+			secondchild[k] = mixing*second[k] + (1-mixing)*first[k];
+		}
+	}
+}
+
+/* Traverses each gene of the population and, with probability rate, moves it by a normal step */
+/* of scale times the width of its bounds, keeping it within them (in place) */
+void ga_mutate(double *population, int nums, int genes, double rate, double scale, const double *lower, const double *upper, uint64_t *state){
+
+	int i, k;
+	for(i=0;i<nums;i++){
+		for(k=0;k<genes;k++){
+
+			double *gene = population + i*genes + k;
+
+			if(ga_uniform(state) < rate){
+				*gene = *gene + ga_normal(state)*scale*(upper[k]-lower[k]);
+			}
+
+			if(*gene < lower[k]) *gene = lower[k];
+			if(*gene > upper[k]) *gene = upper[k];
+		}
+	}
+}
+
+#ifdef GENETIC_MAIN
+
+/* (Fitness Function) x^2 will be our fitness function for first GA */
+double objective(double x){
+	return x*x;
+}
+
+/* Demonstrates the operators by minimizing x^2 (build with make demo) */
+int main(){
+
+	/* SETUP AND INITIAL CONDITIONS */
+
+	int popsize = 20; /* Members of the population (even, so they breed in pairs) */
+	int generations = 200;
+	double lower = -1000, upper = 1000;
+
+	uint64_t state;
+	ga_seed(&state, 2016);
+
+	/* Every array is allocated once, and generations are swapped between pGen and newGen */
+	double *pGen = malloc(sizeof(double)*popsize);
+	double *newGen = malloc(sizeof(double)*popsize);
+	double *parents = malloc(sizeof(double)*popsize);
+	double *values = malloc(sizeof(double)*popsize);
+	int *selected = malloc(sizeof(int)*popsize);
+	double *wheel = malloc(sizeof(double)*popsize);
+
+	if(!pGen || !newGen || !parents || !values || !selected || !wheel){
+		fprintf(stderr,"Out of memory\n");
+		return 1;
+	}
+
+	int i, generation;
+	for(i=0;i<popsize;i++){
+		pGen[i] = lower + ga_uniform(&state)*(upper-lower); /* Establishes first generation */
+	}
+
+	for(generation=0;generation<generations;generation++){
+
+		for(i=0;i<popsize;i++){
+			values[i] = objective(pGen[i]);
+		}
+
+		ga_select(values, popsize, popsize, selected, wheel, &state);
+
+		for(i=0;i<popsize;i++){
+			parents[i] = pGen[selected[i]];
+		}
+
+		ga_crossover(parents, popsize/2, 1, 0.9, newGen, &state);
+		ga_mutate(newGen, popsize, 1, 0.05, 0.01, &lower, &upper, &state); /* This suggests a relatively low likelihood of mutation */
+
+		double *swap = pGen;
+		pGen = newGen;
+		newGen = swap;
+	}
+
+	for(i=0;i<popsize;i++){
+		values[i] = objective(pGen[i]);
+	}
+
+	double minfitness = minoflist(values, popsize);
+	for(i=0;i<popsize;i++){
+		if(values[i]==minfitness) break;
+	}
+
+	printf("\nThe best solution found was %f at %f.\n",minfitness, pGen[i]);	/* Inform at conclusion of algorithm */
+
+	free(pGen);
+	free(newGen);
+	free(parents);
+	free(values);
+	free(selected);
+	free(wheel);
+
+	return 0;
+}
+
+#endif
@@ -0,0 +1,24 @@
+#include <math.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <stdint.h>
+
+#ifndef M_PI
+#define M_PI 3.14159265358979323846
+#endif
+
+/* RANDOM NUMBERS */
+/* Every run has its own generator state (a single 64 bit word), so runs are reproducible and independent */
+void ga_seed(uint64_t *state, uint64_t seed);
+double ga_uniform(uint64_t *state);
+double ga_normal(uint64_t *state);
+
+/* OPERATORS */
+/* Populations are contiguous row-major arrays of doubles, one member (rows) of genes (columns) per row */
+void ga_select(const double *values, int nums, int count, int *selected, double *wheel, uint64_t *state);
+void ga_crossover(const double *parents, int pairs, int genes, double rate, double *children, uint64_t *state);
+void ga_mutate(double *population, int nums, int genes, double rate, double scale, const double *lower, const double *upper, uint64_t *state);
+
+/* HELPERS */
+double maxoflist(const double *list, int nums);
+double minoflist(const double *list, int nums);
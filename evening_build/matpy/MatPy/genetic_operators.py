@@ -0,0 +1,184 @@
+"""
+Native Genetic Operators
+************************
+
+Calls the selection, crossover and mutation operators of
+genetic.c (kept identical to GeneticAlgorithm/genetic.c) from Python through ctypes. The
+operators work directly on the memory of NumPy arrays, so
+populations are never copied on their way in or out.
+
+The C source is compiled into a shared library once and kept
+in the same cache directory as the Fortran model (see
+fortran_build), keyed on a hash of the source. If it cannot
+be compiled or loaded, loading raises a BuildError, and genetic_minimize
+(in optimization_suite) warns and uses its NumPy operators instead.
+"""
+
+"""Basic libs"""
+import os
+import shutil
+import ctypes
+import hashlib
+import subprocess
+import numpy as np
+
+"""Shares the build cache of the Fortran model"""
+from fortran_build import BuildError, build_directory, cache_directory
+
+library_name = 'libgenetic'
+source_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'genetic.c')
+
+"""Argument types of the operators, arrays must be C contiguous (ctypes refuses anything that would need a copy)"""
+doubles = np.ctypeslib.ndpointer(dtype=np.float64, flags='C_CONTIGUOUS')
+writable_doubles = np.ctypeslib.ndpointer(dtype=np.float64, flags=('C_CONTIGUOUS', 'WRITEABLE'))
+writable_ints = np.ctypeslib.ndpointer(dtype=np.intc, flags=('C_CONTIGUOUS', 'WRITEABLE'))
+generator_state = np.ctypeslib.ndpointer(dtype=np.uint64, shape=(1,), flags=('C_CONTIGUOUS', 'WRITEABLE'))
+
+library = None
+
+def source_hash(source):
+    """Hashes the C source together with its header."""
+
+    digest = hashlib.sha1()
+
+    for name in (source, os.path.splitext(source)[0]+'.h'):
+        with open(name, 'rb') as source_code:
+            digest.update(source_code.read())
+
+    return digest.hexdigest()
+
+def build(source, directory):
+    """Compiles the C source into a shared library in a directory, raising a BuildError if that fails."""
+
+    command = [os.environ.get('CC', 'cc'), '-O2', '-shared', '-fPIC', '-o', os.path.join(directory, library_name+'.so'), os.path.abspath(source), '-lm']
+
+    try:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        output = process.communicate()[0]
+
+    except OSError as error:
+        raise BuildError("Could not run a C compiler to compile {0}: {1}".format(source, error))
+
+    if process.returncode != 0:
+        raise BuildError("Could not compile {0}:\n{1}".format(source, output.decode('utf-8', 'replace')))
+
+def load_library(source=source_file, rebuild=False):
+    """
+    Returns the compiled operators (a ctypes library), compiling them only if there is no cached library
+    for this exact source, and declaring the argument types of every operator.
+
+    Keyword Arguments:
+       | source - the C file to compile (genetic.c next to this file by default)
+       | rebuild - compile again even if there is a cached library
+    """
+
+    global library
+
+    if library is not None and not rebuild:
+        return library
+
+    if not os.path.isfile(source):
+        raise BuildError("The genetic operators are not available, {0} does not exist".format(source))
+
+    target = os.path.join(cache_directory(), library_name+'-'+source_hash(source))
+    compiled = os.path.join(target, library_name+'.so')
+
+    if rebuild and os.path.isdir(target):
+        shutil.rmtree(target, ignore_errors=True)
+
+    if not os.path.isfile(compiled):
+
+        """Like the Fortran model, every build gets its own directory, which only becomes the cached one once it is complete"""
+        building = build_directory(library_name)
+
+        try:
+            build(source, building)
+
+            try:
+                os.rename(building, target)
+
+            except OSError:
+                """Another process finished first, its library is used"""
+                pass
+
+        finally:
+            shutil.rmtree(building, ignore_errors=True)
+
+    try:
+        library = ctypes.CDLL(compiled)
+
+    except OSError as error:
+        raise BuildError("Could not load the genetic operators from {0}: {1}".format(compiled, error))
+
+    library.ga_seed.argtypes = [generator_state, ctypes.c_uint64]
+    library.ga_seed.restype = None
+
+    library.ga_select.argtypes = [doubles, ctypes.c_int, ctypes.c_int, writable_ints, writable_doubles, generator_state]
+    library.ga_select.restype = None
+
+    library.ga_crossover.argtypes = [doubles, ctypes.c_int, ctypes.c_int, ctypes.c_double, writable_doubles, generator_state]
+    library.ga_crossover.restype = None
+
+    library.ga_mutate.argtypes = [writable_doubles, ctypes.c_int, ctypes.c_int, ctypes.c_double, ctypes.c_double, doubles, doubles, generator_state]
+    library.ga_mutate.restype = None
+
+    return library
+
+class NativeRandom:
+    """
+    The state of the C random number generator (a single 64 bit word in a NumPy array),
+    seeded like numpy.random.RandomState.
+    """
+
+    def __init__(self, seed=None):
+
+        if seed is None:
+            seed = np.random.randint(2**31)
+
+        self.state = np.zeros(1, dtype=np.uint64)
+        load_library().ga_seed(self.state, seed)
+
+def select(values, count, random, out=None):
+    """
+    Roulette wheel selection in C: the indices of count individuals, each chosen with a probability proportional to
+    how much smaller its value is than the largest finite one, never choosing failed (not finite) ones (see optimization_suite.roulette_wheel).
+    The indices are written into out (an array of C ints) if it is given.
+    """
+
+    values = np.ascontiguousarray(values, dtype=np.float64)
+
+    if out is None:
+        out = np.empty(count, dtype=np.intc)
+
+    load_library().ga_select(values, len(values), count, out, np.empty(len(values)), random.state)
+
+    return out
+
+def crossover(parents, rate, random, out=None):
+    """
+    Blend crossover in C, laid out like optimization_suite.crossover: rows 2i and 2i+1 are a pair, and the first
+    children of the pairs come before the second ones. The children are written into out if it is given.
+    """
+
+    parents = np.ascontiguousarray(parents, dtype=np.float64)
+    pairs, genes = len(parents)//2, parents.shape[1]
+
+    if out is None:
+        out = np.empty((2*pairs, genes))
+
+    load_library().ga_crossover(parents, pairs, genes, rate, out, random.state)
+
+    return out
+
+def mutate(population, rate, scale, bounds, random):
+    """
+    Mutation in C, in place: every gene, with probability rate, moves by a normal step of scale times
+    the width of its bounds, and is kept within them. Returns the population.
+    """
+
+    bounds = np.asarray(bounds, dtype=np.float64)
+
+    load_library().ga_mutate(population, population.shape[0], population.shape[1], rate, scale,
+                             np.ascontiguousarray(bounds[:,0]), np.ascontiguousarray(bounds[:,1]), random.state)
+
+    return population
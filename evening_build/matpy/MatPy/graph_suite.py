@@ -5,14 +5,16 @@ Graph Suite
 Contains all functionality needed to plot functions easily.
 Uses pyplot from matplotlib.
 
-IntervalPlot3D -- takes a function in R3, an x domain, and a y domain, and plots the function at all points on those domains.\n
+IntervalPlot3D -- takes a function in R3, an x domain, and a y domain, and plots the function at all points on those domains (or values already evaluated there).\n
 barGraph -- takes some data points and plots them as a series of bars, with optionally specifiable tick labels.\n
 plot2D -- takes a set of data with two columns and plots the data, where markers for the data set can be specified.\n
 plotmult2D -- takes two data sets and plots each, where each data set is like the input for plot2D.\n
 """
 
+import numpy as np
 import matplotlib
 from matplotlib import pyplot as plot
+from mpl_toolkits.mplot3d import Axes3D # registers the '3d' projection
 
 defaultfontsize = 30
 matplotlib.rcParams.update({'font.size': defaultfontsize}) # default font size
@@ -23,7 +25,7 @@ def texOn():
 def texOff():
 	plot.rc('text', usetex=False)
 
-def IntervalPlot3D(function, x_domain, y_domain, xlabel="",ylabel="",zlabel="",title="",fontsize=defaultfontsize):
+def IntervalPlot3D(function, x_domain, y_domain, xlabel="",ylabel="",zlabel="",title="",fontsize=defaultfontsize,values=None):
 	"""
 	Plots a function over a given domain, allowing the user to provide labels for the axes.
 
@@ -36,6 +38,9 @@ def IntervalPlot3D(function, x_domain, y_domain, xlabel="",ylabel="",zlabel="",t
 		|  
 		| title - The title of the chart
 		| fontsize - Override the default font size, which is 14
+		| values - the len(x_domain) x len(y_domain) values of the function, if they were already evaluated (e.g. error_surface.ErrorSurface.errors), so the function is not called
+
+	Returns the values, so they can be kept (or saved with error_surface) instead of evaluated again.
 	"""
 
 	fig = plot.figure()
@@ -43,26 +48,15 @@ def IntervalPlot3D(function, x_domain, y_domain, xlabel="",ylabel="",zlabel="",t
 	plot.title(title)
 	matplotlib.rcParams.update({'font.size': fontsize})
 
-	x = np.zeros(0)
-	y = np.zeros(0)
-
-	# evenly traverses the entire domain and adds all points to the list of points to be evaluated
-	for y_val in y_domain:
-
-		x = np.append(x,x_domain)
-
-		for x_val in x_domain:
+	# evenly traverses the entire domain, every x value with every y value
+	x, y = np.meshgrid(np.asarray(x_domain, dtype=float), np.asarray(y_domain, dtype=float), indexing='ij')
 
-			y = np.append(y,y_val)
+	if values is None:
+		values = np.array([function((x_val, y_val)) for x_val, y_val in zip(x.ravel(), y.ravel())], dtype=float).reshape(x.shape)
 
-	z = np.zeros(0)
+	values = np.asarray(values, dtype=float)
 
-	for index, value in enumerate(x):
-
-		model_params = (x[index],y[index])
-		z = np.append(z,function(model_params))
-
-	ax.plot(x,y,z,"p")
+	ax.plot(x.ravel(),y.ravel(),values.ravel(),"p")
 
 	ax.set_xlabel(xlabel)
 	ax.set_ylabel(ylabel)
@@ -70,6 +64,8 @@ def IntervalPlot3D(function, x_domain, y_domain, xlabel="",ylabel="",zlabel="",t
 
 	plot.show()
 
+	return values
+
 def barGraph(data, ylabel='', title='', xticklabels=None):
 	"""
 	Displays all of the data points in data as a series of bars.
@@ -30,8 +30,7 @@ from irreversible_stressstrain import StressStrain as strainmodel
 """Optimization tools for model training"""
 import optimization_suite
 from scipy.optimize import basinhopping
-from scipy.optimize import brute
-from pybrain.optimization import GA
+import error_surface
 
 def getfile():
     """Returns the model selected by the user (contained in a data file)"""
@@ -72,8 +71,7 @@ def display_with_yield(disp = True):
         yieldpoint = material_analytics.yield_stress(data)
         
     else:
-        elastic, plastic = material_analytics.kmeanssplit(data)
-        yieldpoint = plastic[0][None,]
+        yieldpoint = material_analytics.kmeans_yield(data)
 
     if disp:
         """Displays the found yield stress"""
@@ -107,12 +105,12 @@ def constitutive_model():
     model, yieldpoint = display_with_yield(disp=False)
     data = model.get_experimental_data()
 
-    """Will need to be set to user-input guess"""       
-    guess = [-150,1]
-
     """[0,1] is the first row, second column, which is the stress values"""
     SS_stress = yieldpoint[0,1]
 
+    """Will need to be set to user-input guess, a specimen fitted before starts from the minimum of its stored error surface"""
+    guess = error_surface.warm_start(model, SS_stress, default=[-150,1])
+
     model_training_methods = ['Nelder-Mead','Powell','CG','Newton-CG','BFGS','L-BFGS-B','SLSQP','COBYLA','TNC','Basinhopping','Brute Force','Genetic Algorithm']
     
     """Because basinhopping, brute force, and GA are all in separate libraries, they are handled as separate cases."""
@@ -124,10 +122,16 @@ def constitutive_model():
         model_params = optimization_suite.minimize_suite(model.mcfunc, methods=[basinhopping,], guess = guess ,SS_stress=SS_stress)
 
     elif optmethod==10:
-        model_params = optimization_suite.minimize_suite(model.mcfunc, methods=[brute,], guess = guess ,SS_stress=SS_stress)
+        """Brute force evaluates (or loads) the whole error surface, and polishes its interpolated minimum like scipy's brute does"""
+        minimum = error_surface.surface(model, SS_stress).minimum()
+
+        if minimum is None:
+            raise ValueError("The model could not be evaluated anywhere on the error surface grid, try another yield stress")
+
+        model_params = optimization_suite.minimize_suite(model.mcfunc, methods=['Nelder-Mead',], guess = minimum[0] ,SS_stress=SS_stress)
 
     else:
-        model_params = optimization_suite.GA_minimize(model.mcfunc, guess)
+        model_params = optimization_suite.minimize_suite(model.mcfunc, methods=['Genetic Algorithm',], guess = guess ,SS_stress=SS_stress)
 
     """Plots the data versus the fitted irreversible model data"""
     plot.plotmult2D(data, model.irreversible_model(model_params,SS_stress), title = 'Fitted Thermodynamics', xtitle = 'Strain ($\epsilon$)', ytitle= 'Stress ($\sigma$)')
@@ -4,11 +4,130 @@
 ! Shengyen Li, Shenyen.li@gmail.com
 !
 !!!!!!!!!!!!!!!!!!!!!!!!!!!
-
 subroutine mechanics(p_stress,ss_stress,Tsam,M_para,samples,stress_strain,WTN)
 
   implicit none
 
+  integer, parameter:: maxiterstep=20000
+
+! /*/*/*/ inputs /*/*/*/
+  integer, intent(in):: samples
+
+  real*8, dimension(samples), intent(in):: p_stress,ss_stress
+  real*8, dimension(samples), intent(in):: Tsam
+
+  real*8, dimension(2), intent(in):: M_para
+! /-/-/-/ outputs /-/-/-/
+  real*8, dimension(2*maxiterstep), intent(out):: stress_strain
+  real*8, intent(out):: WTN
+
+  real*8:: curve(maxiterstep,2)
+  integer:: i, sam, nsteps
+
+!=== every sample is written into the same buffer, a NaN ends only that sample (integrate_curve stops at it) ===
+  stress_strain=0d0
+
+  do sam=1,samples
+
+      call integrate_curve(p_stress(sam),ss_stress(sam),Tsam(sam),M_para,0d0,0,curve,nsteps,WTN)
+
+      do i=1,nsteps
+        stress_strain(2*i-1)=curve(i,1)
+        stress_strain(2*i)=curve(i,2)
+      end do
+
+  end do
+
+  return
+
+end subroutine
+
+
+!=== one (C, Gact) pair per curve, every curve in its own row ===
+subroutine mechanics_batch(p_stress,ss_stress,Tsam,M_para,curves,strain_limit,necking_stop,stress_strain,nsteps,WTN)
+
+  implicit none
+
+  integer, parameter:: maxiterstep=20000
+
+! /*/*/*/ inputs /*/*/*/
+  integer, intent(in):: curves
+
+  real*8, dimension(curves), intent(in):: p_stress,ss_stress
+  real*8, dimension(curves), intent(in):: Tsam
+
+  real*8, dimension(curves,2), intent(in):: M_para
+  real*8, intent(in):: strain_limit
+  integer, intent(in):: necking_stop
+!f2py real*8 optional, intent(in):: strain_limit=0
+!f2py integer optional, intent(in):: necking_stop=0
+! /-/-/-/ outputs /-/-/-/
+  real*8, dimension(curves,maxiterstep,2), intent(out):: stress_strain
+  integer, dimension(curves), intent(out):: nsteps
+  real*8, dimension(curves), intent(out):: WTN
+
+  real*8:: curve(maxiterstep,2)
+  integer:: cur
+
+  do cur=1,curves
+
+      call integrate_curve(p_stress(cur),ss_stress(cur),Tsam(cur),M_para(cur,:),strain_limit,necking_stop, &
+                           curve,nsteps(cur),WTN(cur))
+      stress_strain(cur,:,:)=curve
+
+  end do
+
+  return
+
+end subroutine
+
+
+!=== one curve per sample (stresses, temperature), all with the same (C, Gact) ===
+subroutine mechanics_samples(p_stress,ss_stress,Tsam,M_para,samples,strain_limit,necking_stop,stress_strain,nsteps,WTN)
+
+  implicit none
+
+  integer, parameter:: maxiterstep=20000
+
+! /*/*/*/ inputs /*/*/*/
+  integer, intent(in):: samples
+
+  real*8, dimension(samples), intent(in):: p_stress,ss_stress
+  real*8, dimension(samples), intent(in):: Tsam
+
+  real*8, dimension(2), intent(in):: M_para
+  real*8, intent(in):: strain_limit
+  integer, intent(in):: necking_stop
+!f2py real*8 optional, intent(in):: strain_limit=0
+!f2py integer optional, intent(in):: necking_stop=0
+! /-/-/-/ outputs /-/-/-/
+  real*8, dimension(samples,maxiterstep,2), intent(out):: stress_strain
+  integer, dimension(samples), intent(out):: nsteps
+  real*8, dimension(samples), intent(out):: WTN
+
+  real*8:: curve(maxiterstep,2)
+  integer:: sam
+
+  do sam=1,samples
+
+      call integrate_curve(p_stress(sam),ss_stress(sam),Tsam(sam),M_para,strain_limit,necking_stop, &
+                           curve,nsteps(sam),WTN(sam))
+      stress_strain(sam,:,:)=curve
+
+  end do
+
+  return
+
+end subroutine
+
+
+!=== SS curve of a single sample, zero padded after its last step (nsteps) ===
+!--- strain_limit > 0: stops after the first step past that strain (in %) ---
+!--- necking_stop = 1: stops once necking starts (dsds <= totstress) ---
+subroutine integrate_curve(p_stress,ss_stress,Tsam,M_para,strain_limit,necking_stop,stress_strain,nsteps,WTN)
+
+  implicit none
+
   integer, parameter:: no_phase=1, no_phase_calc=1
   integer, parameter:: maxiterstep=20000
   integer:: no_iter
@@ -44,23 +163,23 @@ subroutine mechanics(p_stress,ss_stress,Tsam,M_para,samples,stress_strain,WTN)
                                    ! isostrain (isowork=0) is the only approach 
 
   real*8:: densityin(no_phase)
-  integer:: i, sam
+  integer:: i
   integer:: necking
   real*8:: Vf(no_phase)
 
 ! /*/*/*/ inputs /*/*/*/
-  real*8, dimension(samples), intent(in):: p_stress,ss_stress
-  real*8, dimension(samples), intent(in):: Tsam
-
-  integer, intent(in):: samples
+  real*8, intent(in):: p_stress,ss_stress
+  real*8, intent(in):: Tsam
 
   real*8, dimension(2), intent(in):: M_para
+  real*8, intent(in):: strain_limit
+  integer, intent(in):: necking_stop
 ! /-/-/-/ outputs /-/-/-/
-  real*8, dimension(2*maxiterstep), intent(out):: stress_strain
+  real*8, dimension(maxiterstep,2), intent(out):: stress_strain
+  integer, intent(out):: nsteps
   real*8, intent(out):: WTN
-  integer:: ind_SS
 
-  real*8:: SR(samples)
+  real*8:: SR
 
 !  M_para(1)=-180
 !  M_para(2)=3.08
@@ -75,175 +194,173 @@ subroutine mechanics(p_stress,ss_stress,Tsam,M_para,samples,stress_strain,WTN)
 
 !--- conditions for tensile test ---
   SR=1d-3
-  ind_SS=1
-
-
-  do sam=1,samples
 
-      mu_shmodulus(1)=(298.*3./8.)*(1.-0.5*(Tsam(sam)-300.)/1673.)*1000d0  ! input GPa
+  stress_strain=0d0
+  nsteps=0
 
-!      stress_strain(1)=0d0
-!      stress_strain(2)=0d0
+  mu_shmodulus(1)=(298.*3./8.)*(1.-0.5*(Tsam-300.)/1673.)*1000d0  ! input GPa
 
-      strain_rate=SR(sam)*2.5d0/0.83d0 ! shear strain rate
+  strain_rate=SR*2.5d0/0.83d0 ! shear strain rate
 
 !+++ Ni-gamma +++
-      density0(1)=1.0d+12
-      gsize(1)=20.0d-6
-      lumda(1)=1.5D-7
-      nmax(1)=4.0d0
+  density0(1)=1.0d+12
+  gsize(1)=20.0d-6
+  lumda(1)=1.5D-7
+  nmax(1)=4.0d0
 
-      C(1)=M_para(1)
-      Gact(1)=M_para(2)*1.602176565d-19
-      nusrdG(1)=vibfreq*exp(-Gact(1)/(KB*Tsam(sam)))/strain_rate
-!print*, nusrdG(1),exp(-Gact(1)/(KB*Tsam(sam))),Gact(1),KB*Tsam(sam)
+  C(1)=M_para(1)
+  Gact(1)=M_para(2)*1.602176565d-19
+  nusrdG(1)=vibfreq*exp(-Gact(1)/(KB*Tsam))/strain_rate
+!print*, nusrdG(1),exp(-Gact(1)/(KB*Tsam)),Gact(1),KB*Tsam
 
-      Vf(1)=1d0
+  Vf(1)=1d0
 !print*, vf(1)
 !      if(vf(1)>0.5d0) Vf(1)=1d0-vf(1)
 
-      stress_p(1)=p_stress(sam)/Tfactor
-      stress_material(1)=ss_stress(sam)/Tfactor  ! Peierl's + solid solution strengthening
+  stress_p(1)=p_stress/Tfactor
+  stress_material(1)=ss_stress/Tfactor  ! Peierl's + solid solution strengthening
 
-!print*, p_stress(sam),ss_stress(sam)
+!print*, p_stress,ss_stress
 
-      necking=0
+  necking=0
 
 !=== SS curve ===
-      stress=0.0d0
-      delta_strain=1d-4
-      dstrain=0.0d0
-      dstrain_pre=0.0d0
-
-      densityin=density0
-      n=0.0d0
-
-      dsdsphase=0d0
-      pphasestrain=0d0
-      pphasestress=0d0
-      neckingphase=0
-
-      totstress_p=0.0d0
-      totstrain_p=0d0
-      totstress=0.0d0
-      totstrain=0.0d0
-      WTN=0d0
-      no_iter=0
-
-      do foritergor=1,maxiterstep,1
+  stress=0.0d0
+  delta_strain=1d-4
+  dstrain=0.0d0
+  dstrain_pre=0.0d0
+
+  densityin=density0
+  n=0.0d0
+
+  dsdsphase=0d0
+  pphasestrain=0d0
+  pphasestress=0d0
+  neckingphase=0
+
+  totstress_p=0.0d0
+  totstrain_p=0d0
+  totstress=0.0d0
+  totstrain=0.0d0
+  WTN=0d0
+  no_iter=0
+
+  do foritergor=1,maxiterstep,1
 !print*, foritergor,maxiterstep
 
-        tot_shear_strain=foritergor*delta_strain
-        no_iter=foritergor+1
+    tot_shear_strain=foritergor*delta_strain
+    no_iter=foritergor+1
+    nsteps=foritergor
 
-        if(isowork==1) then  ! iso-work
-          print*, "NOT CORRECT MODEL SELECTION FOR SUPERALLOY"
-        else if(isowork==0) then  ! iso-strain
-          do i=1,no_phase_calc
-            if(neckingphase(i)==0) dstrain(i)=delta_strain
-          end do
-        end if
-
-        do i=1,no_phase_calc
-          if(neckingphase(i)==0) then
-            dstrain(i)=dstrain(i)+dstrain_pre(i)
-            dstrain_pre(i)=dstrain(i)
-          end if
-        end do
+    if(isowork==1) then  ! iso-work
+      print*, "NOT CORRECT MODEL SELECTION FOR SUPERALLOY"
+    else if(isowork==0) then  ! iso-strain
+      do i=1,no_phase_calc
+        if(neckingphase(i)==0) dstrain(i)=delta_strain
+      end do
+    end if
 
-        do i=1,no_phase_calc,1
+    do i=1,no_phase_calc
+      if(neckingphase(i)==0) then
+        dstrain(i)=dstrain(i)+dstrain_pre(i)
+        dstrain_pre(i)=dstrain(i)
+      end if
+    end do
 
-          if(Vf(i)>0.0d0) then
+    do i=1,no_phase_calc,1
 
-            stress_b=0.0d0
-            stress_b=mu_shmodulus(i)*burgers*nmax(i)*(1.0d0-exp(-lumda(i)*dstrain(i)/(burgers*nmax(i))))/gsize(i)
+      if(Vf(i)>0.0d0) then
 
-            stress_in=0.0d0
-            stress_in=alpha*mu_shmodulus(i)*burgers*sqrt(densityin(i))
+        stress_b=0.0d0
+        stress_b=mu_shmodulus(i)*burgers*nmax(i)*(1.0d0-exp(-lumda(i)*dstrain(i)/(burgers*nmax(i))))/gsize(i)
 
-            stress(i)=0.0d0
-            stress(i)=stress_material(i) + stress_b + sqrt(stress_in**2.0d0 + stress_p(i)**2.0d0)
+        stress_in=0.0d0
+        stress_in=alpha*mu_shmodulus(i)*burgers*sqrt(densityin(i))
 
-            const1=mu_shmodulus(i)*(burgers**2.0d0)+stress(i)*burgers/sqrt(densityin(i))
+        stress(i)=0.0d0
+        stress(i)=stress_material(i) + stress_b + sqrt(stress_in**2.0d0 + stress_p(i)**2.0d0)
 
-            k1=const1*nusrdG(i)*densityin(i)
-            k2=0.5d0*C(i)*alpha*mu_shmodulus(i)*(burgers**2.0d0)-const1
+        const1=mu_shmodulus(i)*(burgers**2.0d0)+stress(i)*burgers/sqrt(densityin(i))
 
-            delta_density(i)=delta_strain*( k1 - sqrt(stress_in**2.0d0 + stress_p(i)**2.0d0)) / k2
-            densityin(i)=densityin(i)+delta_density(i)
+        k1=const1*nusrdG(i)*densityin(i)
+        k2=0.5d0*C(i)*alpha*mu_shmodulus(i)*(burgers**2.0d0)-const1
 
-          end if
+        delta_density(i)=delta_strain*( k1 - sqrt(stress_in**2.0d0 + stress_p(i)**2.0d0)) / k2
+        densityin(i)=densityin(i)+delta_density(i)
 
-        end do
+      end if
 
-        totstress=0.0d0
-        totstrain=0.0d0
+    end do
 
-        if(isowork==1) then
-          do i=1,no_phase_calc,1
-            if(Vf(i) > 0.0d0 .and. neckingphase(i)==0) then
-              totstress=totstress+stress(i)*Vf(i)
-              totstrain=totstrain+dstrain(i)*Vf(i)
-            end if
-          end do
-        else if(isowork==0) then
-          do i=1,no_phase_calc,1
-            if(Vf(i)>0.0d0 .and. neckingphase(i)==0) then
-              totstress=totstress+stress(i)*Vf(i)
-            end if
-          end do
-          totstrain=tot_shear_strain
+    totstress=0.0d0
+    totstrain=0.0d0
 
-!          totstrain=0d0
-!          do i=1,no_phase_calc,1
-!            totstrain=totstrain+dstrain(i)
-!          end do
+    if(isowork==1) then
+      do i=1,no_phase_calc,1
+        if(Vf(i) > 0.0d0 .and. neckingphase(i)==0) then
+          totstress=totstress+stress(i)*Vf(i)
+          totstrain=totstrain+dstrain(i)*Vf(i)
         end if
+      end do
+    else if(isowork==0) then
+      do i=1,no_phase_calc,1
+        if(Vf(i)>0.0d0 .and. neckingphase(i)==0) then
+          totstress=totstress+stress(i)*Vf(i)
+        end if
+      end do
+      totstrain=tot_shear_strain
 
-        totstress=totstress*Tfactor
-        totstrain=totstrain/Tfactor
+!      totstrain=0d0
+!      do i=1,no_phase_calc,1
+!        totstrain=totstrain+dstrain(i)
+!      end do
+    end if
 
+    totstress=totstress*Tfactor
+    totstrain=totstrain/Tfactor
 
-        WTN=WTN+totstress*(totstrain-totstrain_p)
-        stress_strain(2*foritergor-1)=totstrain*100d0
-        stress_strain(2*foritergor)=totstress
-!print*, foritergor,2*foritergor,stress_strain(2*foritergor-1),stress_strain(2*foritergor)
 
-        if(isnan(totstrain) .or. isnan(totstress)) goto 1979
+    WTN=WTN+totstress*(totstrain-totstrain_p)
+    stress_strain(foritergor,1)=totstrain*100d0
+    stress_strain(foritergor,2)=totstress
 
-        do i=1,no_phase_calc
-          dsdsphase(i)=(stress(i)*Tfactor-pphasestress(i)) &
-                      /(dstrain(i)/Tfactor-pphasestrain(i))
+    if(isnan(totstrain) .or. isnan(totstress)) exit
 
-          pphasestress(i)=stress(i)*Tfactor
-          pphasestrain(i)=dstrain(i)/Tfactor
-        end do
+    do i=1,no_phase_calc
+      dsdsphase(i)=(stress(i)*Tfactor-pphasestress(i)) &
+                  /(dstrain(i)/Tfactor-pphasestrain(i))
 
-        dsds=(totstress-totstress_p)/(totstrain-totstrain_p)
+      pphasestress(i)=stress(i)*Tfactor
+      pphasestrain(i)=dstrain(i)/Tfactor
+    end do
 
-!        if(dsds <= totstress .and. necking==0) then
-!        if(dsds <= 0 .and. necking==0) then
-!          necking=1
-!          goto 1979
-!        end if
+    dsds=(totstress-totstress_p)/(totstrain-totstrain_p)
 
-        if(abs(dsds-totstress) < nkdiff) then
-          necking_strength=dsds
-          necking_strain=totstrain
-          nkdiff=abs(dsds-totstress)
-        end if
+!    if(dsds <= totstress .and. necking==0) then
+!    if(dsds <= 0 .and. necking==0) then
+!      necking=1
+!      goto 1979
+!    end if
 
-        totstress_p=totstress
-        totstrain_p=totstrain
+    if(necking_stop==1 .and. dsds <= totstress) then
+      necking=1
+      exit
+    end if
 
-      end do
+    if(strain_limit > 0d0 .and. totstrain*100d0 > strain_limit) exit
 
-1979 continue
-  end do
+    if(abs(dsds-totstress) < nkdiff) then
+      necking_strength=dsds
+      necking_strain=totstrain
+      nkdiff=abs(dsds-totstress)
+    end if
 
+    totstress_p=totstress
+    totstrain_p=totstrain
+
+  end do
 
   return
 
 end subroutine
 
-
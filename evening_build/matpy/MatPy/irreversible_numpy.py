@@ -0,0 +1,176 @@
+"""
+Irreversible Thermodynamics (NumPy)
+***********************************
+
+A pure NumPy port of the dislocation density model in
+irreverisble.f90 (by Dr. Sheng-Yen Li), for machines where
+the Fortran extension cannot be compiled.
+
+It provides the same functions, with the same arguments and
+outputs, as the compiled *irreverisble* module, so either one
+can be used by irreversible_stressstrain (see *set_engine()*).
+Instead of integrating one curve after another, every timestep
+advances all of the requested curves together as arrays, which
+makes it fast when a whole population of parameter sets is scored.
+"""
+
+"""Basic libs"""
+import numpy as np
+
+"""Same constants as the Fortran model"""
+maxiterstep = 20000
+
+KB = 1.3806488e-23
+alpha = 0.25
+Tfactor = 3.06          # Taylor Factor
+burgers = 2.5e-10       # magnitude of burgers vector
+vibfreq = 1.0e+13
+SR = 1e-3               # strain rate of the tensile test
+delta_strain = 1e-4
+
+"""Ni-gamma"""
+density0 = 1.0e+12
+gsize = 20.0e-6
+lumda = 1.5e-7
+nmax = 4.0
+
+def integrate_curves(p_stress, ss_stress, Tsam, M_para, strain_limit=0, necking_stop=0):
+    """
+    Integrates one stress-strain curve per row of M_para ([C, Gact] pairs), every curve with
+    its own precipitate stress, solid solution stress and temperature.
+
+    Returns the curves as a (curves x maxiterstep x 2) array of [strain, stress] rows that is zero
+    padded after the last step of every curve, the number of steps of every curve and the work (WTN)
+    of every curve. A curve stops when it becomes NaN, after its first step past strain_limit (if
+    strain_limit > 0) or once it necks (if necking_stop is 1), exactly like integrate_curve in the Fortran model.
+    """
+
+    M_para = np.atleast_2d(np.asarray(M_para, dtype=float))
+    no_curves = len(M_para)
+
+    p_stress, ss_stress, Tsam = [np.asarray(value, dtype=float)*np.ones(no_curves) for value in (p_stress, ss_stress, Tsam)]
+
+    stress_strain = np.zeros((no_curves, maxiterstep, 2))
+    nsteps = np.zeros(no_curves, dtype=int)
+    WTN = np.zeros(no_curves)
+
+    """Per curve constants"""
+    mu_shmodulus = (298.*3./8.)*(1.-0.5*(Tsam-300.)/1673.)*1000.  # input GPa
+    strain_rate = SR*2.5/0.83  # shear strain rate
+
+    C = M_para[:,0]
+    Gact = M_para[:,1]*1.602176565e-19
+    nusrdG = vibfreq*np.exp(-Gact/(KB*Tsam))/strain_rate
+
+    stress_p = p_stress/Tfactor
+    stress_material = ss_stress/Tfactor  # Peierl's + solid solution strengthening
+
+    """
+    The state of the curves that are still being integrated,
+    rows maps them back to their row in the output.
+    """
+    rows = np.arange(no_curves)
+    densityin = density0*np.ones(no_curves)
+    totstress_p = np.zeros(no_curves)
+    work = np.zeros(no_curves)
+
+    """Every curve has the same strains"""
+    dstrain = 0.
+    totstrain_p = 0.
+
+    with np.errstate(all='ignore'):
+
+        for step in xrange(1, maxiterstep+1):
+
+            tot_shear_strain = step*delta_strain
+
+            """iso-strain, the strain increments accumulate like dstrain_pre does in Fortran"""
+            dstrain = delta_strain + dstrain
+
+            stress_b = mu_shmodulus*burgers*nmax*(1.0-np.exp(-lumda*dstrain/(burgers*nmax)))/gsize
+            stress_in = alpha*mu_shmodulus*burgers*np.sqrt(densityin)
+            stress = stress_material + stress_b + np.sqrt(stress_in**2.0 + stress_p**2.0)
+
+            const1 = mu_shmodulus*(burgers**2.0)+stress*burgers/np.sqrt(densityin)
+
+            k1 = const1*nusrdG*densityin
+            k2 = 0.5*C*alpha*mu_shmodulus*(burgers**2.0)-const1
+
+            delta_density = delta_strain*(k1 - np.sqrt(stress_in**2.0 + stress_p**2.0)) / k2
+            densityin = densityin+delta_density
+
+            totstress = stress*Tfactor
+            totstrain = tot_shear_strain/Tfactor
+
+            work = work+totstress*(totstrain-totstrain_p)
+            stress_strain[rows,step-1,0] = totstrain*100.
+            stress_strain[rows,step-1,1] = totstress
+
+            dsds = (totstress-totstress_p)/(totstrain-totstrain_p)
+
+            """Curves that stop at this step"""
+            stop = np.isnan(totstress)
+
+            if necking_stop == 1:
+                stop = np.logical_or(stop, dsds <= totstress)
+
+            if strain_limit > 0 and totstrain*100. > strain_limit:
+                stop[:] = True
+
+            if stop.any():
+
+                nsteps[rows[stop]] = step
+                WTN[rows[stop]] = work[stop]
+
+                keep = np.logical_not(stop)
+                rows = rows[keep]
+
+                C, nusrdG, mu_shmodulus, stress_p, stress_material = C[keep], nusrdG[keep], mu_shmodulus[keep], stress_p[keep], stress_material[keep]
+                densityin, work, totstress = densityin[keep], work[keep], totstress[keep]
+
+                if len(rows) == 0:
+                    break
+
+            totstress_p = totstress
+            totstrain_p = totstrain
+
+    """Curves that ran for every step"""
+    nsteps[rows] = maxiterstep
+    WTN[rows] = work
+
+    return stress_strain, nsteps, WTN
+
+def integrate_curve(p_stress, ss_stress, Tsam, M_para, strain_limit, necking_stop):
+    """Integrates a single curve, returning it zero padded, with its number of steps and its work (WTN)."""
+
+    stress_strain, nsteps, WTN = integrate_curves(p_stress, ss_stress, Tsam, [M_para], strain_limit, necking_stop)
+
+    return stress_strain[0], nsteps[0], WTN[0]
+
+def mechanics_batch(p_stress, ss_stress, Tsam, M_para, curves=None, strain_limit=0, necking_stop=0):
+    """One curve per row of M_para, like mechanics_batch in the Fortran model."""
+
+    return integrate_curves(p_stress, ss_stress, Tsam, M_para, strain_limit, necking_stop)
+
+def mechanics_samples(p_stress, ss_stress, Tsam, M_para, samples=None, strain_limit=0, necking_stop=0):
+    """One curve per sample, all with the same [C, Gact], like mechanics_samples in the Fortran model."""
+
+    samples = len(np.atleast_1d(p_stress))
+
+    return integrate_curves(p_stress, ss_stress, Tsam, np.tile(np.asarray(M_para, dtype=float), (samples,1)), strain_limit, necking_stop)
+
+def mechanics(p_stress, ss_stress, Tsam, M_para, samples=None):
+    """
+    The original entry point of the Fortran model: every sample is written into
+    the same flat [strain, stress, strain, stress, ...] buffer, a NaN ends only the curve
+    of its sample, and the work (WTN) of the last sample is returned.
+    """
+
+    curves, nsteps, WTN = mechanics_samples(p_stress, ss_stress, Tsam, M_para)
+
+    stress_strain = np.zeros(2*maxiterstep)
+
+    for curve, steps in zip(curves, nsteps):
+        stress_strain[:2*steps] = curve[:steps].ravel()
+
+    return stress_strain, WTN[-1]
@@ -3,27 +3,161 @@ This class contains the irreversible themodynamics model.
 """
 
 """Used to format data"""
+import os
+import timeit
+import hashlib
+import threading
 import numpy as np
-from DataModelDict import DataModelDict as dmd
+import mat_data_parser
 
-"""Used to compile Fortran"""
-import subprocess
+"""Loads the compiled Fortran model (compiling it only when the source changed), and its NumPy port for when it cannot be compiled"""
+import fortran_build
+import irreversible_numpy
+import mechanics_cache
 
-""" Compiles the Fortran code """
-bashCommand = "make fortran"
-process = subprocess.Popen(bashCommand.split(), stdout=subprocess.PIPE)
+"""If the Fortran model cannot be loaded, fortran_error says why"""
+fortran_error = None
 
-"""Importing the just-compiled irreversible thermo model"""
-import irreverisble 
+try:
+	irreverisble = fortran_build.load_extension()
+except (fortran_build.BuildError, ImportError) as error:
+	irreverisble = None
+	fortran_error = str(error)
+
+"""The modules that can integrate the model, engine is the one in use"""
+engines = {'numpy': irreversible_numpy}
+
+if irreverisble is not None:
+	engines['fortran'] = irreverisble
+
+engine = engines.get('fortran', irreversible_numpy)
+
+def set_engine(name):
+	"""
+	Chooses how the model is integrated: 'fortran' uses the compiled irreverisble.f90,
+	'numpy' uses the NumPy port, which needs no compiler and advances many parameter
+	sets at once (see irreversible_numpy). Both give the same curves.
+	"""
+	
+	global engine
+	
+	if name == 'fortran' and fortran_error is not None:
+		raise ValueError("The fortran engine is not available: " + fortran_error)
+	
+	if name not in engines:
+		raise ValueError("The {0} engine is not available, choose one of {1}".format(name, sorted(engines.keys())))
+	
+	engine = engines[name]
+
+"""The identities of the engines, worked out once (see model_identity)"""
+identities = {}
+
+def model_identity():
+	"""
+	Names the engine in use along with a hash of its source, e.g. 'fortran-<hash of irreverisble.f90>',
+	so results saved from the model (cached curves, error surfaces) are not mistaken for those of another
+	engine, or of the model before its source changed.
+	"""
+	
+	name = [key for key, module in engines.items() if module is engine]
+	name = name[0] if name else getattr(engine, '__name__', 'engine')
+	
+	if name not in identities:
+		
+		if name == 'fortran':
+			digest = fortran_build.source_hash()
+		
+		else:
+			with open(os.path.splitext(engine.__file__)[0]+'.py', 'rb') as source:
+				digest = hashlib.sha1(source.read()).hexdigest()
+		
+		identities[name] = name+'-'+digest
+	
+	return identities[name]
+
+"""The engine timer running on each thread, if any (see EngineTimer)"""
+engine_timers = threading.local()
+
+class EngineTimer:
+	"""
+	Times every call into the engine made by one thread while it runs (from start() to stop()),
+	so the time spent integrating the model can be told apart from the time spent in Python
+	(see optimization_suite.measure), and counts the parameter sets integrated. Other threads
+	and the engine itself are left alone.
+	"""
+
+	def __init__(self):
+
+		self.time = 0.
+		self.calls = 0
+		self.evaluations = 0
+		self.previous = None
+
+	def start(self):
+
+		self.previous = getattr(engine_timers, 'timer', None)
+		engine_timers.timer = self
+
+		return self
+
+	def stop(self):
+
+		engine_timers.timer = self.previous
+
+def call_engine(name, evaluations, *args, **kwargs):
+	"""Calls a function of the engine in use, which integrates that many parameter sets, timing it if this thread is running an EngineTimer."""
+
+	function = getattr(engine, name)
+	timer = getattr(engine_timers, 'timer', None)
+
+	if timer is None:
+		return function(*args, **kwargs)
+
+	start = timeit.default_timer()
+
+	try:
+		return function(*args, **kwargs)
+
+	finally:
+		timer.time += timeit.default_timer()-start
+		timer.calls += 1
+		timer.evaluations += evaluations
+
+"""Remembers simulated curves, so parameter sets that were already evaluated are not integrated again"""
+cache = mechanics_cache.MechanicsCache()
+
+def set_cache(max_megabytes=64, decimals=None, directory=None):
+	"""
+	Replaces the cache of simulated curves used by StressStrain.irreversible_model (and so by mcfunc).
+
+	Keyword Arguments:
+	   | max_megabytes - memory the cached curves may use, 0 turns caching off
+	   | decimals - rounds the model parameters and stresses in the cache keys, so nearly identical parameter sets share a curve
+	   | directory - also saves the curves there, so they are available in later sessions
+	"""
+	
+	global cache
+	
+	if max_megabytes == 0:
+		cache = None
+	else:
+		cache = mechanics_cache.MechanicsCache(max_megabytes, decimals, directory)
+	
+	return cache
 
 class StressStrain:
 	
+	# experimental parameters of the test, the same for every simulation of a specimen
+	T_service = 22. + 273.
+	prec_stress = 0
+	
 	# initializes the instance to have some experimental data associated with it
 	def __init__(self,data_file=None,type='txt'):
 				
 		if data_file is None:
 			print "This thermodynamics model doesn't \n currently have experimental data associated with it."
 			self.exp=None
+			self.data_file=None
 			return
 				
 		self.set_experimental_data(data_file,type=type)
@@ -39,108 +173,336 @@ class StressStrain:
 		
 	# this is a separate method so that experimental data can be set after object creation
 	def set_experimental_data(self,data_file,type='txt'):
+		
+		# remembered so results computed for this specimen (e.g. error_surface grids) can be found again
+		self.data_file = data_file
 				
 		if type is 'txt':
-			self.exp = np.loadtxt(data_file)		   # ***** file which contains data	
+			self.exp = mat_data_parser.load(data_file)		   # ***** file which contains data	(or its cached table, see mat_data_parser.load)
 			
 		elif type is 'xml':
 
-			table = dmd(open(data_file, "r")).find('stressStrain')
-			distable = []
-
-			for row in table['rows'].iteraslist('row'):
-				disrow = []
-					
-				for column in row.iteraslist('column'):
-					disrow.append(column['#text'])
-				
-				distable.append(disrow)
-
-			del distable[0] # gets rid of header
-			self.exp = np.array(distable)
+			self.exp = mat_data_parser.load(data_file, type='xml')	# streams the stressStrain table into floats (or loads the cached table)
 	
 	# root means squared used to evaluate magnitude of error
 	def error_evaluation_rms(self, errors):
 		
-		sum_of_squares = 0
-		
-		for error in errors:
-			sum_of_squares = sum_of_squares + error**2
+		errors = np.asarray(errors, dtype=float)
 			
-		return ((sum_of_squares/len(errors))**(1./2.)) #incorporated division by n, which is the proper rms 
+		return np.sqrt(np.sum(errors**2)/len(errors)) #incorporated division by n, which is the proper rms 
 
 	# looks at mechanical properties of material based on the physical model and experimental parameters
 	# minimizes difference between experimental data and physical model
 	# SS_stress is the yield stress
 	def mcfunc(self, model_parameters, SS_stress):
 		
-		no_samples = 1
-		
-		#experimental parameters
 		#SS_stress = 1009.384532 # determined by material_analytics.py
-		T_service = 22. + 273.
-		prec_stress = 0
+		strain_stress = self.irreversible_model(model_parameters, SS_stress, strain_limit=self.strain_limit())
+		
+		cal_val, errors = interpolate_errors(strain_stress, self.exp)
+
+		return self.error_evaluation_rms(errors)
 
-		strain_stress, WTN = irreverisble.mechanics(prec_stress,SS_stress,T_service,model_parameters,no_samples)
-		strain_stress = np.array(np.trim_zeros(strain_stress)).reshape(-1,2)
+	# the original nested-loop version of mcfunc, kept as a reference for the vectorized kernel
+	def mcfunc_classic(self, model_parameters, SS_stress):
 		
-		cal_val = []
-		errors = []
+		strain_stress = self.irreversible_model(model_parameters, SS_stress)
 		
-		# this code, when uncommented, traverses all experimental data points and return their error
-		#traverses experimental data points
-		for iexp, data in enumerate(self.exp[:,0]):
+		cal_val, errors = interpolate_errors_classic(strain_stress, self.exp)
+
+		return self.error_evaluation_rms(errors)
+
+	# the largest experimental strain, past which the model does not need to be integrated to be compared to the data
+	def strain_limit(self):
+		
+		return np.max(np.asarray(self.exp[:,0], dtype=float))
+
+	# returns the predicted stress_strain model for a given input
+	# strain_limit stops the integration after the first step past that strain, necking stops it once the material necks
+	def irreversible_model(self, model_parameters, SS_stress, strain_limit=None, necking=False):
+		
+		#experimental parameters
+		T_service = self.T_service
+		prec_stress = self.prec_stress
+
+		if strain_limit is None:
+			strain_limit = 0
+
+		if cache is not None:
+			key = cache.key(model_parameters, SS_stress, T_service, prec_stress, strain_limit, necking, model_identity())
+			strain_stress = cache.get(key)
 			
-			#finding nearest neighbors that surround the data points, and using them to determine the error
-			for ical, data in enumerate(strain_stress[:,0]):
-				
-				ical = ical-1 # May or may not be advantageous to keep this instead of the range attribute for mem save
-				
-				left_stresspoint = strain_stress[ical,0]
-				right_stresspoint = strain_stress[ical+1,0]
-				
-				exp_datapoint = self.exp[iexp,0]
-				
-				# finding the two nearest stress points and interpolating stress and strain
-				if(exp_datapoint>left_stresspoint and exp_datapoint<right_stresspoint):
-									
-					# stores the differences between the successive approximations so we interpolate
-					left_difference = exp_datapoint-left_stresspoint
-					right_difference = right_stresspoint-exp_datapoint
-					
-					total_difference = left_difference+right_difference
-					
-					left_weight = left_difference/total_difference
-					right_weight = right_difference/total_difference
-					  
-					# interpolate strain based on stress
-					interpolated_stress = left_weight*left_stresspoint + right_weight*right_stresspoint
-					interpolated_strain = left_weight*strain_stress[ical,1] + right_weight*strain_stress[ical+1,1]
-						
-					strain_error = interpolated_strain - self.exp[iexp,1]    
-					
-					#adds value, we want to find difference between these approximated data points and the real results
-					cal_val.append([interpolated_stress,interpolated_strain])                 
-					errors.append(strain_error)
-					
-					break
+			if strain_stress is not None:
+				return strain_stress
 
-		error_rms = self.error_evaluation_rms(errors)    
-		cal_val = np.asarray(cal_val)
+		strain_stress, nsteps, WTN = call_engine('integrate_curve', 1, prec_stress,SS_stress,T_service,model_parameters,strain_limit,int(necking))
+		
+		if cache is not None:
+			return cache.put(key, strain_stress[:nsteps])
+		
+		return strain_stress[:nsteps]
 
-		return error_rms
+	# scores every row of a K x 2 matrix of (C, Gact) pairs with a single call to the Fortran model
+	def mcfunc_batch(self, params_matrix, SS_stress):
+		
+		strain_stress, nsteps, WTN = self.mechanics_batch(params_matrix, SS_stress, strain_limit=self.strain_limit())
+		
+		# every curve is simulated on the same strain steps, the longest one holds all of them
+		longest = np.argmax(nsteps)
+		strains = strain_stress[longest,:nsteps[longest],0]
+		
+		errors, inside = interpolate_errors_batch(strains, strain_stress[:,:nsteps[longest],1], nsteps, self.exp)
+		
+		return np.sqrt(np.sum(np.where(inside, errors, 0)**2, axis=1)/np.sum(inside, axis=1))
 
-        # returns the predicted stress_strain model for a given input
-	def irreversible_model(self, model_parameters, SS_stress):
+	# the gradient of mcfunc by central differences, with every shifted parameter set simulated in a single call to the model
+	# (what minimize gets as jac, see optimization_suite.derivatives)
+	def mcfunc_gradient(self, model_parameters, SS_stress, step=None):
+		
+		x = np.asarray(model_parameters, dtype=float).ravel()
+		h = difference_steps(x, step, order=1)
+		shifts = np.diag(h)
 		
-		no_samples = 1
+		values = self.mcfunc_batch(np.concatenate((x+shifts, x-shifts)), SS_stress)
+		
+		return (values[:len(x)]-values[len(x):])/(2*h)
+
+	# the Hessian of mcfunc by central differences: the parameters themselves, a step either way along every parameter
+	# and the four corners of every pair of parameters are all simulated in a single call to the model
+	def mcfunc_hessian(self, model_parameters, SS_stress, step=None):
+		
+		x = np.asarray(model_parameters, dtype=float).ravel()
+		n = len(x)
+		h = difference_steps(x, step, order=2)
+		shifts = np.diag(h)
+		
+		pairs = [(i, j) for i in xrange(n) for j in xrange(i+1, n)]
+		corners = [x+a*shifts[i]+b*shifts[j] for i, j in pairs for a, b in ((1,1), (1,-1), (-1,1), (-1,-1))]
+		
+		values = self.mcfunc_batch(np.concatenate(([x], x+shifts, x-shifts) + ((np.array(corners),) if corners else ())), SS_stress)
+		
+		centre, forward, backward, corners = values[0], values[1:n+1], values[n+1:2*n+1], values[2*n+1:].reshape(-1, 4)
+		
+		hessian = np.diag((forward-2*centre+backward)/h**2)
+		
+		for (i, j), (plus_plus, plus_minus, minus_plus, minus_minus) in zip(pairs, corners):
+			hessian[i,j] = hessian[j,i] = (plus_plus-plus_minus-minus_plus+minus_minus)/(4*h[i]*h[j])
+		
+		return hessian
+
+	# returns the predicted stress_strain models (one per row of params_matrix) from a single call
+	def irreversible_model_batch(self, params_matrix, SS_stress, strain_limit=None, necking=False):
+		
+		strain_stress, nsteps, WTN = self.mechanics_batch(params_matrix, SS_stress, strain_limit, necking)
+		
+		return [strain_stress[index,:steps] for index, steps in enumerate(nsteps)]
+
+	# predicts one stress_strain curve per sample (e.g. per test temperature) for the same model parameters
+	# SS_stress, T_service and prec_stress can each be a single value or one value per sample
+	def irreversible_model_samples(self, model_parameters, SS_stress, T_service=22.+273., prec_stress=0, strain_limit=None, necking=False):
+		
+		strain_stress, nsteps, WTN = mechanics_samples(model_parameters, SS_stress, T_service, prec_stress, strain_limit, necking)
+		
+		return [strain_stress[index,:steps] for index, steps in enumerate(nsteps)], WTN
+
+	# runs the Fortran model once for many parameter sets, returning zero padded curves and their lengths
+	def mechanics_batch(self, params_matrix, SS_stress, strain_limit=None, necking=False):
+		
+		params_matrix = np.atleast_2d(np.asarray(params_matrix, dtype=float))
+		no_curves = len(params_matrix)
 		
 		#experimental parameters
-		T_service = 22. + 273.
-		prec_stress = 0
+		T_service = self.T_service
+		prec_stress = self.prec_stress
+		
+		if strain_limit is None:
+			strain_limit = 0
+		
+		same = np.ones(no_curves)
+		
+		return call_engine('mechanics_batch', no_curves, prec_stress*same,SS_stress*same,T_service*same,params_matrix,strain_limit=strain_limit,necking_stop=int(necking))
+
+
+def difference_steps(model_parameters, step=None, order=1):
+	"""
+	The finite difference steps of every model parameter, step times its magnitude (or 1 for
+	parameters near zero). By default step balances truncation against rounding errors for
+	central differences: the cube root of the machine precision for first derivatives (order=1)
+	and its fourth root for second derivatives (order=2).
+	"""
+
+	if step is None:
+		step = np.finfo(float).eps**(1./(order+2))
+
+	return step*np.maximum(np.abs(model_parameters), 1.)
+
+def mechanics_samples(model_parameters, SS_stress, T_service=22.+273., prec_stress=0, strain_limit=None, necking=False):
+	"""
+	Runs the Fortran model for every sample with a single call, returning a
+	samples x steps x 2 array of zero padded curves, the number of steps
+	of every curve and the work (WTN) of every sample.
+
+	SS_stress, T_service and prec_stress can each be a single value or one
+	value per sample, so a temperature sweep is just a list of temperatures.
+	If a strain_limit is given, every curve stops after its first step past that
+	strain, and if necking is True, every curve stops once that sample necks.
+	"""
+
+	if strain_limit is None:
+		strain_limit = 0
+
+	prec_stress, SS_stress, T_service = np.broadcast_arrays(*[np.asarray(value, dtype=float).ravel() for value in (prec_stress, SS_stress, T_service)])
+
+	return call_engine('mechanics_samples', len(SS_stress), prec_stress,SS_stress,T_service,np.asarray(model_parameters, dtype=float),strain_limit=strain_limit,necking_stop=int(necking))
+
+def mcfunc_samples(model_parameters, specimens, SS_stress, T_service=22.+273.):
+	"""
+	Fits one set of model parameters to several specimens (e.g. tested at different
+	temperatures) at once.
+
+	specimens is a list of StressStrain instances with experimental data, and
+	SS_stress and T_service give the yield stress and temperature of each of them
+	(or one value for all). All of the curves are simulated with a single call to
+	the Fortran model, and the RMS error over the points of every specimen is returned.
+	"""
+
+	strain_limit = max([specimen.strain_limit() for specimen in specimens])
+	strain_stress, nsteps, WTN = mechanics_samples(model_parameters, np.asarray(SS_stress, dtype=float)*np.ones(len(specimens)), T_service, strain_limit=strain_limit)
+
+	errors = [interpolate_errors(strain_stress[index,:nsteps[index]], specimen.get_experimental_data())[1] for index, specimen in enumerate(specimens)]
+
+	errors = np.concatenate(errors)
+
+	return np.sqrt(np.sum(errors**2)/len(errors))
 
-		strain_stress, WTN = irreverisble.mechanics(prec_stress,SS_stress,T_service,model_parameters,no_samples)
-		return np.array(np.trim_zeros(strain_stress)).reshape(-1,2)
-                
+def interpolate_errors(strain_stress, exp):
+	"""
+	Interpolates the simulated curve at every experimental strain in one pass.
 
+	The simulated strains increase monotonically, so the bracket around each
+	experimental strain is found with a sorted lookup instead of a scan. Only
+	points strictly between two simulated strains are evaluated, and they are
+	weighted exactly as in interpolate_errors_classic, so both return the same
+	interpolated points and errors.
+	"""
+
+	exp = np.asarray(exp, dtype=float)
+	sim_strain = strain_stress[:,0]
+	exp_strain = exp[:,0]
+
+	# first simulated point that is not below each experimental point
+	right = np.searchsorted(sim_strain, exp_strain, side='left')
+
+	# experimental points outside the simulated domain (or on a simulated point) are skipped
+	inside = np.logical_and(right > 0, right < len(sim_strain))
+	inside[inside] = sim_strain[right[inside]] != exp_strain[inside]
+
+	right = right[inside]
+	left = right-1
+	exp_inside = exp[inside]
+
+	left_stresspoint = sim_strain[left]
+	right_stresspoint = sim_strain[right]
+
+	# same weighting as the nearest neighbor loop
+	left_difference = exp_inside[:,0]-left_stresspoint
+	right_difference = right_stresspoint-exp_inside[:,0]
+	total_difference = left_difference+right_difference
+
+	left_weight = left_difference/total_difference
+	right_weight = right_difference/total_difference
+
+	interpolated_stress = left_weight*left_stresspoint + right_weight*right_stresspoint
+	interpolated_strain = left_weight*strain_stress[left,1] + right_weight*strain_stress[right,1]
+
+	errors = interpolated_strain - exp_inside[:,1]
+	cal_val = np.column_stack((interpolated_stress, interpolated_strain))
+
+	return cal_val, errors
+
+def interpolate_errors_batch(strains, stresses, nsteps, exp):
+	"""
+	Interpolates many simulated curves sharing the same strains at every experimental strain at once.
+
+	stresses holds one zero padded curve per row, and nsteps how many of its points are real.
+	Returns a matrix of errors (one row per curve, one column per experimental point inside the
+	simulated strains) and a mask that is False where a curve is too short to reach that point.
+	The errors of every row are the ones interpolate_errors gives for that curve alone.
+	"""
+
+	exp = np.asarray(exp, dtype=float)
+	exp_strain = exp[:,0]
+
+	# the brackets are the same for every curve
+	right = np.searchsorted(strains, exp_strain, side='left')
+
+	inside = np.logical_and(right > 0, right < len(strains))
+	inside[inside] = strains[right[inside]] != exp_strain[inside]
+
+	right = right[inside]
+	left = right-1
+	exp_inside = exp[inside]
+
+	left_difference = exp_inside[:,0]-strains[left]
+	right_difference = strains[right]-exp_inside[:,0]
+	total_difference = left_difference+right_difference
+
+	left_weight = left_difference/total_difference
+	right_weight = right_difference/total_difference
+
+	interpolated_strain = left_weight*stresses[:,left] + right_weight*stresses[:,right]
+
+	errors = interpolated_strain - exp_inside[:,1]
+	reached = right[None,:] < np.asarray(nsteps)[:,None]
+
+	return errors, reached
+
+def interpolate_errors_classic(strain_stress, exp):
+	"""
+	Traverses all experimental data points and returns their interpolated values and errors
+	by scanning the simulated curve for the two nearest neighbors of each point.
+	"""
+
+	exp = np.asarray(exp, dtype=float)
+
+	cal_val = []
+	errors = []
+	
+	#traverses experimental data points
+	for iexp, data in enumerate(exp[:,0]):
 		
+		#finding nearest neighbors that surround the data points, and using them to determine the error
+		for ical, data in enumerate(strain_stress[:,0]):
+			
+			ical = ical-1 # May or may not be advantageous to keep this instead of the range attribute for mem save
+			
+			left_stresspoint = strain_stress[ical,0]
+			right_stresspoint = strain_stress[ical+1,0]
+			
+			exp_datapoint = exp[iexp,0]
+			
+			# finding the two nearest stress points and interpolating stress and strain
+			if(exp_datapoint>left_stresspoint and exp_datapoint<right_stresspoint):
+								
+				# stores the differences between the successive approximations so we interpolate
+				left_difference = exp_datapoint-left_stresspoint
+				right_difference = right_stresspoint-exp_datapoint
+				
+				total_difference = left_difference+right_difference
+				
+				left_weight = left_difference/total_difference
+				right_weight = right_difference/total_difference
+				  
+				# interpolate strain based on stress
+				interpolated_stress = left_weight*left_stresspoint + right_weight*right_stresspoint
+				interpolated_strain = left_weight*strain_stress[ical,1] + right_weight*strain_stress[ical+1,1]
+					
+				strain_error = interpolated_strain - exp[iexp,1]    
+				
+				#adds value, we want to find difference between these approximated data points and the real results
+				cal_val.append([interpolated_stress,interpolated_strain])                 
+				errors.append(strain_error)
+				
+				break
+
+	return np.asarray(cal_val), np.asarray(errors)
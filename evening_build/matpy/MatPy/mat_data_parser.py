@@ -33,13 +33,264 @@ and then rows and columns with data as follows::
 	</row>
     </rows>
 
+XML files are read as a stream (see *read_xml()*), so even very
+large Kolsky bar exports are parsed with little memory, straight
+into an array of floats.
+
+Parsed files can be cached next to them (see *load()*), as a .npy
+file that later loads memory-map instead of parsing the file again.
+
 """
 
 
 """To parse the data"""
-from DataModelDict import DataModelDict as dmd
 import numpy as np
 
+"""For the cache of parsed files"""
+import os
+import json
+import hashlib
+import tempfile
+
+try:
+    import xml.etree.cElementTree as ElementTree
+except ImportError:
+    import xml.etree.ElementTree as ElementTree
+
+"""The columns of a stressStrain table, by name"""
+column_names = {'strain': 0, 'stress': 1, 'strain rate': 2}
+
+def read_xml(data_file, columns=None, skip_rows=1, out=None, capacity=4096):
+    """
+    Reads the stressStrain table of an XML file (a name or an open file) into a float64 array, one row at a time.
+
+    Keyword Arguments:
+       | columns - the columns to keep, by position or by name ('strain', 'stress', 'strain rate'), all of them by default
+       | skip_rows - the rows at the start of the table to leave out (the first one has always been dropped as a header)
+       | out - an array with room for the table to write it into
+       | capacity - the rows to start with when out is not given, doubled whenever they are full
+    """
+
+    if columns is not None:
+        columns = [column_names.get(column, column) for column in columns]
+
+    table = out
+    filled = 0
+    skipped = 0
+
+    in_table = False
+    rows = None
+    values = []
+
+    for event, element in ElementTree.iterparse(data_file, events=('start', 'end')):
+
+        if event == 'start':
+
+            if element.tag == 'stressStrain':
+                in_table = True
+
+            elif in_table and element.tag == 'rows':
+                rows = element
+
+            continue
+
+        if element.tag == 'stressStrain':
+            break
+
+        if rows is None:
+            continue
+
+        if element.tag == 'column':
+            values.append(element.text)
+
+        elif element.tag == 'row':
+
+            if skipped < skip_rows:
+                skipped += 1
+
+            else:
+                if columns is not None:
+                    values = [values[column] for column in columns]
+
+                if table is None:
+                    table = np.empty((capacity, len(values)))
+
+                elif filled == len(table):
+
+                    if out is not None:
+                        raise ValueError("The array given to read_xml has room for {0} rows, {1} has more".format(len(out), data_file))
+
+                    """Growing the array, doubling its size so the copies do not add up"""
+                    table = np.resize(table, (2*len(table), table.shape[1]))
+
+                table[filled] = values
+                filled += 1
+
+            values = []
+
+            """Drops the parsed rows"""
+            rows.clear()
+
+    if table is None:
+        return np.zeros((0, 0 if columns is None else len(columns)))
+
+    return table[:filled]
+
+def read_xml_headers(data_file):
+    """Reads the headers of an XML file (before its stressStrain table) by path, e.g. 'material/sampleName'."""
+
+    headers = {}
+    path = []
+
+    for event, element in ElementTree.iterparse(data_file, events=('start', 'end')):
+
+        if event == 'start':
+
+            if element.tag == 'stressStrain':
+                break
+
+            path.append(element.tag)
+            continue
+
+        """The root element is left out of the paths"""
+        if len(element) == 0 and element.text is not None and element.text.strip() and len(path) > 1:
+            headers['/'.join(path[1:])] = element.text.strip()
+
+        path.pop()
+
+    return headers
+
+"""Set to True to cache every parsed file next to it (see *load()*), by default files are parsed every time"""
+use_cache = False
+
+cache_version = 1
+
+def load(data_file, type='txt', cache=None):
+    """
+    Returns the table of a text or XML file as a float64 array, parsing the file only the first time if cached.
+
+    The cache is opt-in, since it writes next to the data: with it, the parsed table is saved next to the file (data_file.matpy.npy, described by data_file.matpy.json)
+    and memory-mapped by later loads. The cache is used as long as the file has the same modification
+    time and size, or, if those changed, the same SHA-1 hash. If the directory cannot be written to,
+    the file is parsed every time.
+
+    The memory map is copy-on-write: the returned array can be changed like a parsed one, but the changes
+    are not saved.
+
+    Keyword Arguments:
+       | type - 'txt' or 'xml'
+       | cache - whether to use the cache (use_cache by default)
+    """
+
+    if cache is None:
+        cache = use_cache
+
+    if cache:
+        table = read_cache(data_file, type)
+
+        if table is not None:
+            return table
+
+    table = parse(data_file, type)
+
+    if cache:
+        write_cache(data_file, type, table)
+
+    return table
+
+def parse(data_file, type='txt'):
+    """Parses a text or XML file into a float64 array (every column of it)."""
+
+    if type == 'txt':
+        return np.loadtxt(data_file)
+
+    elif type == 'xml':
+        return read_xml(data_file)
+
+    raise ValueError("Unknown file type {0}, choose 'txt' or 'xml'".format(type))
+
+def cache_files(data_file):
+    """The cached table of a file and the description of it."""
+
+    return data_file+'.matpy.npy', data_file+'.matpy.json'
+
+def file_hash(data_file):
+    """The SHA-1 hash of a file, read in blocks."""
+
+    digest = hashlib.sha1()
+
+    with open(data_file, 'rb') as source:
+        for block in iter(lambda: source.read(2**20), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+def describe(data_file, type, digest=None):
+    """What the cache of a file is checked against."""
+
+    status = os.stat(data_file)
+
+    return {'version': cache_version, 'type': type, 'mtime': status.st_mtime, 'size': status.st_size, 'sha1': digest}
+
+def read_cache(data_file, type):
+    """Memory-maps the cached table of a file, or returns None if it is missing or out of date."""
+
+    table_file, description_file = cache_files(data_file)
+
+    try:
+        with open(description_file) as description:
+            cached = json.load(description)
+
+        current = describe(data_file, type)
+
+        if cached['version'] != cache_version or cached['type'] != type or cached['size'] != current['size']:
+            return None
+
+        if cached['mtime'] != current['mtime']:
+
+            """The file was touched or copied, it is only out of date if its contents changed"""
+            if cached['sha1'] != file_hash(data_file):
+                return None
+
+            write_description(data_file, describe(data_file, type, cached['sha1']))
+
+        return np.load(table_file, mmap_mode='c')
+
+    except (IOError, OSError, ValueError, KeyError):
+        return None
+
+def write_cache(data_file, type, table):
+    """Saves the table of a file next to it, or does nothing if that is not possible."""
+
+    table_file, description_file = cache_files(data_file)
+
+    try:
+        """The table is written to a temporary file first, so it never is read half written"""
+        handle, temporary = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(data_file)), suffix='.npy')
+
+        with os.fdopen(handle, 'wb') as output:
+            np.save(output, np.ascontiguousarray(table, dtype=float))
+
+        os.rename(temporary, table_file)
+        write_description(data_file, describe(data_file, type, file_hash(data_file)))
+
+    except (IOError, OSError):
+
+        if 'temporary' in locals() and os.path.exists(temporary):
+            os.remove(temporary)
+
+def write_description(data_file, description):
+    """Saves what the cache of a file is checked against."""
+
+    table_file, description_file = cache_files(data_file)
+
+    handle, temporary = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(data_file)), suffix='.json')
+
+    with os.fdopen(handle, 'w') as output:
+        json.dump(description, output)
+
+    os.rename(temporary, description_file)
+
 class stress_strain:
     """
     This class will contain the relevant data from a file   
@@ -59,25 +310,12 @@ class stress_strain:
     def __init__(self,data_file,type='txt'): 
                 
         if type is 'txt':
-            self.exp = np.loadtxt(data_file)            
+            self.exp = load(data_file)            
             
         elif type is 'xml':
-            """Uses DataModelDict to parse XML"""
-
-            table = dmd(open(data_file, "r")).find('stressStrain')
-            distable = []
-
-            for row in table['rows'].iteraslist('row'):
-                disrow = []
-                    
-                for column in row.iteraslist('column'):
-                    """Adds every column entry for each row"""
-                    disrow.append(column['#text'])
-                
-                distable.append(disrow)
+            """Streams the table into floats (or loads the cached table)"""
 
-            del distable[0] # gets rid of header
-            self.exp = np.array(distable)[:,:2] # disregarding strain rate (only actually does things for our Kolsky bar data)
+            self.exp = load(data_file, type='xml')[:,:2] # disregarding strain rate (only actually does things for our Kolsky bar data)
 
     def get_experimental_data(self):
         """
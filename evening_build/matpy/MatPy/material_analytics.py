@@ -18,10 +18,10 @@ phenomenon as well.
 """Basic libs"""
 import numpy as np
 import math
+import multiprocessing
 from DataModelDict import DataModelDict as dmd
 
 """For optimization and model training"""
-from scipy.optimize import curve_fit
 from sklearn.linear_model import LinearRegression
 from sklearn.cluster import MiniBatchKMeans as mbkmeans
 from sklearn.cluster import KMeans
@@ -34,12 +34,25 @@ def young_modulus(data):
     yielding = yield_stress(data)[0]
 
     """Finds the yield index"""
-    yield_index = 0
-    for index, point in enumerate(data):
+    yield_index = max(point_index(data, yielding), 0)
 
-        if (point == yielding).all():
-            yield_index = index
-            break
+    return elastic_modulus(data, yield_index)
+
+def point_index(data, point):
+    """Returns the index of the first row of data equal to point, or -1 if there is none."""
+
+    found = np.flatnonzero((data == np.ravel(point)).all(axis=1))
+
+    if len(found) == 0:
+        return -1
+
+    return found[0]
+
+def elastic_modulus(data, yield_index):
+    """
+    Given a stress-strain dataset and the index of its yield point, returns Young's Modulus
+    (the slope up to the upper yield point).
+    """
 
     """Finds data in elastic region"""
     elastic = data[:yield_index+1]
@@ -200,6 +213,271 @@ def yield_stress_classic_unfitted(data, cutoff = 0.0, offset = 0.002):
 
     return data[intersect_index][None,]
     
+class StreamingYield:
+    """
+    Finds the offset yield point of a stress-strain curve while it is being recorded, e.g. by a live tensile frame.
+
+    Chunks of [Strain|Stress] rows are given to *update()* as they arrive. Points below the cutoff strain are skipped
+    (like *delete_noise()*), Young's Modulus is the least squares slope of the first elastic_points points after that
+    (unless it is given), and the yield point is the point nearest to where the curve falls below the offset line
+    :math:`\sigma_0 + E(\epsilon-offset)`, as in *yield_stress_classic_unfitted()*. Only that much state is kept,
+    so every chunk costs the same however long the test has been running.
+
+    Keyword Arguments:
+       | offset - the strain offset of the line (0.002 for the 0.2% offset yield point)
+       | cutoff - points with a smaller strain at the start of the curve are noise
+       | modulus - Young's Modulus, if it is known in advance
+       | elastic_points - the number of points Young's Modulus is estimated from
+    """
+
+    def __init__(self, offset = 0.002, cutoff = 0.0, modulus = None, elastic_points = 20):
+
+        self.offset = offset
+        self.cutoff = cutoff
+        self.modulus = modulus
+        self.elastic_points = elastic_points
+
+        """Sums for the least squares slope of the elastic region, and its points until the slope is known"""
+        self.sums = np.zeros(5)
+        self.elastic = []
+
+        self.started = False
+        self.first_stress = None
+        self.previous = None
+        self.points = 0
+
+        self.yieldpoint = None
+
+    def update(self, chunk):
+        """
+        Takes the next rows of the curve, and returns the yield point (as a single row, like the other detectors)
+        if it was crossed in them, otherwise None. Once found, the yield point is also kept as *yieldpoint*.
+        """
+
+        chunk = np.asarray(chunk, dtype=float)[:,:2]
+        self.points += len(chunk)
+
+        if self.yieldpoint is not None or len(chunk) == 0:
+            return None
+
+        """Skipping the noise at the start of the curve"""
+        if not self.started:
+            start = np.flatnonzero(chunk[:,0] >= self.cutoff)
+
+            if len(start) == 0:
+                return None
+
+            self.started = True
+            chunk = chunk[start[0]:]
+            self.first_stress = chunk[0,1]
+
+        """Young's Modulus is estimated from the first points, which are then checked like the rest"""
+        if self.modulus is None:
+            needed = self.elastic_points-int(self.sums[0])
+            elastic, chunk = chunk[:needed], chunk[needed:]
+
+            strain, stress = elastic[:,0], elastic[:,1]
+            self.sums += [len(elastic), strain.sum(), stress.sum(), (strain*strain).sum(), (strain*stress).sum()]
+            self.elastic.append(elastic)
+
+            if self.sums[0] < self.elastic_points:
+                return None
+
+            n, sx, sy, sxx, sxy = self.sums
+            self.modulus = (n*sxy-sx*sy)/(n*sxx-sx*sx)
+
+            chunk = np.concatenate(self.elastic+[chunk])
+            self.elastic = []
+
+        return self.cross(chunk)
+
+    def cross(self, chunk):
+        """Looks for the first point of the chunk below the offset line, keeping the last point for the next chunk."""
+
+        if len(chunk) == 0:
+            return None
+
+        difference = chunk[:,1] - (self.first_stress + self.modulus*(chunk[:,0]-self.offset))
+        below = np.flatnonzero(difference <= 0)
+
+        if len(below) == 0:
+            self.previous = (chunk[-1], difference[-1])
+            return None
+
+        index = below[0]
+
+        """The point nearest to the crossing is either the first one below the line or the one before it"""
+        if index > 0:
+            before = (chunk[index-1], difference[index-1])
+
+        else:
+            before = self.previous
+
+        if before is not None and abs(before[1]) < abs(difference[index]):
+            self.yieldpoint = before[0][None,:].copy()
+
+        else:
+            self.yieldpoint = chunk[index][None,:].copy()
+
+        return self.yieldpoint
+
+def kmeans_yield(data):
+    """Splits the data into two clusters (see *kmeanssplit()*) and returns the first point of the plastic one as the yield point."""
+
+    elastic, plastic = kmeanssplit(data)
+
+    return plastic[0][None,]
+
+"""The yield detectors, by the names yield_stress_batch knows them"""
+yield_methods = {'log': yield_stress, 'fitted': yield_stress_classic_fitted, 'unfitted': yield_stress_classic_unfitted, 'kmeans': kmeans_yield}
+
+def split_curves(curves, lengths=None):
+    """
+    Returns a list of curves given either a list of [Strain|Stress] arrays, or an array
+    of zero padded curves (curves x points x 2) together with the length of every curve.
+    """
+
+    if lengths is None:
+        return [np.asarray(curve) for curve in curves]
+
+    return [curves[index,:length] for index, length in enumerate(lengths)]
+
+def shared_grid(curves):
+    """Returns the strains if every curve is finite and has exactly the same strains, otherwise None."""
+
+    strain = curves[0][:,0]
+
+    for curve in curves:
+
+        if curve.shape != curves[0].shape or not np.array_equal(curve[:,0], strain) or not np.isfinite(curve).all():
+            return None
+
+    return strain
+
+def yield_curve(task):
+    """
+    Finds the yield point, elastic modulus and yield index of one curve.
+
+    The task is (data, method, keywords), where method names one of yield_methods and the keywords
+    are passed on to it. A curve whose yield point cannot be found gets NaNs and the index -1,
+    instead of stopping the other curves.
+    """
+
+    data, method, keywords = task
+
+    try:
+        """The detectors may adjust the data they are given"""
+        yieldpoint = yield_methods[method](data.copy(), **keywords)[0]
+
+    except (ValueError, IndexError, np.linalg.LinAlgError):
+        return np.nan*np.ones(2), np.nan, -1
+
+    index = point_index(data, yieldpoint)
+
+    return yieldpoint, elastic_modulus(data, max(index, 0)), index
+
+def unfitted_shared_grid(strain, stresses, cutoff = 0.0, offset = 0.002):
+    """
+    yield_stress_classic_unfitted for many curves with the same strains (a row of stresses per curve),
+    as whole array operations. Returns the index of the yield point of every curve.
+    Like yield_stress_classic_unfitted, it takes a cutoff but does not use it.
+    """
+
+    curves = np.arange(len(stresses))
+
+    """Determine average slope"""
+    av_slope = (stresses[:,-1]-stresses[:,0])/(strain[-1]-strain[0])
+
+    """Every curve has the same runs between points, so the slopes are found for all of them at once"""
+    run = np.diff(strain)
+    slopes = np.diff(stresses, axis=1)
+    np.divide(slopes, run, out=slopes, where=run!=0)
+    slopes[:,run==0] = 0
+
+    """Determine where slope is closest to average"""
+    bend = np.abs(slopes-av_slope[:,None]).argmin(axis=1)
+
+    """Fitted this offset line to the left side"""
+    young_modulus = (stresses[curves,bend]-stresses[:,0])/(strain[bend]-strain[0])
+    linear_y = stresses[:,0,None] + young_modulus[:,None]*(strain-offset)
+
+    """Find closest point in fitted curve, and the first point in the data with its strain"""
+    intersect_x = strain[np.abs(stresses-linear_y).argmin(axis=1)]
+
+    return np.abs(strain-intersect_x[:,None]).argmin(axis=1)
+
+def modulus_shared_grid(strain, stresses, yield_index):
+    """elastic_modulus for many curves with the same strains (a row of stresses per curve)."""
+
+    curves = np.arange(len(stresses))
+    elastic = np.arange(len(strain)) <= yield_index[:,None]
+
+    """The upper yield point is the first point of the elastic region holding its largest stress (in either column, like np.where does)"""
+    upper_stress = np.where(elastic, stresses, -np.inf).max(axis=1)[:,None]
+    upper_index = (elastic & ((stresses == upper_stress) | (strain == upper_stress))).argmax(axis=1)
+
+    return (stresses[curves,upper_index]-stresses[:,0])/(strain[upper_index]-strain[0])
+
+def yield_stress_batch(curves, lengths=None, method='log', processes=None, **keywords):
+    """
+    Finds the yield points of many specimens in one call.
+
+    Arguments:
+       | curves - a list of [Strain|Stress] arrays, or an array of zero padded curves (curves x points x 2)
+    Keyword Arguments:
+       | lengths - the number of points of every padded curve (None if curves is a list)
+       | method - the detector: 'log' (*yield_stress()*), 'fitted' (*yield_stress_classic_fitted()*), 'unfitted' (*yield_stress_classic_unfitted()*) or 'kmeans' (*kmeans_yield()*)
+       | processes - the size of the worker pool (the number of CPUs by default, 1 works without one)
+       | everything else is passed on to the detector (e.g. cutoff or offset)
+
+    With the 'unfitted' method, curves that share their strains are all worked out together as arrays.
+    Every other case is spread across a pool of workers, one curve at a time.
+
+    Returns the yield points (curves x 2), the elastic moduli (see *elastic_modulus()*) and the
+    index of every yield point in its curve. Curves without a yield get NaNs and the index -1.
+    """
+
+    if method not in yield_methods:
+        raise ValueError("Unknown yield detector {0}, choose one of {1}".format(method, sorted(yield_methods.keys())))
+
+    curves = split_curves(curves, lengths)
+
+    if len(curves) == 0:
+        return np.zeros((0,2)), np.zeros(0), np.zeros(0, dtype=int)
+
+    strain = shared_grid(curves) if method == 'unfitted' else None
+
+    if strain is not None:
+
+        stresses = np.array([curve[:,1] for curve in curves], dtype=float)
+
+        with np.errstate(all='ignore'):
+            indices = unfitted_shared_grid(strain, stresses, **keywords)
+            moduli = modulus_shared_grid(strain, stresses, indices)
+
+        points = np.array([curve[index] for curve, index in zip(curves, indices)], dtype=float)
+
+        return points, moduli, indices
+
+    tasks = [(curve, method, keywords) for curve in curves]
+
+    if processes == 1 or len(curves) == 1:
+        results = map(yield_curve, tasks)
+
+    else:
+        pool = multiprocessing.Pool(processes)
+
+        try:
+            results = pool.map(yield_curve, tasks)
+
+        finally:
+            pool.close()
+            pool.join()
+
+    points, moduli, indices = zip(*results)
+
+    return np.array(points, dtype=float), np.array(moduli, dtype=float), np.array(indices, dtype=int)
+
 def stress_model(data, yielding = None, strain = None):
     """
     Returns a two-element array with the strain value as the first
@@ -214,135 +492,274 @@ def stress_model(data, yielding = None, strain = None):
     
     This effectively constructs a physical model for the stress-strain 
     behavior of any material on-the-fly. If no expected strain value is
-    provided, this function will simply return the physical model function
-    that automatically computes expected stress. This is the preferred use-case 
-    for large datasets where the stress-strain curve will need to be predicted repeatedly,
-    because otherwise the entire model is recalculated each time, which
-    is hugely inefficient.    
+    provided, this function will simply return the physical model
+    (a *StressModel*) that automatically computes expected stress. This is the
+    preferred use-case for large datasets where the stress-strain curve will need
+    to be predicted repeatedly, since every region is only fitted once.
     """
-    if yielding is None:
-        yielding = yield_stress(data)[0]
 
-    """Finds the yield index"""
-    yield_index = 0
-    for index, point in enumerate(data):
-
-        if (point == yielding).all():
-            yield_index = index
-            break
+    model = StressModel(data, yielding)
 
-    """Separates data into plastic and elastic regions"""
-    elastic = data[:yield_index+2]
-    plastic = data[yield_index+1:]
+    """If we should evaluate the function at a point, we'll do so, otherwise we return the function itself"""
+    if strain is None:
+        return model
+        
+    else:
+        return model(strain)
 
+class StressModel:
     """
-    Finds the upper yield point (lower yield point is the *yielding* variable). 
-    We're taking the first element ([0]) because it returns the 
-    first element that meets the criteria in parentheses.
-    
-    It's a two-dimensional array so we have to do this twice.
+    The physical model built by *stress_model()*, with every region fitted once. Called with a strain it returns
+    what the original closure did, called with an array of strains it evaluates all of them (see *evaluate()*).
     """
-    upperyieldpoint_index = np.where(elastic==max(elastic[:,1]))[0][0]
-    upperyieldpoint = elastic[upperyieldpoint_index]
 
-    """We estimate the region until the first upper yield point with a linear model"""
-    lin_elastic_region = elastic[:upperyieldpoint_index+1]
-    
-    """Creating a function that will linearly fit the data"""
-    def lin_elastic_model(x):
-        m = (lin_elastic_region[-1,1]-lin_elastic_region[0,1])/(lin_elastic_region[-1,0]-lin_elastic_region[0,0])
-        return m*x + lin_elastic_region[0,1]
-    
-    """
-    If the upper yield point is the only yield point, 
-    then the material doesn't exhibit the yield point phenomenon.
+    """The regions a strain can fall in"""
+    out_of_range, elastic_region, phenomenon_region, plastic_region = range(4)
 
-    Otherwise, we establish the domain in which the yield point 
-    phenomenon occurs, within which we will be selecting nearest
-    neighbors as a method of approximation. The yield point pheno-
-    menon occurs when there are two distinct yield points, and 
-    that when plastic deformation begins, stress is immediately 
-    relieved.
-    """
-    yieldpointphenom_region = None
-    yieldpointphenom = True
+    def __init__(self, data, yielding = None):
 
-    if upperyieldpoint_index==yield_index:
-        yieldpointphenom = False        
+        if yielding is None:
+            yielding = yield_stress(data)[0]
 
-    if yieldpointphenom:
-        yieldpointphenom_region = [upperyieldpoint_index,yield_index]
+        """Finds the yield index"""
+        yield_index = max(point_index(data, yielding), 0)
 
-    """We must determine which domain contains the strain point requested"""
-    
-    start_yield = upperyieldpoint[0]
+        """Separates data into plastic and elastic regions"""
+        elastic = data[:yield_index+2]
+        plastic = data[yield_index+1:]
 
-    """If we had lists previously, we have an extra dimension we need to get rid of for processing"""
-    if yielding.ndim == 2:
-        yielding = yielding[0]
-    
-    def stress_value(strain):
-    
-        if strain < 0 or strain > max(data[:,0]):
-            
-            """(Out of range)"""
+        """
+        Finds the upper yield point (lower yield point is the *yielding* variable). 
+        We're taking the first element ([0]) because it returns the 
+        first element that meets the criteria in parentheses.
+        """
+        upperyieldpoint_index = np.where(elastic==max(elastic[:,1]))[0][0]
+        upperyieldpoint = elastic[upperyieldpoint_index]
+
+        """We estimate the region until the first upper yield point with a linear model"""
+        lin_elastic_region = elastic[:upperyieldpoint_index+1]
+        self.slope = (lin_elastic_region[-1,1]-lin_elastic_region[0,1])/(lin_elastic_region[-1,0]-lin_elastic_region[0,0])
+        self.intercept = lin_elastic_region[0,1]
+
+        """
+        If the upper yield point is the only yield point, 
+        then the material doesn't exhibit the yield point phenomenon.
+        The yield point phenomenon occurs when there are two distinct yield points, and 
+        that when plastic deformation begins, stress is immediately relieved.
+        """
+        self.yieldpointphenom = upperyieldpoint_index != yield_index
+
+        self.start_yield = upperyieldpoint[0]
+        self.max_strain = max(data[:,0])
+
+        """If we had lists previously, we have an extra dimension we need to get rid of for processing"""
+        self.yielding = np.ravel(yielding)
+
+        """
+        Within the yield point phenomenon we pick the first point (in the order of the data) past the strain.
+        The running maximum of their strains tells where that point is for any strain.
+        """
+        self.phenomenon_points = elastic[np.where(np.logical_and(elastic[:,0] >= self.start_yield, elastic[:,0] < self.yielding[0]))]
+        self.phenomenon_reach = np.maximum.accumulate(self.phenomenon_points[:,0])
+
+        """We fit a logarithmic curve to approximate the plastic region"""
+        bestfit, self.plastic_params, covariance = log_approx(plastic, full_output=True)
+
+    def regions(self, strains):
+        """Returns the region (see the class attributes) every strain falls in."""
+
+        strains = np.asarray(strains, dtype=float)
+        regions = np.empty(strains.shape, dtype=int)
+
+        regions.fill(self.plastic_region)
+        if self.yieldpointphenom:
+            regions[strains < self.yielding[0]] = self.phenomenon_region
+        regions[strains < self.start_yield] = self.elastic_region
+
+        with np.errstate(invalid='ignore'):
+            regions[np.logical_not((strains >= 0) & (strains <= self.max_strain))] = self.out_of_range
+
+        return regions
+
+    def stresses(self, strains):
+        """The stress at every strain in an array, NaN where it is out of range (the array model protocol, see *samplepoints()*)."""
+
+        return self.evaluate(strains)[:,1]
+
+    def neighbours(self, strains):
+        """The index of the first yield point phenomenon point past every strain (their number if there is none)."""
+
+        return np.searchsorted(self.phenomenon_reach, strains, side='right')
+
+    def evaluate(self, strains):
+        """
+        Returns [strain, stress] for every strain in an array, with NaN rows for strains out of range.
+        Past the last point of the yield point phenomenon, that point itself is returned, like the original closure did.
+        """
+
+        strains = np.ravel(np.asarray(strains, dtype=float))
+        regions = self.regions(strains)
+
+        values = np.empty((len(strains),2))
+        values[:,0] = strains
+
+        elastic = regions == self.elastic_region
+        values[elastic,1] = self.slope*strains[elastic] + self.intercept
+
+        plastic = regions == self.plastic_region
+        with np.errstate(all='ignore'):
+            values[plastic,1] = self.plastic_params[0]*np.log(strains[plastic]) + self.plastic_params[1]
+
+        phenomenon = np.flatnonzero(regions == self.phenomenon_region)
+
+        if len(phenomenon) and len(self.phenomenon_points):
+            neighbours = self.neighbours(strains[phenomenon])
+            beyond = neighbours == len(self.phenomenon_points)
+
+            values[phenomenon,1] = self.phenomenon_points[np.minimum(neighbours, len(self.phenomenon_points)-1),1]
+            values[phenomenon[beyond]] = self.phenomenon_points[-1]
+
+        elif len(phenomenon):
+            values[phenomenon] = np.nan
+
+        values[regions == self.out_of_range] = np.nan
+
+        return values
+
+    def __call__(self, strain):
+
+        if np.ndim(strain) > 0:
+            return self.evaluate(strain)
+
+        value = self.evaluate([strain])[0]
+        region = self.regions(strain)
+
+        if region == self.out_of_range:
             return np.nan
-        
-        elif strain < start_yield:
 
-            """Linear approximation (elastic region)"""
-            return [strain, lin_elastic_model(strain)]
+        if region == self.elastic_region:
+            return [strain, value[1]]
 
-        elif yieldpointphenom and strain >= start_yield and strain < yielding[0]:
-            
-            """Picks the nearest neighbor in this zone"""
-            yieldpoints_inregion = elastic[np.where(np.logical_and(elastic[:,0] >= start_yield, elastic[:,0] < yielding[0]) )]
+        if region == self.phenomenon_region and self.neighbours(strain) < len(self.phenomenon_points):
+            return [strain, value[1]]
 
-            """As soon as we find a neighbor, we return its value"""
-            for val in yieldpoints_inregion:
-                if val[0] > strain:
-                    return [strain,val [1]]
-            
-            return yieldpoints_inregion[-1]
-            
-        elif not yieldpointphenom or strain >= yielding[0]:
-               
-            """We fit a logarithmic curve to approximate the plastic region"""
-            plastic_reg = log_approx(plastic)
-            return np.array([strain,plastic_reg(strain)])
-            
-    """If we should evaluate the function at a point, we'll do so, otherwise we return the function itself"""
-    if strain is None:
-        return stress_value
-        
-    else:
-        return stress_value(strain)
-                 
+        return value
 
-def log_approx(model):
+def log_approx(model, weights=None, full_output=False):
     """
     Given a dataset with two columns,
     this function returns the logarithmic
     function that best fits that data.
-    """
-    
-    """a and c are parameters"""
-    def fit(x, a, c):
-        return a*np.log(x)+c
 
-    strain = model[:,0]
-    stress = model[:,1]
+    The model :math:`a \log(x)+c` is linear in a and c, so it is fitted by linear least squares
+    (see *log_fit_batch()*), optionally weighting every point. With full_output=True, the parameters
+    [a, c] and their covariance are returned after the function.
+    """
 
-    """We are fitting a logarithmic curve as closely as possible to the dataset"""
-    optimal_params, cov_matrix = curve_fit(fit,strain,stress)
-    a, c = optimal_params
+    weights = None if weights is None else np.asarray(weights)[None,:]
+    params, covariance = log_fit_batch(model[None,:,0], model[None,:,1], weights)
 
     """The fitted version of the fit function"""
-    def bestfit(x):
-        return a*np.log(x)+c
-        
+    bestfit = LogModel(*params[0])
+
+    if full_output:
+        return bestfit, params[0], covariance[0]
+
     return bestfit
 
+class LogModel:
+    """
+    The fitted logarithmic model :math:`a \log(x)+c` returned by *log_approx()*.
+    It can be called like a function, and follows the array model protocol (see *samplepoints()*).
+    """
+
+    def __init__(self, a, c):
+
+        """a and c are parameters"""
+        self.a = a
+        self.c = c
+
+    def __call__(self, x):
+        return self.a*np.log(x)+self.c
+
+    def stresses(self, strains):
+        """The stress at every strain, -inf at 0 and NaN for negative strains, where the logarithm is not defined."""
+
+        with np.errstate(all='ignore'):
+            return self(np.asarray(strains, dtype=float))
+
+def log_approx_batch(curves, lengths=None, weights=None):
+    """
+    Fits :math:`a \log(x)+c` to many curves at once.
+
+    Arguments:
+       | curves - a list of [Strain|Stress] arrays, or an array of zero padded curves (curves x points x 2)
+    Keyword Arguments:
+       | lengths - the number of points of every padded curve (None if curves is a list)
+       | weights - the weight of every point, shaped like the stresses (a list of arrays for a list of curves)
+
+    Returns the parameters [a, c] of every curve (curves x 2) and their covariances (curves x 2 x 2).
+    """
+
+    curves = split_curves(curves, lengths)
+    longest = max(len(curve) for curve in curves)
+
+    strain, stress, weight = np.ones((len(curves),longest)), np.zeros((len(curves),longest)), np.zeros((len(curves),longest))
+
+    """Padding gets no weight"""
+    for index, curve in enumerate(curves):
+        strain[index,:len(curve)] = curve[:,0]
+        stress[index,:len(curve)] = curve[:,1]
+        weight[index,:len(curve)] = 1. if weights is None else weights[index]
+
+    return log_fit_batch(strain, stress, weight)
+
+def log_fit_batch(strain, stress, weights=None):
+    """
+    The weighted linear least squares fit of :math:`a \log(x)+c` to every row of strain and stress,
+    solved in closed form for all rows together.
+
+    Points whose logarithm is not finite (strains of 0 or less) are left out, as are points with no weight.
+    The covariance is scaled by the residuals, like curve_fit (without absolute_sigma) does, so the
+    weights only need to be relative (they play the part of :math:`1/\sigma^2`).
+
+    Returns the parameters [a, c] of every row and their covariances. Rows with fewer than
+    two distinct strains get NaN parameters, and rows without more points than parameters get an infinite covariance.
+    """
+
+    with np.errstate(all='ignore'):
+        logs = np.log(strain)
+
+    weights = np.ones(np.shape(stress)) if weights is None else np.asarray(weights, dtype=float)
+    weights = np.where(np.isfinite(logs) & np.isfinite(stress), weights*np.ones(np.shape(stress)), 0.)
+
+    logs = np.where(weights > 0, logs, 0.)
+    stress = np.where(weights > 0, stress, 0.)
+
+    with np.errstate(all='ignore'):
+
+        """Centring the logarithms keeps the normal equations well conditioned"""
+        total = weights.sum(axis=1)
+        mean_log = (weights*logs).sum(axis=1)/total
+        centred = logs-mean_log[:,None]
+        spread = (weights*centred**2).sum(axis=1)
+
+        a = (weights*centred*stress).sum(axis=1)/spread
+        c = (weights*stress).sum(axis=1)/total - a*mean_log
+
+        """The residual variance scales the inverse of the normal matrix"""
+        residuals = stress-a[:,None]*logs-c[:,None]
+        degrees = (weights > 0).sum(axis=1)-2
+        variance = np.where(degrees > 0, (weights*residuals**2).sum(axis=1)/degrees, np.inf)
+
+        covariance = np.empty((len(a),2,2))
+        covariance[:,0,0] = 1./spread
+        covariance[:,0,1] = covariance[:,1,0] = -mean_log/spread
+        covariance[:,1,1] = 1./total + mean_log**2/spread
+        covariance *= variance[:,None,None]
+
+    return np.column_stack((a, c)), covariance
+
 def log_prep(model, cutoff = 0.025):
     """
     Makes data ready for logarithmic 
@@ -397,22 +814,124 @@ def midpoint(lst):
     return lst[int(length)/2]
 
 def kmeanssplit(data, numclusters=2):
-    """Clusters the data into groups (k-means) and returns the split data."""
-    
+    """
+    Clusters the data into groups (k-means) and returns the split data.
+
+    Two clusters of strains are found exactly and deterministically (see *two_segment_split()*),
+    any other number of clusters with scikit-learn's KMeans.
+    """
+
+    if numclusters == 2:
+        elastic, plastic, index, cost = two_segment_split(data)
+        return elastic, plastic
+
     return splitdata(data,kcluster(data,numclusters=numclusters).predict(data[:,0][:,None]))
 
+def two_segment_split(data, kind='strain'):
+    """
+    Splits a [Strain|Stress] dataset into two segments at the optimal breakpoint, using prefix sums
+    instead of iterating like k-means does, so the result is always the same.
+
+    Keyword Arguments:
+       | kind - 'strain' finds the two clusters of strains with the least squared distance to their means
+       |        (the global optimum k-means with two clusters looks for), then splits the data where its cluster
+       |        first changes like *splitdata()* does (O(n log n));
+       |        'linear' splits the data (in its order) where two straight lines through stress and strain fit best (O(n))
+
+    Returns the two segments (elastic, plastic), the index of the first plastic point and the cost of the split
+    (the sum of squared residuals). If there is nowhere to split, the cost is infinite.
+    """
+
+    if kind == 'strain':
+        index, cost = strain_changepoint(data[:,0])
+
+    elif kind == 'linear':
+        index, cost = linear_changepoint(data[:,0], data[:,1])
+
+    else:
+        raise ValueError("Unknown kind of split {0}, choose 'strain' or 'linear'".format(kind))
+
+    elastic = combine_data(data[:index,0],data[:index,1])
+    plastic = combine_data(data[index:,0],data[index:,1])
+
+    return elastic, plastic, index, cost
+
+def strain_changepoint(strain):
+    """
+    The exact two-cluster k-means of a column of strains: the clusters are contiguous once the strains
+    are sorted, so every possible cut is scored with prefix sums. Returns the index where the cluster of the
+    (unsorted) strains first changes, and the within cluster sum of squares.
+    """
+
+    sort = np.sort(strain.astype(float))
+    centred = sort-sort.mean()
+    points = len(sort)
+
+    """Cuts can only be placed between different strains"""
+    cuts = np.flatnonzero(np.diff(sort) > 0)+1
+
+    if len(cuts) == 0:
+        return 0, np.inf
+
+    sums, squares = np.cumsum(centred)[cuts-1], np.cumsum(centred**2)[cuts-1]
+    total, total_squares = sums[-1]+centred[cuts[-1]:].sum(), squares[-1]+(centred[cuts[-1]:]**2).sum()
+
+    costs = (squares-sums**2/cuts) + ((total_squares-squares)-(total-sums)**2/(points-cuts))
+    best = costs.argmin()
+    cut = cuts[best]
+
+    """Every strain belongs to the cluster whose mean is nearer, like KMeans.predict"""
+    threshold = (sort[:cut].mean()+sort[cut:].mean())/2.
+    predictions = strain > threshold
+
+    changes = np.flatnonzero(predictions != predictions[0])
+
+    return (changes[0] if len(changes) else 0), max(costs[best], 0.)
+
+def linear_changepoint(strain, stress, min_size=2):
+    """
+    The index that splits the points (in their order) into two segments whose least squares lines
+    leave the smallest sum of squared residuals, found with prefix sums. Returns that index and sum.
+    """
+
+    points = len(strain)
+    cuts = np.arange(min_size, points-min_size+1)
+
+    if len(cuts) == 0:
+        return 0, np.inf
+
+    """Centring keeps the sums well conditioned"""
+    x = strain.astype(float)-np.mean(strain)
+    y = stress.astype(float)-np.mean(stress)
+
+    sums = [np.concatenate(([0.], np.cumsum(column))) for column in (np.ones(points), x, y, x*x, x*y, y*y)]
+
+    def residuals(totals):
+        """The sum of squared residuals of the least squares line through points with these sums"""
+
+        n, sx, sy, sxx, sxy, syy = totals
+
+        with np.errstate(all='ignore'):
+            cxx = sxx-sx*sx/n
+            cxy = sxy-sx*sy/n
+            cyy = syy-sy*sy/n
+
+            return np.maximum(np.where(cxx > 0, cyy-cxy*cxy/cxx, cyy), 0.)
+
+    left = [column[cuts] for column in sums]
+    right = [column[-1]-column[cuts] for column in sums]
+
+    costs = residuals(left)+residuals(right)
+    best = costs.argmin()
+
+    return cuts[best], costs[best]
+
 def splitdata(data, predictions):
     """Takes predictions from kmeans clustering and split the table into two groups."""
     
-    initgroup = predictions[0]
-    splitgroup = 0
-
-    for index, val in enumerate(predictions):
-        
-        # as soon as we reach the new group, we have found our dividing point
-        if val != initgroup:
-            splitgroup = index
-            break
+    # as soon as we reach the new group, we have found our dividing point
+    changes = np.flatnonzero(np.asarray(predictions) != predictions[0])
+    splitgroup = changes[0] if len(changes) else 0
         
     """Instead of creating tuples, we create lists"""
     elastic = combine_data(data[:splitgroup,0],data[:splitgroup,1]) 
@@ -429,18 +948,39 @@ def predictlinear(data, step = 0.5):
     
     return combine_data(x_pred,y_pred)
 
-def samplepoints(function, interval, numpoints):
-    """Given a function and an interval (two-element list) and a number of points, applies it to the function and gets sample points at even intervals."""
+def samplepoints(function, interval, numpoints, out=None):
+    """
+    Given a function and an interval (two-element list) and a number of points, applies it to the function and gets sample points at even intervals.
+
+    Fitted models (*LogModel*, *StressModel*) follow the array model protocol: their stresses() method takes an
+    array of strains and returns the stress at each of them, NaN where the model is out of range. They are sampled
+    in one call. Other functions are either called with the whole array of strains, or, if they return [strain, stress]
+    lists, once per strain. Either way the points stop before the first NaN.
+
+    The points are written into out (an array with two columns and at least numpoints rows) if it is given.
+    """
 
     x_dom = np.linspace(interval[0],interval[1],numpoints)
 
+    if out is None:
+        out = np.empty((numpoints,2))
+
+    if hasattr(function, 'stresses'):
+
+        nums = combine_data(x_dom, function.stresses(x_dom), out=out)
+
+        """Out of range points are NaN, the points up to the first of them are returned (a view of out)"""
+        failed = np.flatnonzero(np.isnan(nums[:,1]))
+
+        return nums[:failed[0]] if len(failed) else nums
+
     """
     If the function returns lists, then we have to convert them to numpy arrays
     This is necessary for our statistical model prediction method.
     """
     if isinstance(function(0), list):
 
-        nums = np.zeros(2)
+        count = 0
 
         """We convert to numpy arrays"""
         for val in x_dom:
@@ -452,14 +992,14 @@ def samplepoints(function, interval, numpoints):
             """
             if np.isnan(nextval).any():
                 break
-            
-            nums = np.vstack((nums, nextval[None,:]))
 
-        """Ignoring the first element which is 2 zeros (needed for size consistency when stacking)"""    
-        return nums[1:]
+            out[count] = nextval
+            count += 1
+
+        return out[:count]
 
     else:
-        return combine_data(x_dom,function(x_dom))
+        return combine_data(x_dom,function(x_dom),out=out)
 
 def linfit(data, start=None):
     """Fits a linear regression to the data and returns it."""
@@ -481,10 +1021,19 @@ def format_data(data, start=None):
     
     return (expToTrain(data, start),data[start:,1])
     
-def combine_data(data1,data2):
-    r"""Given two arrays, returns a combined list where each element is :math:`x_i,y_i`."""
+def combine_data(data1,data2,out=None):
+    r"""Given two arrays, returns a combined list where each element is :math:`x_i,y_i`, written into out if it is given."""
+
+    length = min(len(data1),len(data2))
+
+    if out is None:
+        out = np.empty((length,2), dtype=np.result_type(np.asarray(data1[:0]),np.asarray(data2[:0])))
+
+    out = out[:length]
+    out[:,0] = data1[:length]
+    out[:,1] = data2[:length]
 
-    return np.array([list(a) for a in zip(data1,data2)])
+    return out
 
 def regularize(data):
     """Converts every non-numerical list value to zero which is useful for analysis later."""
@@ -495,32 +1044,31 @@ def regularize(data):
         
     return data
     
-def get_slopes(model):
+def get_slopes(model, out=None):
     """
     Takes the approximate derivative of a two-column dataset by taking slopes between all of the points.
 
     The data should be formatted
-    [x,y] for each row.
+    [x,y] for each row. The slopes are written into out if it is given.
     """
-    
+
     strain = model[:,0]
     stress = model[:,1]
 
-    slopes = []
+    if out is None:
+        out = np.empty(max(len(stress)-1,0))
 
-    """Approximating the partial derivatives of stress/strain"""
-    for index in xrange(len(stress)-1):
+    out = out[:max(len(stress)-1,0)]
 
-        rise = (stress[index+1]-stress[index])
-        run = (strain[index+1]-strain[index])
+    """Approximating the partial derivatives of stress/strain, the runs are the only temporary array"""
+    run = np.subtract(strain[1:], strain[:-1])
+    np.subtract(stress[1:], stress[:-1], out=out)
 
-        if run==0:
-            slopes.append(0)
-
-        else:
-            slopes.append(rise/run)
+    flat = run==0
+    np.divide(out, run, out=out, where=np.logical_not(flat))
+    out[flat] = 0
 
-    return np.array(slopes)
+    return out
 
 def expToTrain(exp,start=None):
     """Converts a bunch of individual domain values to lists, because each domain value must be iterable for training data."""
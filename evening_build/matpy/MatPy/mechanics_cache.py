@@ -0,0 +1,138 @@
+"""
+Mechanics Cache
+***************
+
+Remembers the stress-strain curves simulated by the irreversible
+thermodynamics model, so an optimizer (or the GUI) that asks for the
+same model parameters again gets the curve without another integration.
+
+Curves are kept in memory up to a size limit, dropping the least recently
+used ones first, and can also be saved to a directory so they are still
+available in later sessions. Keys can be rounded (see *decimals*) so that
+nearly identical parameter sets share a curve.
+"""
+
+"""Basic libs"""
+import os
+import hashlib
+import tempfile
+import numpy as np
+from collections import OrderedDict
+
+class MechanicsCache:
+    """
+    A least recently used cache of simulated curves.
+
+    Keyword Arguments:
+       | max_megabytes - how much memory the cached curves may take up
+       | decimals - the number of decimals the model parameters and stresses are rounded to in the key (None keeps them exact)
+       | directory - if given, every curve is also saved there as a .npy file and loaded from there when it is not in memory
+    """
+
+    def __init__(self, max_megabytes=64, decimals=None, directory=None):
+
+        self.max_bytes = int(max_megabytes*2**20)
+        self.decimals = decimals
+        self.directory = directory
+
+        self.curves = OrderedDict()
+        self.nbytes = 0
+
+        self.hits = 0
+        self.misses = 0
+
+        if directory is not None and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def key(self, model_parameters, SS_stress, T_service, prec_stress=0, strain_limit=0, necking=False, model=''):
+        """
+        Returns the key of a simulation, rounding the parameters and stresses if decimals was given.
+        model identifies the model that simulates it (see irreversible_stressstrain.model_identity), so curves saved
+        by another engine, or before the model changed, are never returned.
+        """
+
+        values = np.concatenate((np.ravel(model_parameters), [SS_stress, T_service, prec_stress])).astype(float)
+
+        if self.decimals is not None:
+            values = np.round(values, self.decimals)
+
+        return tuple(values.tolist()) + (float(strain_limit), bool(necking), str(model))
+
+    def get(self, key):
+        """Returns the cached curve for a key (read only), or None if it has not been simulated yet."""
+
+        curve = self.curves.pop(key, None)
+
+        if curve is None and self.directory is not None and os.path.isfile(self.filename(key)):
+            curve = self.store(key, np.load(self.filename(key)))
+
+        if curve is None:
+            self.misses += 1
+            return None
+
+        """Most recently used curves are at the end"""
+        self.curves[key] = curve
+        self.hits += 1
+
+        return curve
+
+    def put(self, key, curve):
+        """Caches (a read only copy of) a curve and returns that copy."""
+
+        curve = self.store(key, curve)
+
+        if self.directory is not None:
+            self.save(key, curve)
+
+        return curve
+
+    def store(self, key, curve):
+        """Keeps a copy of a curve in memory, dropping the least recently used curves if it is full."""
+
+        curve = np.array(curve, dtype=float)
+        curve.flags.writeable = False
+
+        if key in self.curves:
+            self.nbytes -= self.curves.pop(key).nbytes
+
+        self.curves[key] = curve
+        self.nbytes += curve.nbytes
+
+        while self.nbytes > self.max_bytes and len(self.curves) > 1:
+            oldest_key, oldest = self.curves.popitem(last=False)
+            self.nbytes -= oldest.nbytes
+
+        return curve
+
+    def save(self, key, curve):
+        """Saves a curve, writing a temporary file first so other processes sharing the directory never load it half written."""
+
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix='.npy')
+
+        try:
+            with os.fdopen(handle, 'wb') as output:
+                np.save(output, curve)
+
+            os.rename(temporary, self.filename(key))
+
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    def filename(self, key):
+        """The file a curve is saved to in the cache directory."""
+
+        return os.path.join(self.directory, hashlib.sha1(repr(key).encode('utf-8')).hexdigest()+'.npy')
+
+    def clear(self):
+        """Forgets every curve kept in memory (saved curves stay on disk) and resets the counters."""
+
+        self.curves = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """Returns the number of hits, misses, cached curves and megabytes used."""
+
+        return {'hits': self.hits, 'misses': self.misses, 'curves': len(self.curves), 'megabytes': self.nbytes/2.**20}
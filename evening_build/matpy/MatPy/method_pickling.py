@@ -0,0 +1,27 @@
+"""
+Method Pickling
+***************
+
+Python 2 cannot pickle bound methods, so methods such as StressStrain.mcfunc
+cannot be sent to worker processes (multiprocessing.Pool) as they are.
+*register()* lets pickle send them as their instance and the name of the
+method, which the worker looks up again.
+
+Registrations with copy_reg hold for the whole process, so every module
+that sends bound methods to workers calls *register()* itself instead of
+relying on another module having been imported first.
+"""
+
+"""Pickling"""
+import types
+import copy_reg
+
+def reduce_method(method):
+    """Pickles a bound method as its instance and the name of its function."""
+
+    return getattr, (method.__self__, method.__func__.__name__)
+
+def register():
+    """Lets bound methods be pickled, calling it again does nothing."""
+
+    copy_reg.pickle(types.MethodType, reduce_method)
@@ -11,77 +11,229 @@ algorithmic iterations, and runtime.
 import numpy as np
 
 """Optimization"""
-from scipy.optimize import minimize
-from pybrain.optimization import GA
+from scipy.optimize import minimize, OptimizeResult
 
 """Evaluation"""
+import os
+import sys
+import time
 import timeit
+import threading
+import warnings
 from memory_profiler import memory_usage
 
-def minimize_suite(function, methods, guess, SS_stress=None):
+"""Parallel evaluation, bound methods such as StressStrain.mcfunc are sent to worker processes"""
+import multiprocessing
+import method_pickling
+
+method_pickling.register()
+
+class RunStatistics(OptimizeResult):
+    """
+    The measurements of one optimization run, as a dictionary whose keys can also be read as attributes:
+
+   | name - the method or algorithm
+   | result - what the optimizer returned
+   | iterations - the iterations the optimizer reported (-1 if it did not)
+   | wall_time, cpu_time - seconds spent in the run
+   | peak_memory - the largest increase of the resident memory (megabytes) during the run
+   | calls, time_per_call - how often the objective function was called and its mean runtime in seconds
+   | jac_calls, hess_calls - how often the gradient and Hessian were called (see *derivatives*)
+   | model_evaluations - the parameter sets the model engine integrated, including those of the derivatives (0 if the function does not use the model)
+   | engine_time, python_time - how the wall time splits between integrating the model (Fortran or NumPy engine) and everything else
     """
-    This method takes any method provided by http://docs.scipy.org/doc/scipy/reference/generated/scipy.optimize.minimize.html.
 
-   | This method takes a function, strings representing the method to test it with, and an initial guess for the optimal solution.
-   | Every minimizer in this package is a local optimization algorithm, so it will get trapped in convexities of a dataset.
-   | In running, this function will display the amount of memory, the runtime, and the number of algorithmic iterations required to
-   | achieve an optimal result.
+class CountedFunction:
+    """Wraps an objective function, counting its calls and the time spent in them, and the calls of its derivatives."""
+
+    def __init__(self, function):
+        self.function = function
+        self.calls = 0
+        self.time = 0.
+        self.derivative_calls = {'jac': 0, 'hess': 0}
+
+    def __call__(self, *args, **kwargs):
+        start = timeit.default_timer()
+
+        try:
+            return self.function(*args, **kwargs)
+
+        finally:
+            self.time += timeit.default_timer()-start
+            self.calls += 1
+
+    def batch(self, provider):
+        """Wraps the batched form of the function (one point per row), counting every point as a call."""
+
+        def counted(points, *args, **kwargs):
+            start = timeit.default_timer()
+
+            try:
+                return provider(points, *args, **kwargs)
+
+            finally:
+                self.time += timeit.default_timer()-start
+                self.calls += len(points)
+
+        return counted
+
+    def derivative(self, provider, kind):
+        """Wraps a derivative of the function (kind is 'jac' or 'hess'), counting its calls."""
+
+        def counted(*args, **kwargs):
+            self.derivative_calls[kind] += 1
+            return provider(*args, **kwargs)
+
+        return counted
+
+class PeakMemory(threading.Thread):
+    """Samples the resident memory of this process in the background, keeping the largest value."""
+
+    def __init__(self, interval=.01):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.interval = interval
+        self.running = True
+        self.baseline = max(memory_usage(-1, interval=0))
+        self.peak = self.baseline
+
+    def run(self):
+        while self.running:
+            self.peak = max(self.peak, max(memory_usage(-1, interval=self.interval)))
+
+    def stop(self):
+        self.running = False
+        self.join()
+        self.peak = max(self.peak, max(memory_usage(-1, interval=0)))
+
+        return self.peak-self.baseline
+
+def measure(run, function, name=''):
     """
+    Runs an optimization and measures the run itself: wall and CPU time, the peak memory,
+    the number and mean runtime of objective calls and the time spent integrating the model.
 
-    start = np.zeros(0)
-    stop = np.zeros(0)
-    num_iters = np.zeros(0)
-    most_mem = np.zeros(0)
-    result = []        
+    Arguments:
+       | run - takes the (instrumented) objective function and returns the optimizer's result
+       | function - the objective function
+    Keyword Arguments:
+       | name - the name of the method, kept with the measurements
 
-    # testing every minimization method
-    for method in methods:
-        
-        def iter_minimize(method, num_iters, start, stop, guess):
+    Returns a RunStatistics object.
+    """
 
-            start = np.append(start,timeit.default_timer())
+    counted = CountedFunction(function)
 
-            if SS_stress:
-                cur_result = minimize(function, x0 = guess, args = (SS_stress), method = method, tol=1e-2)
+    """If the irreversible thermodynamics model is in use, the engine calls of this thread are timed as well"""
+    model = sys.modules.get('irreversible_stressstrain')
+    timer = model.EngineTimer() if model is not None else None
 
-            else:
-                cur_result = minimize(function, x0 = guess, method = method, tol=1e-6)
+    memory = PeakMemory()
+    memory.start()
+
+    wall_start = timeit.default_timer()
+    cpu_start = sum(os.times()[:2])
+
+    if timer is not None:
+        timer.start()
+
+    try:
+        result = run(counted)
+
+    finally:
+        if timer is not None:
+            timer.stop()
+
+        wall_time = timeit.default_timer()-wall_start
+        cpu_time = sum(os.times()[:2])-cpu_start
+        peak_memory = memory.stop()
+
+    engine_time = timer.time if timer is not None else 0.
+    model_evaluations = timer.evaluations if timer is not None else 0
 
-            result.append(cur_result)
+    iterations = -1
 
-            keys = cur_result.keys() # contains all traits of result
-            iterations = -1
+    if hasattr(result, 'keys') and 'nit' in result.keys():
+        iterations = result.get('nit')
 
-            # if the number of iterations is contained in the result object
-            if 'nit' in keys:    
-                iterations = cur_result.get('nit')
+    return RunStatistics(name=name, result=result, iterations=iterations, wall_time=wall_time, cpu_time=cpu_time,
+                         peak_memory=peak_memory, calls=counted.calls,
+                         time_per_call=counted.time/counted.calls if counted.calls else np.nan,
+                         jac_calls=counted.derivative_calls['jac'], hess_calls=counted.derivative_calls['hess'],
+                         model_evaluations=model_evaluations, engine_time=engine_time, python_time=wall_time-engine_time)
 
-            num_iters = np.append(num_iters,iterations)
-            stop = np.append(stop,timeit.default_timer())
+def display_statistics(statistics):
+    """Prints the measurements of a run."""
 
-            return num_iters, start, stop
+    print '{0} took {1} seconds ({2} seconds of CPU time), {3} seconds integrating the model and {4} seconds in Python'.format(statistics.name,statistics.wall_time,statistics.cpu_time,statistics.engine_time,statistics.python_time)
+    print '{0} called the function {1} times ({2} seconds per call)'.format(statistics.name,statistics.calls,statistics.time_per_call)
+    print '{0} called the gradient {1} times and the Hessian {2} times, the model integrated {3} parameter sets'.format(statistics.name,statistics.jac_calls,statistics.hess_calls,statistics.model_evaluations)
+    print '{0} used {1} megabytes and took {2} iterations'.format(statistics.name,statistics.peak_memory,statistics.iterations)
 
-        # tracks amount of memory used  by current process (-1) every interval (.2 seconds)
-        current_memory = memory_usage(-1, interval=.2) 
-        
-        most_mem = np.append(most_mem, max(current_memory))
-        num_iters, start, stop = iter_minimize(method, num_iters, start, stop, guess)
+def minimize_suite(function, methods, guess, SS_stress=None, concurrent=False, timeout=None, processes=None, display=True):
+    """
+    This method takes any method provided by http://docs.scipy.org/doc/scipy/reference/generated/scipy.optimize.minimize.html.
+
+   | This method takes a function, strings representing the method to test it with, and an initial guess for the optimal solution.
+   | Besides scipy's methods, 'Genetic Algorithm' runs *genetic_minimize* and 'Surrogate' runs *surrogate_minimize*.
+   | Gradient based methods get the derivatives the function provides (see *derivatives*), e.g. StressStrain.mcfunc_gradient,
+   | and the genetic algorithm and the surrogate get its batched form (see *method_options*), e.g. StressStrain.mcfunc_batch.
+   | Every other minimizer in this package is a local optimization algorithm, so it will get trapped in convexities of a dataset.
+   | In running, this function measures the memory, the runtime, the function calls and the number of algorithmic iterations
+   | required to achieve an optimal result (see *measure*), displaying them unless display=False.
+   | With concurrent=True every method runs in its own worker process (see *stream_suite*), so comparing methods takes about as long
+   | as the slowest one, and every method is stopped after *timeout* seconds if given.
+
+    Returns the first optimal model parameters for stress/strain data (SS_stress given, raising a RuntimeError if
+    that method was stopped or failed), and otherwise one RunStatistics object per method (its *result* is the optimizer's result).
+    """
+
+    tol = 1e-2 if SS_stress else 1e-6
+    args = (SS_stress,) if SS_stress else ()
+
+    statistics = [None]*len(methods)
+
+    def report(counter):
+        """Displays the result and measurements of a method"""
+
+        result = statistics[counter].result
 
-    exec_time = stop-start
+        if display and not SS_stress:
+            print '{0}: the result, {3} was found at ({1}, {2})'.format(statistics[counter].name,result.x[0],result.x[1],result.fun)
+            display_statistics(statistics[counter])
+            print
+
+    if concurrent:
+
+        # results are displayed as soon as each method finishes
+        for counter, cur_result in stream_suite(function, methods, guess, SS_stress=SS_stress, timeout=timeout, processes=processes):
+            statistics[counter] = cur_result.statistics
+            report(counter)
+
+    else:
+
+        # testing every minimization method
+        for counter, method in enumerate(methods):
+
+            name = method if isinstance(method, str) else method.__name__
+            statistics[counter] = measure(lambda counted: minimize(counted, x0 = guess, args = args, method = minimize_methods.get(name, method), tol = tol,
+                                                                   options = method_options(function, method, counted),
+                                                                   **derivatives(function, method, counted)), function, name)
+            report(counter)
 
     # if we are working with stress/strain data, we return the first optimal model parameters
     if SS_stress:
-        return result[0].x[0], result[0].x[1] 
+        result = statistics[0].result
 
-    # If an algorithm took (-1) iterations, the number of iterations was not returned
-    for counter, method in enumerate(methods):
+        # a method that was stopped or failed (in a worker) has no parameters to return, only the guess
+        if not np.isfinite(result.fun):
+            raise RuntimeError("{0} did not fit the model: {1}".format(statistics[0].name, result.message))
 
-        print '{0} took {1} seconds. The result, {4} was found at ({2}, {3})'.format(method,exec_time[counter],result[counter].x[0],result[counter].x[1],result[counter].fun)
-        print '{0} used {1} megabytes and took {2} iterations'.format(method,most_mem[counter],num_iters[counter])
-        print
+        return result.x[0], result.x[1]
 
+    return statistics
 
-def custom_minimize(function, algorithm, bounds = None, guess = None):
+def custom_minimize(function, algorithm, bounds = None, guess = None, display = True):
     """
     This is similar to the minimize_suite, but is defined for functions like basinhopping or brute_force (in scipy.optimize), so the second parameter is a user-provided algorithm for optimization.
 
@@ -92,63 +244,702 @@ def custom_minimize(function, algorithm, bounds = None, guess = None):
        | guess - an initial guess at an optimal solution
     
 	| Which keyword arguments are required or optional depends on the provided algorithm.
-    """
 
-    most_mem = np.zeros(0)
+    Returns the measurements of the run (see *measure*), which are displayed unless display=False.
+    """
 
-    def iter_minimize(): # lightweight version of iter_minimize for a single optimization method
+    def run(counted):
 
-        start = timeit.default_timer()
-        
-        result = 0
-        
         # some minimization techniques do not require an initial guess
         if guess is not None:
-            result = algorithm(function, guess) 
+            return algorithm(counted, guess)
+
+        return algorithm(counted, bounds)
+
+    statistics = measure(run, function, algorithm.__name__)
+
+    if display:
+        print '{0}: the result, {1} was found at ({2})'.format(algorithm.__name__,statistics.result.fun,statistics.result.x)
+        display_statistics(statistics)
+        print
+
+    return statistics
+
+# Our workaround for evaluating GA performance, needs its own method because it is separate in the PyBrain module and takes different parameters
+def GA_minimize(function, guess, display=True, **options):
+    """
+    This function runs the genetic algorithm (see *genetic_minimize*) on a function, provided with an initial guess.
+    The options of genetic_minimize (e.g. bounds, population, generations or batch) can be given as keyword arguments,
+    the batched form of the function is used when none is given (see *method_options*).
+
+    Returns the measurements of the run (see *measure*), its *result* is the optimizer's result.
+    """
+
+    bounds = options.pop('bounds', None)
+    statistics = measure(lambda counted: minimize(counted, x0 = guess, method = genetic_minimize, bounds = bounds,
+                                                  options = dict(method_options(function, genetic_minimize, counted), **options)), function, 'Genetic Algorithm')
+
+    if display:
+        print "The result, {0} was found at {1}".format(statistics.result.fun, statistics.result.x)
+        display_statistics(statistics)
+        print
+
+    return statistics
+
+def sample_starts(bounds, starts, sampling='latin', seed=None):
+    """
+    Spreads a number of starting points over a box, returning one point per row.
+
+    Arguments:
+       | bounds - a (min, max) pair for every dimension, e.g. [(-300, -10), (0.5, 3)]
+       | starts - how many points to return
+    Keyword Arguments:
+       | sampling - 'latin' for a Latin hypercube (every dimension is split into *starts* intervals and each is used once) or 'random'
+       | seed - makes the points reproducible
+    """
+
+    bounds = np.asarray(bounds, dtype=float)
+    dimensions = len(bounds)
+    random = np.random.RandomState(seed)
+
+    if sampling == 'latin':
+        """One point in every interval of every dimension, with the intervals shuffled independently"""
+        unit = (np.arange(starts)[:,None] + random.uniform(size=(starts, dimensions)))/starts
+
+        for dimension in xrange(dimensions):
+            unit[:,dimension] = unit[random.permutation(starts),dimension]
+
+    elif sampling == 'random':
+        unit = random.uniform(size=(starts, dimensions))
+
+    else:
+        raise ValueError("Unknown sampling '{0}', use 'latin' or 'random'".format(sampling))
+
+    return bounds[:,0] + unit*(bounds[:,1]-bounds[:,0])
+
+def evaluate_individual(task):
+    """Evaluates the function at one individual in a worker process, the task is (function, x, args)."""
+
+    function, x, args = task
+
+    return function(x, *args)
+
+def roulette_wheel(values, count, random):
+    """
+    Selects count individuals, each with a probability proportional to how much better it is than the worst finite one
+    (like genetic.c). Individuals whose value is not finite (failed evaluations) are never selected, unless all of them failed.
+    Returns their indices.
+    """
+
+    values = np.asarray(values, dtype=float)
+    finite = np.isfinite(values)
+
+    if not finite.any():
+        return random.randint(len(values), size=count)
+
+    fitness = np.where(finite, np.max(values[finite])-np.where(finite, values, 0), 0.)
+
+    """If every finite individual is as fit, they are all equally likely"""
+    if fitness.sum() <= 0:
+        fitness = finite.astype(float)
+
+    """Individuals without a weight take up no room on the wheel, the last one with a weight takes any rounding at the end"""
+    wheel = np.cumsum(fitness)
+
+    return np.minimum(np.searchsorted(wheel, random.uniform(size=count)*wheel[-1], side='right'), np.flatnonzero(fitness)[-1])
+
+def crossover(parents, rate, random):
+    """
+    Pairs up the parents (one pair per two rows), and with probability rate blends every pair into two children,
+    every gene at its own random point between the parents' genes. Returns the children.
+    """
+
+    first, second = parents[0::2], parents[1::2]
+    mixing = random.uniform(size=first.shape)
+
+    """Pairs that do not cross over are copied"""
+    mixing[random.uniform(size=len(first)) >= rate] = 1.
+
+    return np.concatenate((mixing*first + (1-mixing)*second, mixing*second + (1-mixing)*first))
+
+def mutate(population, rate, scale, bounds, random):
+    """Moves every gene, with probability rate, by a normal step of scale times the width of its bounds, keeping it within them."""
+
+    mutations = random.uniform(size=population.shape) < rate
+    steps = random.normal(size=population.shape)*scale*(bounds[:,1]-bounds[:,0])
+
+    return np.clip(population + mutations*steps, bounds[:,0], bounds[:,1])
+
+def genetic_minimize(function, x0, args=(), bounds=None, population=40, generations=100, elite=2, crossover_rate=0.9,
+                     mutation_rate=0.1, mutation_scale=0.1, batch=None, processes=1, stall=20, tol=None, seed=None,
+                     operators='numpy', callback=None, **unknown_options):
+    """
+    A genetic algorithm holding its whole population in an array, as a custom method for scipy's minimize
+    (minimize(function, guess, method=genetic_minimize, bounds=..., options={...})). In minimize_suite it is the 'Genetic Algorithm' method.
+
+    Every generation keeps the elite best individuals, and breeds the rest of the population from parents chosen by
+    roulette wheel selection, blended by crossover and mutated, all as array operations.
+
+    Arguments:
+       | function - the function to minimize, called as function(x, *args)
+       | x0 - an initial guess, which is part of the first population
+    Keyword Arguments:
+       | bounds - a (min, max) pair for every dimension, by default the guess plus or minus its magnitude (at least 1)
+       | population - the number of individuals
+       | generations - the most generations to breed
+       | elite - how many of the best individuals survive unchanged
+       | crossover_rate, mutation_rate - the probability of a pair being crossed over and of a gene being mutated
+       | mutation_scale - the size of mutations, relative to the width of the bounds
+       | batch - evaluates a whole population at once, called as batch(population, *args) with one individual per row (e.g. StressStrain.mcfunc_batch)
+       | processes - evaluates the individuals in this many worker processes (None for one per CPU) when batch is not given and the function can be pickled;
+       |             worker processes of a concurrent minimize_suite cannot start more, so they evaluate the individuals themselves
+       | stall, tol - stop when the best value has improved by less than tol (1e-8 by default) in stall generations
+       | seed - makes the run reproducible
+       | operators - 'numpy' breeds with NumPy, 'native' with the C operators of genetic.c (see genetic_operators),
+       |             or with NumPy and a warning if those cannot be built
+
+    Returns a scipy OptimizeResult.
+    """
+
+    x0 = np.atleast_1d(np.asarray(x0, dtype=float))
+    random = np.random.RandomState(seed)
+    tol = 1e-8 if tol is None else tol
+
+    if bounds is None:
+        spread = np.maximum(np.abs(x0), 1.)
+        bounds = np.column_stack((x0-spread, x0+spread))
+
+    bounds = np.asarray(bounds, dtype=float)
+
+    """Keeps the number of children even, so they can be bred in pairs"""
+    elite = min(elite, population)
+    population += (population-elite) % 2
+
+    if operators == 'native':
+        import genetic_operators
+
+        try:
+            native_random = genetic_operators.NativeRandom(random.randint(2**31))
+
+        except genetic_operators.BuildError as error:
+            warnings.warn("The native genetic operators are not available, breeding with NumPy instead: {0}".format(error))
+            operators = 'numpy'
+
+    elif operators != 'numpy':
+        raise ValueError("Unknown operators {0}, choose 'numpy' or 'native'".format(operators))
+
+    evaluations = [0]
+    pool = None
+
+    if batch is None and processes != 1 and not multiprocessing.current_process().daemon:
+        pool = multiprocessing.Pool(processes)
+
+    def evaluate(individuals):
+        """The values of the function for every individual"""
+
+        evaluations[0] += len(individuals)
+
+        if batch is not None:
+            return np.asarray(batch(individuals, *args), dtype=float)
+
+        if pool is not None:
+            return np.asarray(pool.map(evaluate_individual, [(function, x, args) for x in individuals]), dtype=float)
+
+        return np.array([function(x, *args) for x in individuals], dtype=float)
+
+    try:
+        individuals = sample_starts(bounds, population, seed=random.randint(2**31))
+        individuals[0] = np.clip(x0, bounds[:,0], bounds[:,1])
+
+        values = evaluate(individuals)
+        values[np.isnan(values)] = np.inf
+
+        history = [np.min(values)]
+        message = 'Reached the largest number of generations'
+
+        """With no generations to breed, the first population is the result"""
+        generation = 0
+
+        for generation in xrange(1, generations+1):
+
+            order = np.argsort(values)
+            survivors = individuals[order[:elite]]
+
+            if operators == 'native':
+                parents = individuals[genetic_operators.select(values, population-elite, native_random)]
+                children = genetic_operators.mutate(genetic_operators.crossover(parents, crossover_rate, native_random), mutation_rate, mutation_scale, bounds, native_random)
+
+            else:
+                parents = individuals[roulette_wheel(values, population-elite, random)]
+                children = mutate(crossover(parents, crossover_rate, random), mutation_rate, mutation_scale, bounds, random)
+
+            children_values = evaluate(children)
+            children_values[np.isnan(children_values)] = np.inf
+
+            individuals = np.concatenate((survivors, children))
+            values = np.concatenate((values[order[:elite]], children_values))
+
+            history.append(np.min(values))
+
+            if callback is not None:
+                callback(individuals[np.argmin(values)])
+
+            if generation >= stall and history[-stall-1]-history[-1] < tol:
+                message = 'The best value improved by less than {0} in {1} generations'.format(tol, stall)
+                break
 
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    best = np.argmin(values)
+
+    return OptimizeResult(x=individuals[best], fun=values[best], nit=generation, nfev=evaluations[0], success=np.isfinite(values[best]),
+                          message=message, population=individuals, population_values=values)
+
+def fit_rbf(points, values):
+    """
+    Fits a cubic radial basis function with a linear tail through the points (one per row) and their values.
+    Returns the surrogate, a function of an array of points (one per row).
+    """
+
+    count, dimensions = points.shape
+
+    """The interpolation conditions, and the tail being orthogonal to the weights"""
+    system = np.zeros((count+dimensions+1, count+dimensions+1))
+    system[:count,:count] = np.sqrt(((points[:,None,:]-points[None,:,:])**2).sum(axis=2))**3
+    system[:count,count] = system[count,:count] = 1.
+    system[:count,count+1:] = points
+    system[count+1:,:count] = points.T
+
+    right = np.concatenate((values, np.zeros(dimensions+1)))
+
+    try:
+        coefficients = np.linalg.solve(system, right)
+
+    except np.linalg.LinAlgError:
+        coefficients = np.linalg.lstsq(system, right, rcond=None)[0]
+
+    weights, constant, slopes = coefficients[:count], coefficients[count], coefficients[count+1:]
+
+    def surrogate(candidates):
+        distances = np.sqrt(((candidates[:,None,:]-points[None,:,:])**2).sum(axis=2))
+        return (distances**3).dot(weights) + constant + candidates.dot(slopes)
+
+    return surrogate
+
+def surrogate_minimize(function, x0, args=(), bounds=None, initial=None, max_evaluations=60, candidates=200, batch=None,
+                       tol=None, seed=None, callback=None, **unknown_options):
+    """
+    Minimizes an expensive function (like StressStrain.mcfunc) with few true evaluations, as a custom method for scipy's
+    minimize (minimize(function, guess, method=surrogate_minimize, bounds=..., options={...})). In minimize_suite it is the 'Surrogate' method.
+
+    A cubic radial basis function is fitted through every point evaluated so far (starting from a Latin hypercube around
+    the guess). Every iteration, many candidates (normal steps around the best point and random points in the bounds)
+    are screened on that surrogate, and only the most promising one, trading a low predicted value against its distance
+    from the points already known, is evaluated with the true function. The steps shrink when the true
+    evaluations stop improving.
+
+    Arguments:
+       | function - the function to minimize, called as function(x, *args)
+       | x0 - an initial guess, which is part of the initial design
+    Keyword Arguments:
+       | bounds - a (min, max) pair for every dimension, by default the guess plus or minus its magnitude (at least 1)
+       | initial - the number of points in the initial design (2*(dimensions+1) and the guess by default)
+       | max_evaluations - the most true evaluations
+       | candidates - how many candidates are screened on the surrogate every iteration
+       | batch - evaluates the whole initial design at once, called as batch(points, *args) (e.g. StressStrain.mcfunc_batch)
+       | tol - stop once the steps are smaller than tol (1e-3 by default), relative to the bounds
+       | seed - makes the run reproducible
+
+    Returns a scipy OptimizeResult with what the surrogate saved: *screened* is the number of candidates evaluated on
+    the surrogate, *unevaluated* the number of those never evaluated with the true function, and *saved* the number
+    of true evaluations left of max_evaluations.
+    """
+
+    x0 = np.atleast_1d(np.asarray(x0, dtype=float))
+    dimensions = len(x0)
+    random = np.random.RandomState(seed)
+    tol = 1e-3 if tol is None else tol
+
+    if bounds is None:
+        spread = np.maximum(np.abs(x0), 1.)
+        bounds = np.column_stack((x0-spread, x0+spread))
+
+    bounds = np.asarray(bounds, dtype=float)
+    width = bounds[:,1]-bounds[:,0]
+
+    if initial is None:
+        initial = 2*(dimensions+1)
+
+    """Everything is worked out in the unit box, so every dimension counts the same"""
+    def unit(x):
+        return (x-bounds[:,0])/width
+
+    def scaled(u):
+        return bounds[:,0]+u*width
+
+    design = np.concatenate(([np.clip(unit(x0), 0, 1)], unit(sample_starts(bounds, initial, seed=random.randint(2**31)))))
+
+    if batch is not None:
+        values = np.asarray(batch(scaled(design), *args), dtype=float)
+    else:
+        values = np.array([function(scaled(u), *args) for u in design], dtype=float)
+
+    points = design
+    screened = 0
+
+    """Weights of the predicted value against the distance from known points, cycled through"""
+    balance = [0.3, 0.5, 0.8, 0.95]
+    step = 0.2
+    failures = 0
+    iteration = 0
+    message = 'Reached the largest number of evaluations'
+
+    def best_point():
+        """The best point evaluated so far (the guess while every evaluation failed)"""
+        return points[np.nanargmin(values) if np.isfinite(values).any() else 0]
+
+    while len(values) < max_evaluations:
+
+        if step < tol:
+            message = 'The steps became smaller than {0}'.format(tol)
+            break
+
+        iteration += 1
+
+        """Failed evaluations get the worst value seen, so the surrogate stays finite"""
+        finite = np.isfinite(values)
+        fitted = np.where(finite, values, np.max(values[finite]) if finite.any() else 0.)
+
+        """Values above the median (e.g. diverged curves) are compressed, so they do not flatten the rest of the surface"""
+        median = np.median(fitted)
+        fitted = np.minimum(fitted, median) + np.sqrt(np.maximum(fitted-median, 0))
+
+        surrogate = fit_rbf(points, fitted)
+        best = np.argmin(fitted)
+
+        local = points[best] + random.normal(size=(candidates//2, dimensions))*step
+        spread = random.uniform(size=(candidates-candidates//2, dimensions))
+        trial = np.clip(np.concatenate((local, spread)), 0, 1)
+
+        predicted = surrogate(trial)
+        distance = np.sqrt(((trial[:,None,:]-points[None,:,:])**2).sum(axis=2)).min(axis=1)
+        screened += len(trial)
+
+        """Both criteria are scaled to [0, 1], a low value and a large distance are good"""
+        def normalized(score):
+            return (score-score.min())/(score.max()-score.min()) if score.max() > score.min() else np.zeros(len(score))
+
+        weight = balance[iteration % len(balance)]
+        merit = weight*normalized(predicted) + (1-weight)*(1-normalized(distance))
+        merit[distance < 1e-9] = np.inf
+
+        chosen = trial[np.argmin(merit)]
+        value = float(function(scaled(chosen), *args))
+
+        """Steps shrink after three evaluations in a row that do not improve the best value (any finite value improves on failures)"""
+        known = values[np.isfinite(values)]
+
+        if np.isfinite(value) and (len(known) == 0 or value < known.min() - 1e-12*abs(known.min())):
+            failures = 0
         else:
-            result = algorithm(function, bounds)
+            failures += 1
 
-        iterations = -1
+            if failures >= 3:
+                step /= 2.
+                failures = 0
 
-        if 'nit' in result.keys():    
-            iterations = result.get('nit')
+        points = np.concatenate((points, [chosen]))
+        values = np.append(values, value)
 
-        stop = timeit.default_timer()
+        if callback is not None:
+            callback(scaled(best_point()))
 
-        return iterations, start, stop, result
+    best = np.nanargmin(values) if np.isfinite(values).any() else 0
+    evaluated = len(values)-len(design)
 
-    #tracks amount of memory used  by current process (-1) every interval (.2 seconds)
-    current_memory = memory_usage(-1, interval=.2) 
-    most_mem = np.append(most_mem, max(current_memory))
-    
-    num_iters, start, stop, result = iter_minimize()
+    return OptimizeResult(x=scaled(points[best]), fun=values[best], nit=iteration, nfev=len(values), success=np.isfinite(values[best]),
+                          message=message, screened=screened, unevaluated=screened-evaluated,
+                          saved=max(max_evaluations-len(values), 0),
+                          evaluated_points=scaled(points), evaluated_values=values)
+
+"""Methods minimize_suite knows by name besides scipy's"""
+minimize_methods = {'Genetic Algorithm': genetic_minimize, 'Surrogate': surrogate_minimize}
+
+"""
+Methods of scipy's minimize that use a gradient (jac), those that cannot run without one, and those given a Hessian (hess).
+The error surface of mcfunc is not convex (its Hessian at the default guess is indefinite), so only the trust region
+methods, which handle negative curvature, get the Hessian. Newton-CG does better with differences of the gradient.
+"""
+gradient_methods = ['cg', 'bfgs', 'newton-cg', 'l-bfgs-b', 'slsqp', 'tnc', 'dogleg', 'trust-ncg', 'trust-krylov', 'trust-exact', 'trust-constr']
+gradient_required = ['newton-cg', 'dogleg', 'trust-ncg', 'trust-krylov', 'trust-exact']
+hessian_methods = ['trust-ncg', 'trust-krylov', 'trust-exact', 'trust-constr']
 
-    exec_time = stop-start
+def central_gradient(function, step=None):
+    """Returns a gradient of function(x, *args) by central differences, one call per shifted point, with the steps of irreversible_stressstrain.difference_steps."""
 
-    print '{0} took {1} seconds. The result, {2} was found at ({3})'.format(algorithm.__name__,exec_time,result.fun,result.x)
-    print '{0} used {1} megabytes and took {2} iterations'.format(algorithm.__name__,most_mem,num_iters)
-    print
+    from irreversible_stressstrain import difference_steps
 
-# Our workaround for evaluating GA performance, needs its own method because it is separate in the PyBrain module and takes different parameters
-def GA_minimize(function, guess):
+    def gradient(x, *args):
+
+        x = np.asarray(x, dtype=float)
+        h = difference_steps(x, step, order=1)
+        shifts = np.diag(h)
+
+        return np.array([(function(x+shift, *args)-function(x-shift, *args))/(2*h[index]) for index, shift in enumerate(shifts)])
+
+    return gradient
+
+def companion(function, kind):
     """
-    This function runs the genetic algorithm from PyBrain (http://pybrain.org/docs/api/optimization/optimization.html) on a function, provided with an initial guess.
+    What a bound method such as StressStrain.mcfunc provides besides itself: the method of its instance
+    with the same name followed by _ and kind (e.g. StressStrain.mcfunc_batch for 'batch'), or None.
+    """
+
+    owner = getattr(function, '__self__', None)
 
-   | NOTE: Format is **crucial** here or this will not work (blame the authors of PyBrain, sorry):
-   | Function must take a **tuple** (**Even** if of only one element (in the form (a, )) and guess **MUST BE A LIST** (even if only with one element)
+    if owner is None:
+        return None
+
+    return getattr(owner, getattr(function, '__name__', '')+'_'+kind, None)
+
+def method_options(function, method, counted=None):
     """
-    
-    result = GA(function, guess, minimize=True) # set to minimize by default
-    
-    start = timeit.default_timer()
-    mem = max(memory_usage(-1,interval=.1))
-    
-    print "The result is: ", result.learn()
-    stop = timeit.default_timer()
-    
-    exec_time = stop-start
+    The options minimize gets for a method: the methods of this suite that evaluate many points at once
+    (genetic_minimize and surrogate_minimize) get the batched form of the function if it has one (see *companion*),
+    e.g. StressStrain.mcfunc_batch for StressStrain.mcfunc. If the counted function of a run is given, every point counts as a call.
+    """
+
+    batch = companion(function, 'batch')
+
+    if isinstance(method, str):
+        method = minimize_methods.get(method, method)
+
+    if batch is None or method not in (genetic_minimize, surrogate_minimize):
+        return {}
+
+    return {'batch': batch if counted is None else counted.batch(batch)}
+
+def derivatives(function, method, counted=None):
+    """
+    The derivatives minimize gets for a method, as its jac and hess keyword arguments.
+
+    A bound method such as StressStrain.mcfunc brings its own (see *companion*), which its instance has under the same name
+    followed by _gradient and _hessian (StressStrain.mcfunc_gradient evaluates all of its central differences
+    in a single call to the model). Methods that cannot run without a gradient (e.g. Newton-CG) get
+    serial central differences (see *central_gradient*) for any other function.
+
+    If the counted function of a run is given (see *measure*), the derivatives are counted too,
+    and the serial differences call it, so their evaluations count as function calls.
+    """
+
+    if not isinstance(method, str) or method.lower() not in gradient_methods:
+        return {}
+
+    jac = companion(function, 'gradient')
+    hess = companion(function, 'hessian')
+
+    provided = {}
+
+    if jac is not None:
+        provided['jac'] = jac
+
+    elif method.lower() in gradient_required:
+        provided['jac'] = central_gradient(function if counted is None else counted)
+
+    if hess is not None and method.lower() in hessian_methods:
+        provided['hess'] = hess
+
+    if counted is not None:
+        provided = dict((kind, counted.derivative(provider, kind)) for kind, provider in provided.items())
+
+    return provided
+
+def run_minimize(task):
+    """
+    Runs one minimization (used by the worker processes of multistart_suite).
+
+    The task is (function, method, guess, args, tol). A method that fails returns an unsuccessful
+    result with its error message instead of stopping the other minimizations. The measurements
+    of the run (see *measure*) are kept in the *statistics* field of the result.
+    """
+
+    function, method, guess, args, tol = task
+
+    name = method if isinstance(method, str) else method.__name__
+
+    def run(counted):
+
+        try:
+            return minimize(counted, x0 = guess, args = args, method = minimize_methods.get(name, method), tol = tol,
+                            options = method_options(function, method, counted), **derivatives(function, method, counted))
+
+        except Exception as error:
+            return OptimizeResult(x=np.asarray(guess, dtype=float), fun=np.nan, nit=-1, success=False, message=str(error))
+
+    statistics = measure(run, function, name)
+
+    result = statistics.result
+    result.statistics = statistics
+    result.time = statistics.wall_time
+    result.memory = statistics.peak_memory
+    result.method = name
+    result.guess = np.asarray(guess, dtype=float)
+
+    if 'nit' not in result.keys():
+        result.nit = -1
+
+    return result
+
+def method_worker(task, connection):
+    """Runs one method of stream_suite in its own process and sends its result back through its own pipe."""
+
+    connection.send(run_minimize(task))
+    connection.close()
+
+def stream_suite(function, methods, guess, SS_stress=None, timeout=None, processes=None, tol=None):
+    """
+    Runs every method from the same guess, each in its own worker process, and yields (index, result) pairs
+    as the methods finish, where index is the position of the method in *methods*.
+
+    Every result has the fields of a scipy result plus *method*, *time* (seconds), *nit* (-1 if not given), *memory* (megabytes)
+    and *statistics* (see *measure*).
+
+    Keyword Arguments:
+       | SS_stress - the yield stress, passed on to the function like in minimize_suite
+       | timeout - the wall-clock budget of every method in seconds, a method that runs longer is stopped and yields an unsuccessful result
+       | processes - how many methods run at once (all cores by default)
+       | tol - the tolerance of every minimization (1e-2 for stress/strain data and 1e-6 otherwise, like minimize_suite)
+    """
+
+    if tol is None:
+        tol = 1e-2 if SS_stress else 1e-6
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+
+    args = (SS_stress,) if SS_stress else ()
+    pending = list(enumerate(methods))
+    running = {}
+
+    def stopped(counter, message, elapsed):
+        """The result of a method that did not finish"""
+
+        method = methods[counter]
+        result = OptimizeResult(x=np.asarray(guess, dtype=float), fun=np.nan, nit=-1, success=False, message=message)
+        result.method = method if isinstance(method, str) else method.__name__
+        result.guess = np.asarray(guess, dtype=float)
+        result.time = elapsed
+        result.memory = np.nan
+        result.statistics = RunStatistics(name=result.method, result=result, iterations=-1, wall_time=elapsed, cpu_time=np.nan,
+                                          peak_memory=np.nan, calls=0, time_per_call=np.nan, jac_calls=0, hess_calls=0,
+                                          model_evaluations=0, engine_time=np.nan, python_time=np.nan)
+
+        return result
+
+    try:
+        while pending or running:
+
+            # starting methods while there are free workers, every one with its own pipe, so stopping one cannot disturb the others
+            while pending and len(running) < processes:
+                counter, method = pending.pop(0)
+                receiver, sender = multiprocessing.Pipe(duplex=False)
+                process = multiprocessing.Process(target=method_worker, args=((function, method, guess, args, tol), sender))
+                process.daemon = True
+                process.start()
+                sender.close()
+                running[counter] = (process, receiver, timeit.default_timer())
+
+            # results that arrived are taken first, so a method that finished just before its deadline is never stopped
+            finished = False
+
+            for counter, (process, receiver, started) in sorted(running.items()):
+
+                elapsed = timeit.default_timer()-started
+
+                if receiver.poll():
+
+                    try:
+                        result = receiver.recv()
+                    except EOFError:
+                        result = stopped(counter, 'The worker process exited with code {0} before sending its result'.format(process.exitcode), elapsed)
+
+                elif timeout is not None and elapsed > timeout:
+                    process.terminate()
+                    result = stopped(counter, 'Stopped after {0} seconds'.format(timeout), elapsed)
+
+                elif not process.is_alive():
+                    result = stopped(counter, 'The worker process exited with code {0}'.format(process.exitcode), elapsed)
+
+                else:
+                    continue
+
+                process.join()
+                receiver.close()
+                del running[counter]
+                finished = True
+
+                yield counter, result
+
+            # waiting a moment for the next result (or deadline) when nothing happened
+            if not finished and running:
+                time.sleep(0.01)
+
+    finally:
+        # a caller that stops early does not leave workers behind
+        for process, receiver, started in running.values():
+            process.terminate()
+            process.join()
+            receiver.close()
+
+def multistart_suite(function, methods, bounds, starts=8, SS_stress=None, sampling='latin', processes=None, seed=None, tol=None):
+    """
+    Runs every method in *methods* from several starting points spread over *bounds*, using a pool of worker processes.
+
+   | Every minimizer in minimize_suite is local, so a single guess can get trapped in a local minimum.
+   | Here *starts* guesses are spread over the search domain (see *sample_starts*), every (method, guess) pair
+   | is minimized concurrently on all of the cores, and the best minimum found is returned.
+
+    Keyword Arguments:
+       | starts - the number of starting points
+       | SS_stress - the yield stress, passed on to the function like in minimize_suite
+       | sampling - how the starting points are spread ('latin' or 'random')
+       | processes - the number of worker processes (all cores by default, 1 runs everything in this process)
+       | seed - makes the starting points reproducible
+       | tol - the tolerance of every minimization (1e-2 for stress/strain data and 1e-6 otherwise, like minimize_suite)
+
+    Returns the best result (with the *method* and *guess* that found it) and a table of every run sorted by the minimum found,
+    with the fields method, guess, x, fun, nit and time (in seconds).
+    """
+
+    if tol is None:
+        tol = 1e-2 if SS_stress else 1e-6
+
+    args = (SS_stress,) if SS_stress else ()
+    guesses = sample_starts(bounds, starts, sampling=sampling, seed=seed)
+    tasks = [(function, method, guess, args, tol) for method in methods for guess in guesses]
+
+    if processes == 1:
+        results = [run_minimize(task) for task in tasks]
+
+    else:
+        pool = multiprocessing.Pool(processes)
+
+        try:
+            results = pool.map(run_minimize, tasks, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+
+    """The table of every run, failed runs (nan) go last"""
+    dimensions = guesses.shape[1]
+    table = np.zeros(len(results), dtype=[('method','S20'), ('guess',float,(dimensions,)), ('x',float,(dimensions,)), ('fun',float), ('nit',int), ('time',float)])
+
+    for index, result in enumerate(results):
+        table[index] = (result.method, result.guess, np.ravel(result.x), result.fun, result.nit, result.time)
+
+    order = np.argsort(np.where(np.isnan(table['fun']), np.inf, table['fun']), kind='mergesort')
 
-    print '{0} took {1} seconds'.format('Genetic Algorithm',exec_time)
-    print '{0} used {1} megabytes'.format('Genetic Algorithm',mem)
-    print
+    return results[order[0]], table[order]
@@ -0,0 +1,169 @@
+"""
+Specimen Store
+**************
+
+Keeps a whole library of stress-strain curves in one memory-mapped
+file, so thousands of specimens can be analysed without opening,
+parsing and allocating every file again.
+
+A store is a directory holding:
+
+    curves.npy -- the [Strain|Stress] rows of every curve, one curve after another
+    offsets.npy -- where every curve starts in curves.npy (and where the last one ends)
+    metadata.json -- a table describing every curve: its name, the file it came from, and
+    the material, temperature and loading type found in the headers of XML files
+
+Create one from data files with *create()*, and open it with *SpecimenStore*.
+The curves it returns are read-only views into the memory map, so nothing is read
+until they are used, and they can be given straight to the batch analytics
+(e.g. material_analytics.yield_stress_batch).
+"""
+
+"""Basic libs"""
+import os
+import json
+import numpy as np
+
+"""Data handlers"""
+import mat_data_parser
+
+def specimen_metadata(data_file, type):
+    """
+    Describes a data file: its name and path, and for XML files the material (sampleName),
+    temperature and loading type (loadingType) along with every other header before the stressStrain table.
+    """
+
+    metadata = {'name': os.path.basename(data_file), 'source': os.path.abspath(data_file),
+                'material': None, 'temperature': None, 'loading type': None}
+
+    if type == 'xml':
+        headers = mat_data_parser.read_xml_headers(data_file)
+
+        for key, value in headers.items():
+            name = key.split('/')[-1] if not key.endswith('/value') else key.split('/')[-2]
+
+            if name == 'sampleName':
+                metadata['material'] = value
+
+            elif name == 'loadingType':
+                metadata['loading type'] = value
+
+            elif 'temperature' in name.lower():
+                metadata['temperature'] = value
+
+        metadata['headers'] = headers
+
+    return metadata
+
+def create(directory, data_files, types=None, metadata=None):
+    """
+    Gathers the curves of many data files into a store.
+
+    Arguments:
+       | directory - where the store is written (it is created if needed, and replaces a store already there)
+       | data_files - text or XML specimen files
+    Keyword Arguments:
+       | types - the type ('txt' or 'xml') of every file, by default XML if the name says so (like the GUI does)
+       | metadata - a dictionary of extra descriptions for every file (e.g. the temperature of a text file)
+
+    Returns the opened SpecimenStore.
+    """
+
+    if types is None:
+        types = ['xml' if 'xml' in data_file else 'txt' for data_file in data_files]
+
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    """The store is sized before it is filled, so every file is parsed twice but only one table is in memory at a time"""
+    lengths = [len(mat_data_parser.load(data_file, type)) for data_file, type in zip(data_files, types)]
+    offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+
+    curves = np.lib.format.open_memmap(os.path.join(directory, 'curves.npy'), mode='w+', dtype=np.float64, shape=(offsets[-1], 2))
+
+    table = []
+
+    for index, (data_file, type) in enumerate(zip(data_files, types)):
+
+        curves[offsets[index]:offsets[index+1]] = mat_data_parser.load(data_file, type)[:,:2]
+
+        description = specimen_metadata(data_file, type)
+        description['points'] = lengths[index]
+
+        if metadata is not None:
+            description.update(metadata[index])
+
+        table.append(description)
+
+    curves.flush()
+    del curves
+
+    np.save(os.path.join(directory, 'offsets.npy'), offsets)
+
+    with open(os.path.join(directory, 'metadata.json'), 'w') as output:
+        json.dump(table, output, indent=1)
+
+    return SpecimenStore(directory)
+
+class SpecimenStore:
+    """
+    A library of curves created by *create()*, memory-mapped from its directory.
+
+    store[index] is the [Strain|Stress] array of a curve, a read-only view into the memory map
+    (copy a curve to change it).
+
+    Arguments:
+       | directory - the directory of the store
+    """
+
+    def __init__(self, directory):
+
+        self.directory = directory
+
+        self.data = np.load(os.path.join(directory, 'curves.npy'), mmap_mode='r')
+        self.offsets = np.load(os.path.join(directory, 'offsets.npy'))
+
+        with open(os.path.join(directory, 'metadata.json')) as description:
+            self.metadata = json.load(description)
+
+    def __len__(self):
+        return len(self.offsets)-1
+
+    def __getitem__(self, index):
+
+        if index < 0:
+            index += len(self)
+
+        if not 0 <= index < len(self):
+            raise IndexError("The store has {0} curves".format(len(self)))
+
+        return self.data[self.offsets[index]:self.offsets[index+1]]
+
+    def __iter__(self):
+
+        for index in xrange(len(self)):
+            yield self[index]
+
+    def lengths(self):
+        """The number of points of every curve."""
+
+        return np.diff(self.offsets)
+
+    def find(self, **criteria):
+        """
+        Returns the indices of the curves whose metadata has the given values,
+        e.g. find(material='1018 HT AR'). Use underscores for spaces in the names ('loading_type').
+        """
+
+        criteria = dict((name.replace('_', ' '), value) for name, value in criteria.items())
+
+        return [index for index, description in enumerate(self.metadata)
+                if all(description.get(name) == value for name, value in criteria.items())]
+
+    def curves(self, indices=None):
+        """Returns the curves (all of them by default) as a list of views, ready for the batch analytics."""
+
+        if indices is None:
+            indices = xrange(len(self))
+
+        return [self[index] for index in indices]
@@ -4,6 +4,7 @@ from distutils.core import setup
 setup(name='MatPy',
       version='1.1.0',
       packages=['MatPy',],
+      package_data={'MatPy': ['irreverisble.f90', 'genetic.c', 'genetic.h']},
       author='Edward Alexander Nusinovich',
       author_email='edward.nusinovich@gmail.com',
       install_requires=[
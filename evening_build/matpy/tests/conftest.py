@@ -0,0 +1,17 @@
+"""
+The MatPy modules import each other by name (like interface.py run from its directory),
+so the tests put that directory on the path.
+"""
+
+import os
+import sys
+
+package_directory = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'MatPy'))
+reference_directory = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'devel'))
+
+sys.path.insert(0, package_directory)
+
+def reference_file(*path):
+    """A data file of the reference specimens in devel."""
+
+    return os.path.join(reference_directory, *path)
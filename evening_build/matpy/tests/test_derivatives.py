@@ -0,0 +1,72 @@
+"""The batched derivatives of mcfunc, and how optimization runs count them."""
+
+import numpy as np
+import pytest
+from scipy.optimize import rosen
+
+from conftest import reference_file
+import irreversible_stressstrain
+import optimization_suite
+
+points = [[-150., 1.], [-60., 1.5], [-45., 2.]]
+
+@pytest.fixture
+def model():
+    cache = irreversible_stressstrain.cache
+    irreversible_stressstrain.set_cache(0)
+
+    yield irreversible_stressstrain.StressStrain(reference_file('ref', 'HSRS', '22'))
+
+    irreversible_stressstrain.cache = cache
+
+def serial_gradient(model, x, h):
+    return np.array([(model.mcfunc(x+shift, 500.)-model.mcfunc(x-shift, 500.))/(2*h[index]) for index, shift in enumerate(np.diag(h))])
+
+@pytest.mark.parametrize('x', points)
+def test_gradient_matches_serial_differences(model, x):
+
+    x = np.array(x)
+    h = irreversible_stressstrain.difference_steps(x)
+
+    np.testing.assert_allclose(model.mcfunc_gradient(x, 500.), serial_gradient(model, x, h), rtol=1e-6, atol=1e-9)
+
+@pytest.mark.parametrize('x', points)
+def test_hessian_matches_serial_differences(model, x):
+
+    x = np.array(x)
+    h = irreversible_stressstrain.difference_steps(x, order=2)
+    f = lambda y: model.mcfunc(y, 500.)
+    e = np.diag(h)
+
+    expected = np.empty((2, 2))
+
+    for i in range(2):
+        expected[i,i] = (f(x+e[i])-2*f(x)+f(x-e[i]))/h[i]**2
+
+    expected[0,1] = expected[1,0] = (f(x+e[0]+e[1])-f(x+e[0]-e[1])-f(x-e[0]+e[1])+f(x-e[0]-e[1]))/(4*h[0]*h[1])
+
+    np.testing.assert_allclose(model.mcfunc_hessian(x, 500.), expected, rtol=1e-6, atol=1e-9)
+
+def test_gradient_runs_count_every_model_evaluation(model):
+
+    result = optimization_suite.run_minimize((model.mcfunc, 'CG', [-150., 1.], (500.,), 1e-2))
+    statistics = result.statistics
+
+    assert statistics.jac_calls > 0
+    assert statistics.hess_calls == 0
+    assert statistics.model_evaluations == statistics.calls + 4*statistics.jac_calls
+
+    result = optimization_suite.run_minimize((model.mcfunc, 'trust-ncg', [-150., 1.], (500.,), 1e-2))
+    statistics = result.statistics
+
+    assert statistics.hess_calls > 0
+    assert statistics.model_evaluations == statistics.calls + 4*statistics.jac_calls + 9*statistics.hess_calls
+
+def test_serial_differences_count_as_function_calls():
+
+    result = optimization_suite.run_minimize((rosen, 'Newton-CG', [1.3, 0.7], (), 1e-6))
+
+    np.testing.assert_allclose(result.x, [1., 1.], atol=1e-4)
+    assert result.statistics.jac_calls > 0
+    assert result.statistics.calls >= 4*result.statistics.jac_calls
+    assert result.statistics.model_evaluations == 0
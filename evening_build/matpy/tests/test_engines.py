@@ -0,0 +1,66 @@
+"""The NumPy port of the model (irreversible_numpy) integrates the same curves as the compiled Fortran model."""
+
+import numpy as np
+import pytest
+
+import fortran_build
+import irreversible_numpy
+
+def fortran_model():
+
+    try:
+        return fortran_build.load_extension()
+    except fortran_build.BuildError as error:
+        pytest.skip(str(error))
+
+"""No limit, a strain limit (in percent), stopping at necking, and both"""
+stops = [(0., 0), (20., 0), (0., 1), (20., 1)]
+
+def assert_same_curves(fortran, numpy):
+
+    (fortran_curves, fortran_steps, fortran_work), (numpy_curves, numpy_steps, numpy_work) = fortran, numpy
+
+    np.testing.assert_array_equal(fortran_steps, numpy_steps)
+
+    for fortran_curve, numpy_curve, steps in zip(fortran_curves, numpy_curves, numpy_steps):
+        np.testing.assert_allclose(fortran_curve[:steps], numpy_curve[:steps], rtol=1e-10, atol=1e-12)
+
+    np.testing.assert_allclose(fortran_work, numpy_work, rtol=1e-10)
+
+@pytest.mark.parametrize('strain_limit, necking_stop', stops)
+def test_batches_match(strain_limit, necking_stop):
+
+    fortran = fortran_model()
+
+    """The third and fourth parameter sets neck, the last one cannot be integrated (Gact below about 0.7)"""
+    params_matrix = np.array([[-150., 1.], [-45.6, 1.], [-300., 1.], [-45.6, 0.8], [-45.6, 0.5]])
+    same = np.ones(len(params_matrix))
+    conditions = (0*same, 500.*same, 295.*same, params_matrix)
+
+    results = [engine.mechanics_batch(*conditions, strain_limit=strain_limit, necking_stop=necking_stop) for engine in (fortran, irreversible_numpy)]
+    assert_same_curves(*results)
+
+    curves, steps, work = results[1]
+    assert np.isnan(curves[-1, steps[-1]-1]).any()
+
+@pytest.mark.parametrize('strain_limit, necking_stop', stops)
+def test_samples_match(strain_limit, necking_stop):
+
+    fortran = fortran_model()
+
+    """The second sample cannot be integrated at 5000 K, the others neck"""
+    conditions = (np.zeros(3), np.array([500., 500., 900.]), np.array([295., 5000., 295.]), np.array([-300., 1.]))
+
+    results = [engine.mechanics_samples(*conditions, strain_limit=strain_limit, necking_stop=necking_stop) for engine in (fortran, irreversible_numpy)]
+    assert_same_curves(*results)
+
+    curves, steps, work = results[1]
+    assert np.isnan(curves[1, steps[1]-1]).any()
+
+def test_stops_shorten_the_curves():
+    """The stops of the comparisons above do cut the curves short"""
+
+    conditions = (np.zeros(1), np.array([500.]), np.array([295.]), np.array([[-300., 1.]]))
+    steps = dict((stop, irreversible_numpy.mechanics_batch(*conditions, strain_limit=stop[0], necking_stop=stop[1])[1][0]) for stop in stops)
+
+    assert steps[(0., 0)] > steps[(20., 0)] and steps[(0., 0)] > steps[(0., 1)]
@@ -0,0 +1,103 @@
+"""Stored error surfaces are only reused for the same data, model and test conditions."""
+
+import numpy as np
+
+from conftest import reference_file
+import error_surface
+import irreversible_stressstrain
+
+C = np.linspace(-100., 0., 5)
+Gact = np.linspace(1., 2., 4)
+
+def counted_compute(monkeypatch):
+    """Counts the surfaces evaluated (rather than loaded)"""
+
+    computed = []
+    compute = error_surface.compute
+
+    def counting(*args, **kwargs):
+        computed.append(args)
+        return compute(*args, **kwargs)
+
+    monkeypatch.setattr(error_surface, 'compute', counting)
+
+    return computed
+
+def test_surface_is_stored_and_reused(tmpdir, monkeypatch):
+
+    computed = counted_compute(monkeypatch)
+    model = irreversible_stressstrain.StressStrain(reference_file('ref', 'HSRS', '22'))
+
+    first = error_surface.surface(model, 500., C, Gact, processes=1, directory=str(tmpdir))
+    second = error_surface.surface(model, 500., C, Gact, processes=1, directory=str(tmpdir))
+
+    assert len(computed) == 1
+    np.testing.assert_array_equal(first.errors, second.errors)
+    np.testing.assert_allclose(first.errors[2,1], model.mcfunc([C[2], Gact[1]], 500.))
+
+def test_surface_depends_on_test_conditions_and_engine(tmpdir, monkeypatch):
+
+    computed = counted_compute(monkeypatch)
+    model = irreversible_stressstrain.StressStrain(reference_file('ref', 'HSRS', '22'))
+    engine = irreversible_stressstrain.engine
+
+    error_surface.surface(model, 500., C, Gact, processes=1, directory=str(tmpdir))
+
+    model.T_service = 350.
+    assert error_surface.nearest(model, 500., directory=str(tmpdir)) is None
+    assert error_surface.warm_start(model, 500., default='none', directory=str(tmpdir)) == 'none'
+    error_surface.surface(model, 500., C, Gact, processes=1, directory=str(tmpdir))
+    del model.T_service
+
+    try:
+        other = [name for name in irreversible_stressstrain.engines if irreversible_stressstrain.engines[name] is not engine]
+
+        for name in other:
+            irreversible_stressstrain.set_engine(name)
+            error_surface.surface(model, 500., C, Gact, processes=1, directory=str(tmpdir))
+
+    finally:
+        irreversible_stressstrain.engine = engine
+
+    assert len(computed) == 2+len(other)
+
+    """The surface of the original model and conditions is still there"""
+    error_surface.surface(model, 500., C, Gact, processes=1, directory=str(tmpdir))
+    assert len(computed) == 2+len(other)
+
+def test_surface_is_evaluated_again_when_the_data_changes(tmpdir, monkeypatch):
+
+    computed = counted_compute(monkeypatch)
+    model = irreversible_stressstrain.StressStrain(reference_file('ref', 'HSRS', '22'))
+
+    error_surface.surface(model, 500., C, Gact, processes=1, directory=str(tmpdir))
+
+    model.exp = np.array(model.exp)
+    model.exp[:,1] *= 1.01
+    error_surface.surface(model, 500., C, Gact, processes=1, directory=str(tmpdir))
+
+    assert len(computed) == 2
+
+    """The old surface still gives starting points"""
+    assert error_surface.warm_start(model, 510., directory=str(tmpdir)).shape == (2,)
+
+def test_minimum_of_a_surface_that_could_not_be_evaluated():
+
+    surface = error_surface.ErrorSurface(C, Gact, np.nan*np.ones((len(C), len(Gact))))
+
+    assert surface.minimum() is None
+    assert len(surface.warm_starts()) == 0
+
+def test_surfaces_send_bound_methods_without_the_optimization_suite():
+    """In a fresh interpreter, importing error_surface alone is enough to pickle StressStrain.mcfunc_batch for its workers"""
+
+    import os
+    import subprocess
+    import sys
+
+    script = ("import sys, pickle, error_surface, irreversible_stressstrain\n"
+              "method = pickle.loads(pickle.dumps(irreversible_stressstrain.StressStrain().mcfunc_batch))\n"
+              "assert method.__name__ == 'mcfunc_batch' and 'optimization_suite' not in sys.modules\n")
+
+    directory = os.path.dirname(error_surface.__file__)
+    assert subprocess.call([sys.executable, '-c', script], cwd=directory) == 0
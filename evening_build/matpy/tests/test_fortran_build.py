@@ -0,0 +1,108 @@
+"""The compiled model is cached per source, and compiled again when the source changes."""
+
+import os
+import shutil
+
+import fortran_build
+
+def fake_builds(monkeypatch, tmpdir):
+    """Builds write an empty extension instead of running f2py, and loading returns its path"""
+
+    builds = []
+
+    def build(source, directory):
+        builds.append(source)
+        open(os.path.join(directory, fortran_build.module_name+'.so'), 'w').close()
+
+    monkeypatch.setenv('MATPY_CACHE', str(tmpdir.join('cache')))
+    monkeypatch.setattr(fortran_build, 'build', build)
+    monkeypatch.setattr(fortran_build.imp, 'load_dynamic', lambda name, path: path)
+
+    return builds
+
+def test_changed_source_is_compiled_again(monkeypatch, tmpdir):
+
+    builds = fake_builds(monkeypatch, tmpdir)
+    source = str(tmpdir.join('irreverisble.f90'))
+    shutil.copy(fortran_build.source_file, source)
+
+    first = fortran_build.load_extension(source)
+    assert fortran_build.load_extension(source) == first
+    assert len(builds) == 1
+
+    digest = fortran_build.source_hash(source)
+
+    with open(source, 'a') as changed:
+        changed.write('! changed\n')
+
+    assert fortran_build.source_hash(source) != digest
+
+    second = fortran_build.load_extension(source)
+    assert len(builds) == 2
+    assert os.path.dirname(second) != os.path.dirname(first)
+
+    """The build of the original source is still cached"""
+    assert os.path.isfile(first)
+
+def test_interrupted_builds_are_compiled_again(monkeypatch, tmpdir):
+
+    builds = fake_builds(monkeypatch, tmpdir)
+    source = fortran_build.source_file
+
+    """A cached directory without an extension, as an interrupted build leaves it"""
+    target = os.path.join(fortran_build.cache_directory(), fortran_build.module_name+'-'+fortran_build.source_hash(source))
+    os.makedirs(target)
+
+    assert os.path.dirname(fortran_build.load_extension(source)) == target
+    assert len(builds) == 1
+
+    fortran_build.load_extension(source, rebuild=True)
+    assert len(builds) == 2
+    assert [name for name in os.listdir(fortran_build.cache_directory()) if '-build-' in name] == []
+
+def unwritable_cache(monkeypatch, tmpdir):
+    """A cache below a regular file, which cannot be created (even by root)"""
+
+    blocker = tmpdir.join('blocker')
+    blocker.write('')
+    monkeypatch.setenv('MATPY_CACHE', str(blocker.join('cache')))
+
+def test_unwritable_cache_raises_a_build_error(monkeypatch, tmpdir):
+
+    unwritable_cache(monkeypatch, tmpdir)
+
+    try:
+        fortran_build.load_extension()
+    except fortran_build.BuildError as error:
+        assert 'MATPY_CACHE' in str(error)
+    else:
+        raise AssertionError("load_extension wrote to an unwritable cache")
+
+def test_unwritable_cache_falls_back_to_the_numpy_engine(monkeypatch, tmpdir):
+
+    import subprocess
+    import sys
+
+    unwritable_cache(monkeypatch, tmpdir)
+
+    script = ("import irreversible_stressstrain, irreversible_numpy\n"
+              "assert irreversible_stressstrain.engine is irreversible_numpy\n"
+              "assert 'MATPY_CACHE' in irreversible_stressstrain.fortran_error\n")
+
+    assert subprocess.call([sys.executable, '-c', script], cwd=os.path.dirname(fortran_build.__file__)) == 0
+
+def test_cache_created_by_another_process_is_used(monkeypatch, tmpdir):
+
+    builds = fake_builds(monkeypatch, tmpdir)
+
+    """The cache directory appears between the check and the creation"""
+    makedirs = os.makedirs
+
+    def racing(directory, *args):
+        makedirs(directory, *args)
+        makedirs(directory, *args)
+
+    monkeypatch.setattr(fortran_build.os, 'makedirs', racing)
+
+    assert os.path.isfile(fortran_build.load_extension())
+    assert len(builds) == 1
@@ -0,0 +1,168 @@
+"""Selection and the genetic algorithm with objectives that fail (return nan) in part of the search box."""
+
+import numpy as np
+from scipy.optimize import minimize
+
+import optimization_suite
+
+def failing_sphere(x):
+    """(x-1)^2 summed, nan where the first parameter is negative (like mcfunc where the model cannot be integrated)"""
+
+    x = np.asarray(x, dtype=float)
+
+    if x[0] < 0:
+        return np.nan
+
+    return np.sum((x-1)**2)
+
+def test_roulette_wheel_never_selects_failed_individuals():
+
+    values = np.array([1., np.inf, 3., np.nan, 2., np.inf])
+    selected = optimization_suite.roulette_wheel(values, 20000, np.random.RandomState(0))
+
+    counts = np.bincount(selected, minlength=len(values))/20000.
+
+    """Fitness is the distance from the worst finite value (3): 2, 0 and 1"""
+    assert counts[1] == counts[3] == counts[5] == 0
+    assert counts[2] == 0
+    np.testing.assert_allclose(counts[[0, 4]], [2/3., 1/3.], atol=0.02)
+
+def test_roulette_wheel_equal_values():
+
+    values = np.array([np.inf, 5., 5., np.nan])
+    selected = optimization_suite.roulette_wheel(values, 10000, np.random.RandomState(1))
+
+    counts = np.bincount(selected, minlength=len(values))/10000.
+
+    assert counts[0] == counts[3] == 0
+    np.testing.assert_allclose(counts[[1, 2]], [0.5, 0.5], atol=0.03)
+
+def test_roulette_wheel_all_failed():
+
+    selected = optimization_suite.roulette_wheel(np.array([np.nan, np.inf]), 100, np.random.RandomState(2))
+
+    assert set(selected) <= set([0, 1])
+
+def test_genetic_minimize_with_failing_objective():
+
+    result = minimize(failing_sphere, [2., 2.], method=optimization_suite.genetic_minimize, bounds=[(-3, 3), (-3, 3)],
+                      options=dict(seed=0, generations=60, population=40))
+
+    assert result.success
+    np.testing.assert_allclose(result.x, [1., 1.], atol=0.1)
+
+    """Failed individuals do not breed, so the population converges on the finite half"""
+    assert np.mean(np.isfinite(result.population_values)) > 0.75
+
+def test_no_generations_returns_the_first_population():
+
+    result = minimize(failing_sphere, [2., 2.], method=optimization_suite.genetic_minimize, bounds=[(-3, 3), (-3, 3)],
+                      options=dict(seed=0, generations=0, population=10))
+
+    assert result.nit == 0 and result.nfev == 10
+    np.testing.assert_array_equal(result.population[0], [2., 2.])
+    assert result.fun == np.min(result.population_values) <= 2.
+
+def native_operators():
+    """The C operators, or a skipped test if they cannot be compiled here"""
+
+    import pytest
+    import fortran_build
+    import genetic_operators
+
+    try:
+        genetic_operators.load_library()
+    except fortran_build.BuildError as error:
+        pytest.skip(str(error))
+
+    return genetic_operators
+
+def selection_frequencies(select, values, count=40000):
+    return np.bincount(select(values, count), minlength=len(values))/float(count)
+
+def test_native_and_numpy_selection_agree():
+
+    genetic_operators = native_operators()
+    native_random = genetic_operators.NativeRandom(3)
+    random = np.random.RandomState(3)
+
+    for values in ([4., 1., 3., 2., 0.5], [1., np.inf, 3., np.nan, 2., np.inf], [np.inf, 5., 5., np.nan], [np.nan, np.inf]):
+
+        values = np.array(values)
+        native = selection_frequencies(lambda values, count: genetic_operators.select(values, count, native_random), values)
+        numpy = selection_frequencies(lambda values, count: optimization_suite.roulette_wheel(values, count, random), values)
+
+        np.testing.assert_allclose(native, numpy, atol=0.015)
+
+        if np.isfinite(values).any():
+            assert (native[~np.isfinite(values)] == 0).all()
+
+class Sphere:
+    """A model-like owner: sphere (like mcfunc) and its batched form sphere_batch (like mcfunc_batch), counting their calls."""
+
+    def __init__(self):
+        self.single = 0
+        self.batches = 0
+
+    def sphere(self, x):
+        self.single += 1
+        return failing_sphere(x)
+
+    def sphere_batch(self, points):
+        self.batches += 1
+        return np.array([failing_sphere(x) for x in points])
+
+def test_suite_runs_the_genetic_algorithm_on_the_batched_function():
+
+    owner = Sphere()
+    statistics, = optimization_suite.minimize_suite(owner.sphere, ['Genetic Algorithm'], [2., 2.], display=False)
+
+    assert owner.single == 0 and owner.batches > 0
+    assert statistics.calls == statistics.result.nfev
+    assert statistics.result.fun < 0.1
+
+def test_explicit_batch_is_kept():
+
+    owner = Sphere()
+    other = Sphere()
+    optimization_suite.GA_minimize(owner.sphere, [2., 2.], display=False, batch=other.sphere_batch, generations=5, seed=0)
+
+    assert owner.batches == 0 and other.batches > 0
+
+def test_native_operators_fall_back_to_numpy(monkeypatch, tmpdir):
+    """Without a writable cache the C operators cannot be built, the run still breeds (with NumPy) and warns"""
+
+    import warnings
+    import fortran_build
+    import genetic_operators
+
+    blocker = tmpdir.join('blocker')
+    blocker.write('')
+    monkeypatch.setenv('MATPY_CACHE', str(blocker.join('cache')))
+    monkeypatch.setattr(genetic_operators, 'library', None)
+
+    try:
+        genetic_operators.load_library()
+    except fortran_build.BuildError:
+        pass
+    else:
+        raise AssertionError("load_library wrote to an unwritable cache")
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        result = minimize(failing_sphere, [2., 2.], method=optimization_suite.genetic_minimize, bounds=[(-3., 3.), (-3., 3.)],
+                          options={'operators': 'native', 'seed': 0})
+
+    assert any('NumPy' in str(warning.message) for warning in caught)
+    assert result.fun < 0.1
+
+def test_operators_are_shipped_with_the_package():
+
+    import os
+    import genetic_operators
+
+    directory = os.path.dirname(os.path.abspath(genetic_operators.__file__))
+    assert os.path.dirname(genetic_operators.source_file) == directory
+
+    for name in ('genetic.c', 'genetic.h'):
+        assert os.path.isfile(os.path.join(directory, name))
@@ -0,0 +1,81 @@
+"""The closed-form logarithmic fit gives the parameters and covariance scipy.optimize.curve_fit does."""
+
+import numpy as np
+import pytest
+from scipy.optimize import curve_fit
+
+from conftest import reference_file
+import mat_data_parser
+import material_analytics
+
+def logarithm(x, a, c):
+    return a*np.log(x)+c
+
+def reference_curve():
+    """A measured curve, ready for the logarithmic fit"""
+
+    return material_analytics.log_prep(mat_data_parser.load(reference_file('ref', 'HSRS', '22')))
+
+def synthetic_curve():
+    """A noisy logarithmic curve"""
+
+    random = np.random.RandomState(3)
+    strain = np.linspace(0.03, 0.4, 200)
+
+    return np.column_stack((strain, logarithm(strain, 120., 900.)+random.normal(0., 5., len(strain))))
+
+@pytest.mark.parametrize('curve', [reference_curve, synthetic_curve])
+def test_unweighted_fit(curve):
+
+    data = curve()
+    expected, expected_covariance = curve_fit(logarithm, data[:,0], data[:,1])
+
+    params, covariance = material_analytics.log_fit_batch(data[None,:,0], data[None,:,1])
+    np.testing.assert_allclose(params[0], expected, rtol=1e-6)
+    np.testing.assert_allclose(covariance[0], expected_covariance, rtol=1e-6)
+
+    bestfit, params, covariance = material_analytics.log_approx(data, full_output=True)
+    np.testing.assert_allclose([bestfit.a, bestfit.c], expected, rtol=1e-6)
+    np.testing.assert_allclose(params, expected, rtol=1e-6)
+    np.testing.assert_allclose(covariance, expected_covariance, rtol=1e-6)
+
+@pytest.mark.parametrize('curve', [reference_curve, synthetic_curve])
+def test_weighted_fit(curve):
+    """The weights act as 1/sigma**2"""
+
+    data = curve()
+    weights = np.linspace(0.2, 3., len(data))
+    expected, expected_covariance = curve_fit(logarithm, data[:,0], data[:,1], sigma=1/np.sqrt(weights))
+
+    params, covariance = material_analytics.log_fit_batch(data[None,:,0], data[None,:,1], weights[None])
+    np.testing.assert_allclose(params[0], expected, rtol=1e-6)
+    np.testing.assert_allclose(covariance[0], expected_covariance, rtol=1e-6)
+
+    bestfit, params, covariance = material_analytics.log_approx(data, weights=weights, full_output=True)
+    np.testing.assert_allclose(params, expected, rtol=1e-6)
+    np.testing.assert_allclose(covariance, expected_covariance, rtol=1e-6)
+
+def test_zero_weights_leave_points_out():
+
+    data = synthetic_curve()
+    weights = np.ones(len(data))
+    weights[::3] = 0.
+    kept = weights > 0
+    expected, expected_covariance = curve_fit(logarithm, data[kept,0], data[kept,1])
+
+    params, covariance = material_analytics.log_fit_batch(data[None,:,0], data[None,:,1], weights[None])
+    np.testing.assert_allclose(params[0], expected, rtol=1e-6)
+    np.testing.assert_allclose(covariance[0], expected_covariance, rtol=1e-6)
+
+def test_rows_are_fitted_independently():
+
+    data = synthetic_curve()
+    other = reference_curve()[:len(data)]
+    strains, stresses = np.array([data[:,0], other[:,0]]), np.array([data[:,1], other[:,1]])
+
+    params, covariance = material_analytics.log_fit_batch(strains, stresses)
+
+    for row in xrange(2):
+        expected, expected_covariance = curve_fit(logarithm, strains[row], stresses[row])
+        np.testing.assert_allclose(params[row], expected, rtol=1e-6)
+        np.testing.assert_allclose(covariance[row], expected_covariance, rtol=1e-6)
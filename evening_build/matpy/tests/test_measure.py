@@ -0,0 +1,55 @@
+"""optimization_suite.measure times the engine without replacing it."""
+
+import threading
+import numpy as np
+import pytest
+
+from conftest import reference_file
+import irreversible_stressstrain
+import optimization_suite
+
+def test_measure_times_engine_without_replacing_it():
+
+    model = irreversible_stressstrain.StressStrain(reference_file('ref', 'HSRS', '22'))
+    engine = irreversible_stressstrain.engine
+    seen = []
+
+    def run(counted):
+        seen.append(irreversible_stressstrain.engine)
+        return counted([-150., 1.], 500.)
+
+    cache = irreversible_stressstrain.cache
+    irreversible_stressstrain.set_cache(0)
+
+    try:
+        statistics = optimization_suite.measure(run, model.mcfunc, 'one call')
+    finally:
+        irreversible_stressstrain.cache = cache
+
+    assert seen == [engine]
+    assert irreversible_stressstrain.engine is engine
+    assert statistics.calls == 1
+    assert 0 < statistics.engine_time <= statistics.wall_time
+
+def test_measure_stops_timing_after_errors():
+
+    def run(counted):
+        raise RuntimeError('the optimizer failed')
+
+    with pytest.raises(RuntimeError):
+        optimization_suite.measure(run, lambda x: x)
+
+    assert getattr(irreversible_stressstrain.engine_timers, 'timer', None) is None
+
+def test_engine_timers_are_per_thread():
+
+    timer = irreversible_stressstrain.EngineTimer().start()
+    other = []
+
+    thread = threading.Thread(target=lambda: other.append(getattr(irreversible_stressstrain.engine_timers, 'timer', None)))
+    thread.start()
+    thread.join()
+
+    timer.stop()
+
+    assert other == [None]
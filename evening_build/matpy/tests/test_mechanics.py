@@ -0,0 +1,60 @@
+"""The model entry points of the Fortran extension and of irreversible_numpy."""
+
+import numpy as np
+import pytest
+
+from conftest import reference_file
+import fortran_build
+import irreversible_numpy
+import irreversible_stressstrain
+
+def fortran_model():
+
+    try:
+        return fortran_build.load_extension()
+    except fortran_build.BuildError as error:
+        pytest.skip(str(error))
+
+"""The first sample cannot be integrated at 5000 K (its curve ends in nan after two steps), the second can"""
+p_stress = np.array([0., 0.])
+ss_stress = np.array([500., 500.])
+Tsam = np.array([5000., 295.])
+M_para = np.array([-45.6, 1.])
+
+@pytest.mark.parametrize('engine', ['numpy', 'fortran'])
+def test_a_failed_sample_does_not_stop_the_next(engine):
+
+    model = irreversible_numpy if engine == 'numpy' else fortran_model()
+
+    stress_strain, WTN = model.mechanics(p_stress, ss_stress, Tsam, M_para, 2)
+    alone, alone_WTN = model.mechanics(p_stress[1:], ss_stress[1:], Tsam[1:], M_para, 1)
+
+    assert np.isfinite(stress_strain).all() and stress_strain[-1] > 0
+    np.testing.assert_array_equal(stress_strain, alone)
+    assert WTN == alone_WTN
+
+@pytest.mark.parametrize('engine', ['numpy', 'fortran'])
+def test_mcfunc_batch_matches_the_original_mcfunc(engine):
+
+    if engine == 'fortran':
+        fortran_model()
+
+    previous = irreversible_stressstrain.engine
+    cache = irreversible_stressstrain.cache
+    irreversible_stressstrain.set_cache(0)
+
+    try:
+        irreversible_stressstrain.set_engine(engine)
+        model = irreversible_stressstrain.StressStrain(reference_file('ref', 'HSRS', '22'))
+
+        """The last parameter set cannot be integrated (Gact below about 0.7), so its error is nan"""
+        points = np.array([[-150., 1.], [-45.6, 1.], [0., 0.83], [-60., 1.5], [-45.6, 0.5]])
+        original = [model.mcfunc_classic(x, 500.) for x in points]
+
+        np.testing.assert_allclose(model.mcfunc_batch(points, 500.), original, rtol=1e-9)
+        np.testing.assert_allclose([model.mcfunc(x, 500.) for x in points], original, rtol=1e-9)
+        assert np.isnan(original[-1])
+
+    finally:
+        irreversible_stressstrain.engine = previous
+        irreversible_stressstrain.cache = cache
@@ -0,0 +1,72 @@
+"""Curves saved by mechanics_cache are only found again for the same simulation by the same model."""
+
+import os
+import numpy as np
+
+import mechanics_cache
+import irreversible_stressstrain
+
+def test_saved_curves_are_keyed_on_the_model(tmpdir):
+
+    directory = str(tmpdir)
+    curve = np.arange(10.).reshape(5, 2)
+
+    cache = mechanics_cache.MechanicsCache(directory=directory)
+    cache.put(cache.key([-150., 1.], 500., 295., model='fortran-old'), curve)
+
+    """A later session, with the model changed"""
+    later = mechanics_cache.MechanicsCache(directory=directory)
+
+    assert later.get(later.key([-150., 1.], 500., 295., model='fortran-new')) is None
+    np.testing.assert_array_equal(later.get(later.key([-150., 1.], 500., 295., model='fortran-old')), curve)
+
+def test_saving_leaves_no_temporary_files(tmpdir):
+
+    cache = mechanics_cache.MechanicsCache(directory=str(tmpdir))
+    key = cache.key([-150., 1.], 500., 295.)
+    cache.put(key, np.ones((3, 2)))
+
+    assert os.listdir(str(tmpdir)) == [os.path.basename(cache.filename(key))]
+
+def test_model_identity_names_the_engine():
+
+    engine = irreversible_stressstrain.engine
+
+    try:
+        identities = set()
+
+        for name in irreversible_stressstrain.engines:
+            irreversible_stressstrain.set_engine(name)
+            identities.add(irreversible_stressstrain.model_identity())
+
+            assert irreversible_stressstrain.model_identity().startswith(name+'-')
+
+    finally:
+        irreversible_stressstrain.engine = engine
+
+    assert len(identities) == len(irreversible_stressstrain.engines)
+
+def test_curves_of_one_engine_are_not_returned_for_another(tmpdir):
+
+    engine = irreversible_stressstrain.engine
+    cache = irreversible_stressstrain.cache
+    stored = irreversible_stressstrain.set_cache(directory=str(tmpdir))
+
+    model = irreversible_stressstrain.StressStrain()
+
+    try:
+        irreversible_stressstrain.set_engine('numpy')
+        model.irreversible_model([-150., 1.], 500.)
+        model.irreversible_model([-150., 1.], 500.)
+
+        assert stored.stats()['hits'] == 1
+
+        if 'fortran' in irreversible_stressstrain.engines:
+            irreversible_stressstrain.set_engine('fortran')
+            model.irreversible_model([-150., 1.], 500.)
+
+            assert stored.stats()['misses'] == 2
+
+    finally:
+        irreversible_stressstrain.engine = engine
+        irreversible_stressstrain.cache = cache
@@ -0,0 +1,103 @@
+"""read_xml gives the table the DataModelDict reader did, as floats, and load caches tables only when asked to."""
+
+import os
+import errno
+import shutil
+import numpy as np
+
+from conftest import reference_file
+import mat_data_parser
+import benchmark_suite
+
+def test_read_xml_matches_the_original_reader():
+
+    data_file = reference_file('kolskybar.xml')
+    table = mat_data_parser.read_xml(data_file)
+
+    assert table.dtype == np.float64
+    np.testing.assert_array_equal(table, benchmark_suite.read_xml_classic(data_file).astype(float))
+
+def test_read_xml_columns_and_buffers():
+
+    data_file = reference_file('kolskybar.xml')
+    table = mat_data_parser.read_xml(data_file)
+
+    np.testing.assert_array_equal(mat_data_parser.read_xml(data_file, columns=['strain', 'stress']), table[:,:2])
+
+    """A small starting capacity has to grow, a buffer is filled in place"""
+    np.testing.assert_array_equal(mat_data_parser.read_xml(data_file, capacity=1), table)
+
+    out = np.empty((len(table)+5, table.shape[1]))
+    filled = mat_data_parser.read_xml(data_file, out=out)
+
+    np.testing.assert_array_equal(filled, table)
+    assert filled.base is out or filled is out
+
+def copied(tmpdir, *path):
+    """A copy of a reference file, so caches are never written into the source tree"""
+
+    data_file = str(tmpdir.join(path[-1]))
+    shutil.copy(reference_file(*path), data_file)
+
+    return data_file
+
+def test_load_writes_nothing_by_default(tmpdir):
+
+    data_file = copied(tmpdir, 'ref', 'HSRS', '22')
+    table = mat_data_parser.load(data_file)
+
+    np.testing.assert_array_equal(table, np.loadtxt(data_file))
+    assert os.listdir(str(tmpdir)) == ['22']
+
+def test_cache_is_invalidated_when_the_file_changes(tmpdir):
+
+    data_file = copied(tmpdir, 'ref', 'HSRS', '22')
+    table = np.array(mat_data_parser.load(data_file, cache=True))
+
+    assert all(os.path.isfile(name) for name in mat_data_parser.cache_files(data_file))
+    assert isinstance(mat_data_parser.load(data_file, cache=True), np.memmap)
+
+    """Touched but unchanged: the hash matches, the cache is still used"""
+    os.utime(data_file, (0, 0))
+    assert isinstance(mat_data_parser.load(data_file, cache=True), np.memmap)
+
+    """Same size, different contents (the last digit of the file) and time"""
+    with open(data_file, 'rb') as source:
+        contents = source.read()
+
+    last = len(contents.rstrip())-1
+
+    with open(data_file, 'wb') as source:
+        source.write(contents[:last] + (b'1' if contents[last:last+1] != b'1' else b'2') + contents[last+1:])
+
+    assert os.path.getsize(data_file) == len(contents)
+
+    os.utime(data_file, (1, 1))
+    reloaded = mat_data_parser.load(data_file, cache=True)
+
+    assert not np.array_equal(reloaded, table)
+    np.testing.assert_array_equal(reloaded, np.loadtxt(data_file))
+
+    """A different size"""
+    np.savetxt(data_file, table[:10])
+    np.testing.assert_array_equal(mat_data_parser.load(data_file, cache=True), table[:10])
+
+def test_cache_in_a_read_only_directory(tmpdir, monkeypatch):
+
+    data_file = copied(tmpdir, 'ref', 'HSRS', '22')
+    os.chmod(str(tmpdir), 0o555)
+
+    """Root can write anyway, so writing fails like it would for anyone else"""
+    def read_only(*args, **kwargs):
+        raise OSError(errno.EACCES, 'Permission denied')
+
+    monkeypatch.setattr(mat_data_parser.tempfile, 'mkstemp', read_only)
+
+    try:
+        for attempt in range(2):
+            np.testing.assert_array_equal(mat_data_parser.load(data_file, cache=True), np.loadtxt(data_file))
+
+        assert os.listdir(str(tmpdir)) == ['22']
+
+    finally:
+        os.chmod(str(tmpdir), 0o755)
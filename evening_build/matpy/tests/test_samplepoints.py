@@ -0,0 +1,39 @@
+"""samplepoints gives the same points for fitted models whether it samples them as arrays or one strain at a time."""
+
+import numpy as np
+
+from conftest import reference_file
+import mat_data_parser
+import material_analytics
+
+def test_array_models_stop_at_the_first_nan_like_list_functions():
+
+    data = mat_data_parser.load(reference_file('ref', 'HSRS', '22'))
+    model = material_analytics.stress_model(data, material_analytics.yield_stress(data)[0])
+
+    """The model is out of range past the data, and again for negative strains"""
+    interval = [0., 1.5*max(data[:,0])]
+    one_at_a_time = material_analytics.samplepoints(lambda strain: model(strain), interval, 2000)
+
+    out = np.empty((2000, 2))
+    sampled = material_analytics.samplepoints(model, interval, 2000, out=out)
+
+    """The same stresses, the array path keeps the sampled strain past the last yield point phenomenon point"""
+    assert 0 < len(sampled) < 2000
+    assert len(sampled) == len(one_at_a_time)
+    np.testing.assert_array_equal(sampled[:,1], one_at_a_time[:,1])
+    np.testing.assert_array_equal(sampled[:,0], np.linspace(interval[0], interval[1], 2000)[:len(sampled)])
+    assert sampled.base is out or sampled is out
+
+    out = np.empty((100, 2))
+    sampled = material_analytics.samplepoints(model, [-1., max(data[:,0])], 100, out=out)
+    assert len(sampled) == 0
+
+def test_log_models_keep_every_point_from_zero():
+
+    data = mat_data_parser.load(reference_file('ref', 'HSRS', '22'))
+    model = material_analytics.log_approx(material_analytics.log_prep(data))
+    sampled = material_analytics.samplepoints(model, [0., max(data[:,0])], 500)
+
+    assert len(sampled) == 500
+    assert sampled[0,1] == -np.inf and np.isfinite(sampled[1:]).all()
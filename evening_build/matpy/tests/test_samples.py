@@ -0,0 +1,83 @@
+"""Simulating several samples in one call gives what simulating each of them on its own does."""
+
+import numpy as np
+import pytest
+
+from conftest import reference_file
+import fortran_build
+import irreversible_stressstrain
+
+"""One specimen per reference file, each with its own yield stress and test temperature"""
+names = ['22', '222', '326']
+SS_stress = np.array([500., 650., 800.])
+T_service = np.array([295., 350., 420.])
+parameters = np.array([-45.6, 1.])
+
+@pytest.fixture(params=['numpy', 'fortran'])
+def engine(request):
+
+    if request.param == 'fortran':
+        try:
+            fortran_build.load_extension()
+        except fortran_build.BuildError as error:
+            pytest.skip(str(error))
+
+    previous = irreversible_stressstrain.engine
+    cache = irreversible_stressstrain.cache
+    irreversible_stressstrain.set_cache(0)
+    irreversible_stressstrain.set_engine(request.param)
+
+    yield request.param
+
+    irreversible_stressstrain.engine = previous
+    irreversible_stressstrain.cache = cache
+
+def specimens():
+
+    specimens = [irreversible_stressstrain.StressStrain(reference_file('ref', 'HSRS', name)) for name in names]
+
+    for specimen, temperature in zip(specimens, T_service):
+        specimen.T_service = temperature
+
+    return specimens
+
+@pytest.mark.parametrize('strain_limit, necking', [(None, False), (20., False), (None, True)])
+def test_curves_match_single_samples(engine, strain_limit, necking):
+
+    strain_stress, nsteps, WTN = irreversible_stressstrain.mechanics_samples(parameters, SS_stress, T_service, strain_limit=strain_limit, necking=necking)
+    curves, curves_WTN = specimens()[0].irreversible_model_samples(parameters, SS_stress, T_service, strain_limit=strain_limit, necking=necking)
+
+    for index, specimen in enumerate(specimens()):
+        alone = specimen.irreversible_model(parameters, SS_stress[index], strain_limit=strain_limit, necking=necking)
+
+        assert nsteps[index] == len(alone)
+        np.testing.assert_array_equal(strain_stress[index,:nsteps[index]], alone)
+        assert (strain_stress[index,nsteps[index]:] == 0).all()
+        np.testing.assert_array_equal(curves[index], alone)
+
+    np.testing.assert_array_equal(curves_WTN, WTN)
+
+def test_mcfunc_samples_pools_the_single_sample_errors(engine):
+
+    errors = []
+
+    for index, specimen in enumerate(specimens()):
+        alone = specimen.irreversible_model(parameters, SS_stress[index], strain_limit=specimen.strain_limit())
+        errors.append(irreversible_stressstrain.interpolate_errors(alone, specimen.get_experimental_data())[1])
+
+        """Each sample on its own is what mcfunc scores"""
+        np.testing.assert_allclose(irreversible_stressstrain.mcfunc_samples(parameters, [specimen], SS_stress[index], T_service[index]), specimen.mcfunc(parameters, SS_stress[index]), rtol=1e-12)
+
+    errors = np.concatenate(errors)
+    expected = np.sqrt(np.sum(errors**2)/len(errors))
+
+    np.testing.assert_allclose(irreversible_stressstrain.mcfunc_samples(parameters, specimens(), SS_stress, T_service), expected, rtol=1e-12)
+
+def test_a_single_temperature_applies_to_every_sample(engine):
+
+    strain_stress, nsteps, WTN = irreversible_stressstrain.mechanics_samples(parameters, SS_stress, 295.)
+    swept, swept_nsteps, swept_WTN = irreversible_stressstrain.mechanics_samples(parameters, SS_stress, [295.]*3)
+
+    np.testing.assert_array_equal(strain_stress, swept)
+    np.testing.assert_array_equal(nsteps, swept_nsteps)
+    np.testing.assert_array_equal(WTN, swept_WTN)
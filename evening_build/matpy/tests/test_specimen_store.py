@@ -0,0 +1,69 @@
+"""A specimen store gives back every curve it was created from, with its description."""
+
+import numpy as np
+import pytest
+
+from conftest import reference_file
+import mat_data_parser
+import specimen_store
+
+files = [('ref', 'HSRS', '22'), ('kolskybar.xml',), ('ref', '1000.dat')]
+
+@pytest.fixture
+def store(tmpdir):
+    return specimen_store.create(str(tmpdir.join('store')), [reference_file(*path) for path in files],
+                                 metadata=[{'temperature': '22'}, {}, {'temperature': '1000'}])
+
+def test_curves_round_trip(store, tmpdir):
+
+    """Opened again, as a later session would"""
+    reopened = specimen_store.SpecimenStore(str(tmpdir.join('store')))
+
+    assert len(reopened) == len(files)
+
+    for curve, path in zip(reopened, files):
+        expected = mat_data_parser.load(reference_file(*path), 'xml' if path[-1].endswith('xml') else 'txt')[:,:2]
+        np.testing.assert_array_equal(curve, expected)
+
+    np.testing.assert_array_equal(reopened[-1], reopened[len(files)-1])
+
+    with pytest.raises(IndexError):
+        reopened[len(files)]
+
+def test_offsets_and_lengths(store):
+
+    lengths = [len(mat_data_parser.load(reference_file(*path), 'xml' if path[-1].endswith('xml') else 'txt')) for path in files]
+
+    np.testing.assert_array_equal(store.lengths(), lengths)
+    np.testing.assert_array_equal(store.offsets, np.concatenate(([0], np.cumsum(lengths))))
+    assert len(store.data) == sum(lengths)
+    assert [description['points'] for description in store.metadata] == lengths
+
+def test_metadata_from_xml_headers(store):
+
+    kolsky = store.metadata[1]
+
+    assert kolsky['name'] == 'kolskybar.xml'
+    assert kolsky['material'] == '1018 HT AR'
+    assert kolsky['loading type'] == 'Compression'
+    assert kolsky['headers']['specimenGemoetry/thickness/value'] == '1.980000e+00'
+
+    assert store.find(material='1018 HT AR') == [1]
+    assert store.find(loading_type='Compression') == [1]
+    assert store.find(temperature='1000') == [2]
+    assert store.metadata[0]['material'] is None
+
+def test_curves_are_read_only_views(store):
+
+    curves = store.curves()
+
+    for curve in curves:
+        assert not curve.flags.writeable
+        assert np.may_share_memory(curve, store.data)
+
+    with pytest.raises(ValueError):
+        curves[0][0,1] = 1.
+
+    """A copy can be changed"""
+    changed = curves[0].copy()
+    changed[0,1] = 1.
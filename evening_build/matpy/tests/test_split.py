@@ -0,0 +1,50 @@
+"""two_segment_split finds the split k-means with two clusters finds, and the best two-line split."""
+
+import glob
+import numpy as np
+import pytest
+from sklearn.cluster import KMeans
+
+from conftest import reference_file
+import mat_data_parser
+import material_analytics
+
+def reference_curves():
+    files = sorted(glob.glob(reference_file('ref', 'HSRS', '[0-9]*'))) + sorted(glob.glob(reference_file('ref', '*.dat')))
+    return [mat_data_parser.load(name) for name in files]
+
+@pytest.mark.parametrize('curve', range(len(reference_curves())))
+def test_strain_split_matches_kmeans(curve):
+
+    data = reference_curves()[curve]
+    strains = data[:,0][:,None]
+
+    kmeans = KMeans(n_clusters=2, n_init=10, random_state=0).fit(strains)
+    expected = material_analytics.splitdata(data, kmeans.predict(strains))
+
+    elastic, plastic, index, cost = material_analytics.two_segment_split(data)
+
+    np.testing.assert_array_equal(elastic, expected[0])
+    np.testing.assert_array_equal(plastic, expected[1])
+    assert len(elastic) == index
+    np.testing.assert_allclose(cost, kmeans.inertia_, rtol=1e-9)
+
+def test_linear_split_is_the_best_pair_of_lines():
+
+    random = np.random.RandomState(0)
+    strain = np.linspace(0., 1., 60)
+    stress = np.where(strain < 0.3, 2000.*strain, 600.+100.*(strain-0.3)) + random.normal(0., 2., 60)
+    data = np.column_stack((strain, stress))
+
+    def residuals(segment):
+        coefficients, residual = np.polyfit(segment[:,0], segment[:,1], 1, full=True)[:2]
+        return residual.sum()
+
+    """Every segment needs two points for a line"""
+    costs = dict((index, residuals(data[:index])+residuals(data[index:])) for index in range(2, len(data)-1))
+    best = min(costs, key=costs.get)
+
+    elastic, plastic, index, cost = material_analytics.two_segment_split(data, kind='linear')
+
+    assert index == best
+    np.testing.assert_allclose(cost, costs[best], rtol=1e-6)
@@ -0,0 +1,85 @@
+"""strain_limit and necking_stop end a curve at the step the full curve says they should, with the work up to that step."""
+
+import numpy as np
+import pytest
+
+import fortran_build
+import irreversible_numpy
+
+def engine_model(engine):
+
+    if engine == 'numpy':
+        return irreversible_numpy
+
+    try:
+        return fortran_build.load_extension()
+    except fortran_build.BuildError as error:
+        pytest.skip(str(error))
+
+def integrate(model, M_para, **stops):
+    """A single curve at 500 MPa and 295 K, with the stops given as keywords"""
+
+    stress_strain, nsteps, WTN = model.mechanics_batch(np.zeros(1), np.array([500.]), np.array([295.]), np.array([M_para], dtype=float), **stops)
+
+    return stress_strain[0], nsteps[0], WTN[0]
+
+def steps(curve, nsteps):
+    """The strain (not in %) and stress of every step, and the slope dsds the model checks for necking"""
+
+    strain = curve[:nsteps,0]/100.
+    stress = curve[:nsteps,1]
+
+    with np.errstate(all='ignore'):
+        dsds = np.diff(np.concatenate(([0.], stress)))/np.diff(np.concatenate(([0.], strain)))
+
+    return strain, stress, dsds
+
+def work(strain, stress):
+    """WTN after every step"""
+
+    return np.cumsum(stress*np.diff(np.concatenate(([0.], strain))))
+
+@pytest.mark.parametrize('engine', ['numpy', 'fortran'])
+@pytest.mark.parametrize('M_para, limit', [([-45.6, 1.], 20.), ([-45.6, 1.], 3.), ([-150., 1.], 35.)])
+def test_strain_limit_stops_after_the_first_step_past_it(engine, M_para, limit):
+
+    model = engine_model(engine)
+    full, full_nsteps, full_WTN = integrate(model, M_para)
+    strain, stress, dsds = steps(full, full_nsteps)
+
+    past = np.flatnonzero(full[:full_nsteps,0] > limit)
+    assert len(past)
+    expected = past[0]+1
+
+    curve, nsteps, WTN = integrate(model, M_para, strain_limit=limit)
+
+    assert nsteps == expected
+    np.testing.assert_array_equal(curve[:nsteps], full[:nsteps])
+    assert (curve[nsteps:] == 0).all()
+    np.testing.assert_allclose(WTN, work(strain, stress)[nsteps-1], rtol=1e-10)
+    np.testing.assert_allclose(full_WTN, work(strain, stress)[-1], rtol=1e-10)
+
+@pytest.mark.parametrize('engine', ['numpy', 'fortran'])
+@pytest.mark.parametrize('M_para', [[-300., 1.], [-45.6, 0.8]])
+def test_necking_stop_stops_at_the_first_step_that_necks(engine, M_para):
+
+    model = engine_model(engine)
+    full, full_nsteps, full_WTN = integrate(model, M_para)
+    strain, stress, dsds = steps(full, full_nsteps)
+
+    necks = np.flatnonzero(dsds <= stress)
+    assert len(necks)
+    expected = necks[0]+1
+
+    curve, nsteps, WTN = integrate(model, M_para, necking_stop=1)
+
+    assert nsteps == expected < full_nsteps
+    np.testing.assert_array_equal(curve[:nsteps], full[:nsteps])
+    np.testing.assert_allclose(WTN, work(strain, stress)[nsteps-1], rtol=1e-10)
+
+    """The first stop reached ends the curve"""
+    limit = full[nsteps//2,0]
+    curve, both, WTN = integrate(model, M_para, strain_limit=limit, necking_stop=1)
+
+    assert both == np.flatnonzero(full[:full_nsteps,0] > limit)[0]+1
+    np.testing.assert_allclose(WTN, work(strain, stress)[both-1], rtol=1e-10)
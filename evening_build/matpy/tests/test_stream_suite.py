@@ -0,0 +1,54 @@
+"""Concurrent runs of optimization_suite that finish, fail or are stopped."""
+
+import time
+import numpy as np
+import pytest
+from scipy.optimize import OptimizeResult
+
+import optimization_suite
+
+def sphere(x, SS_stress=0.):
+    return np.sum((np.asarray(x)-1)**2)
+
+def slow_method(function, x0, args=(), **options):
+    """A minimizer that takes far longer than the timeouts below"""
+
+    time.sleep(30)
+
+    return OptimizeResult(x=x0, fun=function(x0, *args), nit=1)
+
+def crashing_method(function, x0, args=(), **options):
+    """A minimizer whose worker process dies"""
+
+    import os
+    os._exit(3)
+
+def test_every_method_yields_exactly_once():
+
+    methods = ['Nelder-Mead', slow_method, 'Powell', crashing_method, 'BFGS']
+    started = time.time()
+
+    results = list(optimization_suite.stream_suite(sphere, methods, [3., 3.], timeout=1., processes=2))
+
+    assert time.time()-started < 20
+    assert sorted(counter for counter, result in results) == range(len(methods))
+
+    results = dict(results)
+
+    for counter in (0, 2, 4):
+        assert results[counter].success
+        np.testing.assert_allclose(results[counter].x, [1., 1.], atol=1e-3)
+
+    assert results[1].message == 'Stopped after 1.0 seconds'
+    assert 'exited with code 3' in results[3].message
+
+def test_stopped_stress_strain_fit_raises():
+
+    with pytest.raises(RuntimeError):
+        optimization_suite.minimize_suite(sphere, [slow_method, 'Nelder-Mead'], [3., 3.], SS_stress=500., concurrent=True, timeout=0.5)
+
+def test_concurrent_stress_strain_fit():
+
+    x = optimization_suite.minimize_suite(sphere, ['Nelder-Mead', slow_method], [3., 3.], SS_stress=500., concurrent=True, timeout=0.5)
+
+    np.testing.assert_allclose(x, [1., 1.], atol=1e-2)
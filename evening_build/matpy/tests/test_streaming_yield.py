@@ -0,0 +1,47 @@
+"""StreamingYield finds the same yield point however a curve is chunked, and the one the unfitted detector finds."""
+
+import numpy as np
+import pytest
+
+from conftest import reference_file
+import mat_data_parser
+import material_analytics
+
+def stream(data, size, **options):
+    """Gives the curve to a StreamingYield in chunks of size rows, returning its yield point"""
+
+    detector = material_analytics.StreamingYield(**options)
+
+    for start in xrange(0, len(data), size):
+        detector.update(data[start:start+size])
+
+    return detector.yieldpoint
+
+def unfitted_modulus(data):
+    """The secant modulus yield_stress_classic_unfitted draws its offset line with"""
+
+    average = (data[-1,1]-data[0,1])/(data[-1,0]-data[0,0])
+    bend = np.abs(material_analytics.get_slopes(data)-average).argmin()
+
+    return (data[bend,1]-data[0,1])/(data[bend,0]-data[0,0])
+
+@pytest.mark.parametrize('name', ['1000.dat', '850.dat', '900.dat'])
+def test_chunk_size_does_not_matter(name):
+
+    data = mat_data_parser.load(reference_file('ref', name))
+    whole = stream(data, len(data))
+
+    assert whole is not None
+
+    for size in (1, 3, 7, 19, 20, 21, 100):
+        np.testing.assert_array_equal(stream(data, size), whole)
+        np.testing.assert_array_equal(stream(data, size, modulus=unfitted_modulus(data)), stream(data, len(data), modulus=unfitted_modulus(data)))
+
+@pytest.mark.parametrize('name', ['1000.dat', '850.dat', '900.dat'])
+def test_matches_the_unfitted_detector(name):
+
+    data = mat_data_parser.load(reference_file('ref', name))
+    expected = material_analytics.yield_stress_classic_unfitted(data.copy())
+
+    for size in (1, 7, len(data)):
+        np.testing.assert_array_equal(stream(data, size, modulus=unfitted_modulus(data)), expected)
@@ -0,0 +1,64 @@
+"""The array model protocol of StressModel and LogModel gives the values of the original refitting closure."""
+
+import numpy as np
+import pytest
+
+from conftest import reference_file
+import benchmark_suite
+import mat_data_parser
+import material_analytics
+
+def closure_stresses(closure, strains):
+    """The stress the closure gives at every strain, one strain at a time, NaN where it is out of range"""
+
+    stresses = np.empty(len(strains))
+
+    for index, strain in enumerate(strains):
+        value = closure(strain)
+        stresses[index] = np.nan if np.ndim(value) == 0 else value[1]
+
+    return stresses
+
+@pytest.mark.parametrize('name', ['22', '222', '326'])
+def test_stress_model_stresses_match_the_closure(name):
+
+    data = mat_data_parser.load(reference_file('ref', 'HSRS', name))
+    yielding = material_analytics.yield_stress(data)[0]
+
+    """Every region, including strains out of range on both sides"""
+    strains = np.linspace(-0.1*max(data[:,0]), 1.2*max(data[:,0]), 300)
+    strains = np.union1d(strains, data[::7,0])
+
+    model = material_analytics.stress_model(data, yielding)
+    expected = closure_stresses(benchmark_suite.stress_model_classic(data, yielding), strains)
+
+    stresses = model.stresses(strains)
+    np.testing.assert_allclose(stresses, expected, rtol=1e-10)
+    assert np.isnan(stresses[strains < 0]).all() and np.isnan(stresses[strains > max(data[:,0])]).all()
+    assert np.isfinite(stresses[(strains >= 0) & (strains <= max(data[:,0]))]).all()
+
+    """samplepoints takes the array path and stops at the first NaN"""
+    interval = [0., 1.2*max(data[:,0])]
+    sampled = material_analytics.samplepoints(model, interval, 300)
+    reference = closure_stresses(benchmark_suite.stress_model_classic(data, yielding), np.linspace(interval[0], interval[1], 300))
+
+    assert len(sampled) == np.flatnonzero(np.isnan(reference))[0]
+    np.testing.assert_allclose(sampled[:,1], reference[:len(sampled)], rtol=1e-10)
+
+def test_log_model_stresses_match_the_closure_in_the_plastic_region():
+
+    data = mat_data_parser.load(reference_file('ref', 'HSRS', '22'))
+    yielding = material_analytics.yield_stress(data)[0]
+    yield_index = material_analytics.point_index(data, yielding)
+
+    """The closure refits the plastic region for every strain past the yield point"""
+    model = material_analytics.log_approx(data[yield_index+1:])
+    strains = np.linspace(yielding[0], max(data[:,0]), 200)
+    expected = closure_stresses(benchmark_suite.stress_model_classic(data, yielding), strains)
+
+    np.testing.assert_allclose(model.stresses(strains), expected, rtol=1e-10)
+    np.testing.assert_allclose(model.stresses(strains), [model(strain) for strain in strains], rtol=1e-12)
+
+    """The logarithm is not defined below zero"""
+    stresses = model.stresses([-1., 0.])
+    assert np.isnan(stresses[0]) and stresses[1] == -np.inf
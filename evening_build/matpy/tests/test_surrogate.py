@@ -0,0 +1,55 @@
+"""The surrogate optimizer with objectives that fail (return nan)."""
+
+import numpy as np
+
+import optimization_suite
+
+class FailingFirst:
+    """(x-1)^2 summed, but nan for the first *failures* calls (the whole initial design)"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self, x):
+        self.calls += 1
+
+        if self.calls <= self.failures:
+            return np.nan
+
+        return np.sum((np.asarray(x)-1)**2)
+
+def test_surrogate_recovers_from_a_failed_initial_design():
+
+    """x0 and the 2*(2+1) initial points all fail"""
+    function = FailingFirst(7)
+    result = optimization_suite.surrogate_minimize(function, [0., 0.], bounds=[[-2., 3.], [-2., 3.]], max_evaluations=40, seed=0)
+
+    assert result.nfev == function.calls
+    assert np.isfinite(result.fun) and result.fun < 1.
+    assert np.isnan(result.evaluated_values[:7]).all()
+
+def test_surrogate_fails_cleanly_if_nothing_can_be_evaluated():
+
+    result = optimization_suite.surrogate_minimize(lambda x: np.nan, [0., 0.], max_evaluations=15, seed=0)
+
+    assert not result.success and np.isnan(result.fun)
+
+def test_callback_while_every_evaluation_fails():
+
+    called = []
+    result = optimization_suite.surrogate_minimize(lambda x: np.nan, [0., 0.], max_evaluations=12, seed=0, callback=called.append)
+
+    assert len(called) == result.nit > 0
+    np.testing.assert_array_equal(called[0], [0., 0.])
+
+def test_surrogate_reports_what_it_saved():
+
+    sphere = lambda x: np.sum((np.asarray(x)-1)**2)
+    result = optimization_suite.surrogate_minimize(sphere, [0., 0.], bounds=[[-2., 3.], [-2., 3.]], max_evaluations=200,
+                                                   candidates=50, tol=0.05, seed=0)
+
+    """The initial design is x0 and 2*(2+1) points, every iteration evaluates one of its candidates"""
+    assert result.saved == 200-result.nfev > 0
+    assert result.screened == 50*result.nit
+    assert result.unevaluated == result.screened-(result.nfev-7)
@@ -0,0 +1,54 @@
+"""yield_stress_batch finds the same yield points as the detectors it runs on every curve."""
+
+import glob
+import numpy as np
+import pytest
+
+from conftest import reference_file
+import mat_data_parser
+import material_analytics
+
+def reference_curves():
+    files = sorted(glob.glob(reference_file('ref', 'HSRS', '[0-9]*'))) + sorted(glob.glob(reference_file('ref', '*.dat')))
+    return [mat_data_parser.load(name) for name in files]
+
+@pytest.mark.parametrize('method', sorted(material_analytics.yield_methods.keys()))
+def test_batch_matches_every_detector(method):
+
+    curves = reference_curves()
+    points, moduli, indices = material_analytics.yield_stress_batch(curves, method=method, processes=1)
+
+    for curve, point, modulus, index in zip(curves, points, moduli, indices):
+
+        try:
+            expected = material_analytics.yield_methods[method](curve.copy())[0]
+
+        except (ValueError, IndexError):
+            """The fitted detector cannot find a yield in these curves, which the batch marks instead of stopping"""
+            assert index == -1 and np.isnan(point).all()
+            continue
+
+        np.testing.assert_array_equal(point, expected)
+        assert index == material_analytics.point_index(curve, expected)
+        np.testing.assert_allclose(modulus, material_analytics.elastic_modulus(curve, index))
+
+def test_shared_strains_match_the_unfitted_detector():
+
+    curve = reference_curves()[0]
+    curves = [np.column_stack((curve[:,0], curve[:,1]*scale + shift)) for scale, shift in ((1., 0.), (0.8, 5.), (1.3, -20.))]
+
+    for keywords in ({}, {'cutoff': 0.0}, {'offset': 0.004, 'cutoff': 0.1}):
+
+        points, moduli, indices = material_analytics.yield_stress_batch(curves, method='unfitted', **keywords)
+
+        for curve, point, modulus, index in zip(curves, points, moduli, indices):
+
+            expected = material_analytics.yield_stress_classic_unfitted(curve.copy(), **keywords)[0]
+
+            np.testing.assert_array_equal(point, expected)
+            np.testing.assert_allclose(modulus, material_analytics.elastic_modulus(curve, index))
+
+def test_real_errors_are_not_hidden():
+
+    with pytest.raises(TypeError):
+        material_analytics.yield_stress_batch(reference_curves()[:1], method='kmeans', processes=1, unknown=1)